@@ -0,0 +1,146 @@
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from config import ConfigManager
+from pipeline import QuestionResult
+from runner import build_run_args, run_job
+
+_DONE = object()
+
+
+class RangeRun:
+    """Results of one question range, yielded as soon as each question finishes.
+
+    The range is processed by ``run_job`` on a background thread, with the
+    same search, fetch, render and merge steps as the command line, so PDFs
+    can be used while later questions are still running. Questions finish
+    out of order. After the last result, ``summary`` holds the run summary.
+    Stopping early, by leaving the loop or calling ``close`` (``aclose`` or
+    ``async with`` for ``async for``), finishes the questions already running
+    and skips the rest.
+    """
+
+    def __init__(
+        self,
+        exam: str,
+        begin: int,
+        end: int,
+        config_path: str = "settings.json",
+        **options: Any,
+    ):
+        self.args = build_run_args(exam, begin, end, config_path, options)
+        self.config_manager = ConfigManager(config_path)
+        self.config_manager.load_config()
+        self.summary: Optional[Dict[str, Any]] = None
+        self._results: "queue.Queue[Any]" = queue.Queue()
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f"run-{self.args.exam}", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __iter__(self) -> Iterator[QuestionResult]:
+        self.start()
+        try:
+            while True:
+                result = self._next_result()
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            self.close()
+
+        if self._error is not None:
+            raise self._error
+
+    def __aiter__(self) -> AsyncIterator[QuestionResult]:
+        self.start()
+        return self._aiterate()
+
+    async def _aiterate(self) -> AsyncIterator[QuestionResult]:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                result = await loop.run_in_executor(None, self._next_result)
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            # Set right away, joining the run thread must not block the loop
+            self._stop.set()
+            await loop.run_in_executor(None, self.close)
+
+        if self._error is not None:
+            raise self._error
+
+    async def aclose(self) -> None:
+        self._stop.set()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self) -> "RangeRun":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "RangeRun":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    def _next_result(self) -> Any:
+        if self._thread is None or (self._results.empty() and not self._thread.is_alive()):
+            return _DONE
+        return self._results.get()
+
+    def _run(self) -> None:
+        try:
+            self.summary = run_job(
+                self.args,
+                self.config_manager,
+                on_result=self._results.put,
+                stop_event=self._stop,
+            )
+            if self.summary is None:
+                self._error = ValueError(
+                    f"Invalid run for exam '{self.args.exam}', see the log for details"
+                )
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._results.put(_DONE)
+
+
+def run_range(
+    exam: str, begin: int, end: int, config_path: str = "settings.json", **options: Any
+) -> RangeRun:
+    """Process questions ``begin`` to ``end`` of an exam and iterate over the results.
+
+    ``options`` are the command line options, e.g. ``output="pdfs"``,
+    ``workers=4`` or ``no_merge=True``. Each result is a ``QuestionResult``
+    whose ``status`` is one of the ``STATUS_*`` values of ``pipeline`` and
+    whose ``pdf_path`` is set for generated questions::
+
+        for result in run_range("saa-c03", 1, 50, workers=4):
+            if result.status == STATUS_SUCCESS:
+                upload(result.pdf_path)
+
+    ``async for`` works the same way. As on the command line, question PDFs
+    are removed once they are merged unless ``keep_individual`` or
+    ``no_merge`` is set.
+    """
+    return RangeRun(exam, begin, end, config_path, **options)
@@ -0,0 +1,127 @@
+import os
+import re
+import shutil
+import zipfile
+from typing import BinaryIO, Dict, List, Optional
+
+from logger import get_app_logger
+
+ENTRY_PATTERN = re.compile(r"^(?P<exam>.+)_question(?P<question>\d+)\.pdf$")
+
+
+def archive_entry_name(exam: str, question_num: int) -> str:
+    return f"{exam}_question{question_num}.pdf"
+
+
+class QuestionArchiveWriter:
+    """Collects question PDFs in one zip archive while a run is going on.
+
+    Each PDF is appended as soon as its question is done, so the loose file
+    can be removed right away. PDFs are already compressed and are stored
+    as they are. The zip central directory, written by ``close``, is the
+    index that lets a reader go straight to one question. Until then the
+    archive is a ``.part`` file, so an interrupted run never leaves a
+    truncated archive under the final name.
+    """
+
+    def __init__(self, exam: str, output_path: str):
+        self.exam = exam
+        self.output_path = output_path
+        self.part_path = f"{output_path}.part"
+        self.questions: List[int] = []
+        self.logger = get_app_logger()
+        self._zip: Optional[zipfile.ZipFile] = None
+
+    def open(self) -> None:
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._zip = zipfile.ZipFile(
+            self.part_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True
+        )
+
+    def add(self, question_num: int, pdf_path: str) -> bool:
+        if question_num in self.questions:
+            self.logger.warning(f"Question {question_num} is already archived")
+            return False
+
+        try:
+            self._zip.write(pdf_path, archive_entry_name(self.exam, question_num))
+        except Exception as e:
+            self.logger.error(f"Failed to archive question {question_num}: {str(e)}")
+            return False
+
+        self.questions.append(question_num)
+        return True
+
+    def close(self) -> bool:
+        if self._zip is None:
+            return False
+
+        self._zip.close()
+        self._zip = None
+        if not self.questions:
+            os.remove(self.part_path)
+            return False
+
+        os.replace(self.part_path, self.output_path)
+        return True
+
+    def abort(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+
+class QuestionArchive:
+    """Reads single questions from an archive written by ``QuestionArchiveWriter``.
+
+    Opening the archive only reads its index; reading a question reads just
+    that question's bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._entries: Dict[int, zipfile.ZipInfo] = {}
+        for info in self._zip.infolist():
+            match = ENTRY_PATTERN.match(info.filename)
+            if match:
+                self._entries[int(match.group("question"))] = info
+
+    def questions(self) -> List[int]:
+        return sorted(self._entries)
+
+    def __contains__(self, question_num: int) -> bool:
+        return question_num in self._entries
+
+    def open(self, question_num: int) -> BinaryIO:
+        """File object with the PDF of a question, raising KeyError if missing."""
+        info = self._entries.get(question_num)
+        if info is None:
+            raise KeyError(f"Question {question_num} is not in {self.path}")
+        return self._zip.open(info)
+
+    def read(self, question_num: int) -> bytes:
+        with self.open(question_num) as pdf_file:
+            return pdf_file.read()
+
+    def extract(self, question_num: int, directory: str) -> str:
+        """Write one question's PDF to ``directory`` and return its path."""
+        with self.open(question_num) as pdf_file:
+            os.makedirs(directory, exist_ok=True)
+            output_path = os.path.join(directory, os.path.basename(pdf_file.name))
+            with open(output_path, "wb") as output_file:
+                shutil.copyfileobj(pdf_file, output_file)
+        return output_path
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> "QuestionArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+
+from logger import get_app_logger
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+KIND_SEARCH = "search"
+KIND_FETCH = "fetch"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class ReplayedError(Exception):
+    """Stands in for a recorded error that has no more specific type."""
+
+
+class Cassette:
+    """Records search results and fetched responses to a directory and replays them.
+
+    Each request is stored under a hash of its query or URL, together with
+    how long it took and the error it raised, if any. A request made several
+    times keeps every outcome, in order. In replay mode nothing
+    goes to the network: responses and errors come from the directory, after
+    a delay of the recorded time multiplied by ``latency_scale``. Directories
+    are safe to share between worker processes.
+    """
+
+    def __init__(self, directory: str, mode: str = MODE_REPLAY, latency_scale: float = 0.0):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == MODE_REPLAY and not os.path.isdir(directory):
+            raise ValueError(f"Cassette directory not found: {directory}")
+
+        self.directory = directory
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.logger = get_app_logger()
+        self._lock = threading.Lock()
+        # Next outcome position per request, for recording and replaying
+        self._recorded: Dict[str, int] = {}
+        self._replayed: Dict[str, int] = {}
+
+    def search(self, query: str, perform: Callable[[], List[dict]]) -> List[dict]:
+        return self._play(KIND_SEARCH, query, perform, self._save_search, self._load_search)
+
+    def fetch(
+        self, url: str, perform: Callable[[], Tuple[str, bytes, Any, int]]
+    ) -> Tuple[str, bytes, Any, int]:
+        """Replay or record a download as (final URL, body, headers, status)."""
+        return self._play(KIND_FETCH, url, perform, self._save_fetch, self._load_fetch)
+
+    def _play(self, kind, key, perform, save, load):
+        path = self._path(kind, key)
+
+        if self.mode == MODE_REPLAY:
+            entry = self._next_entry(kind, key, path)
+            if self.latency_scale:
+                time.sleep(entry["elapsed"] * self.latency_scale)
+            if "error" in entry:
+                raise _replay_error(key, entry["error"])
+            return load(path, entry)
+
+        started = time.monotonic()
+        try:
+            value = perform()
+        except Exception as e:
+            self._write_entry(
+                path,
+                {"key": key, "elapsed": time.monotonic() - started, "error": _record_error(e)},
+            )
+            raise
+
+        entry = {"key": key, "elapsed": time.monotonic() - started}
+        entry.update(save(path, value))
+        self._write_entry(path, entry)
+        return value
+
+    def _next_entry(self, kind: str, key: str, path: str) -> Dict[str, Any]:
+        # Outcomes are replayed in the order they were recorded, so a request
+        # that failed and then succeeded on retry does the same again. Past
+        # the last one, the last outcome is repeated.
+        with self._lock:
+            position = self._replayed.get(path, 0)
+            self._replayed[path] = position + 1
+
+        for index in range(position, -1, -1):
+            try:
+                with open(f"{path}.{index}.json", encoding="utf-8") as entry_file:
+                    return json.load(entry_file)
+            except FileNotFoundError:
+                continue
+        raise CassetteMissError(f"No recorded {kind} for {key}")
+
+    def _save_search(self, path: str, results: List[dict]) -> Dict[str, Any]:
+        return {"results": results}
+
+    def _load_search(self, path: str, entry: Dict[str, Any]) -> List[dict]:
+        return entry["results"]
+
+    def _save_fetch(self, path: str, response: Tuple[str, bytes, Any, int]) -> Dict[str, Any]:
+        final_url, body, headers, status = response
+        # Bodies can be large images, so they are kept next to the entries,
+        # named by their content so that repeated responses share one file
+        body_name = f"{os.path.basename(path)}.{hashlib.sha256(body).hexdigest()[:16]}.body"
+        atomic_write(os.path.join(os.path.dirname(path), body_name), body)
+        return {
+            "url": final_url,
+            "headers": [[name, str(value)] for name, value in (headers or {}).items()],
+            "status": status,
+            "body": body_name,
+        }
+
+    def _load_fetch(self, path: str, entry: Dict[str, Any]) -> Tuple[str, bytes, Any, int]:
+        with open(os.path.join(os.path.dirname(path), entry["body"]), "rb") as body_file:
+            body = body_file.read()
+        return entry["url"], body, dict(entry["headers"]), entry["status"]
+
+    def _write_entry(self, path: str, entry: Dict[str, Any]) -> None:
+        data = json.dumps(entry, indent=2).encode("utf-8")
+        with self._lock:
+            index = self._recorded.get(path, 0)
+        # Workers may record the same request at once; each outcome claims the
+        # next free position by linking a complete file into place
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            while True:
+                try:
+                    os.link(temp_path, f"{path}.{index}.json")
+                    break
+                except FileExistsError:
+                    index += 1
+        finally:
+            os.remove(temp_path)
+
+        with self._lock:
+            self._recorded[path] = index + 1
+        self.logger.debug(f"Recorded {entry['key']} to {path}.{index}.json")
+
+    def _path(self, kind: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, kind, digest)
+
+
+def _record_error(error: Exception) -> Dict[str, Any]:
+    if isinstance(error, HTTPError):
+        return {"type": "http", "code": error.code, "message": str(error.reason)}
+    if isinstance(error, URLError):
+        return {"type": "url", "message": str(error.reason)}
+    if isinstance(error, (socket.timeout, TimeoutError)):
+        return {"type": "timeout", "message": str(error)}
+    return {"type": type(error).__name__, "message": str(error)}
+
+
+def _replay_error(key: str, error: Dict[str, Any]) -> Exception:
+    if error["type"] == "http":
+        return HTTPError(key, error["code"], error["message"], None, None)
+    if error["type"] == "url":
+        return URLError(error["message"])
+    if error["type"] == "timeout":
+        return socket.timeout(error["message"])
+    return ReplayedError(f"{error['type']}: {error['message']}")
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write a file so readers only ever see it complete."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Workers recording the same request at once must not leave a torn file
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
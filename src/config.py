@@ -1,6 +1,9 @@
 import json
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from image_policy import validate_image_policy
+from page_selection import validate_page_rules
 
 
 class ConfigManager:
@@ -56,6 +59,12 @@ class ConfigManager:
         for i, exam in enumerate(self.config["exams"]):
             self._validate_exam_config(exam, i)
 
+        if "page_rules" in self.config:
+            validate_page_rules(self.config["page_rules"])
+
+        if "image_policy" in self.config:
+            validate_image_policy(self.config["image_policy"])
+
     def _validate_exam_config(self, exam: Dict[str, Any], index: int) -> None:
         required_exam_fields = ["exam", "title", "keyword", "url_substring"]
 
@@ -68,6 +77,54 @@ class ConfigManager:
                     f"Field '{field}' must be a non-empty string in exam {index}"
                 )
 
+        if "queries" in exam:
+            self._validate_queries(exam["queries"], index)
+
+        if "page_rules" in exam:
+            try:
+                validate_page_rules(exam["page_rules"])
+            except ValueError as e:
+                raise ValueError(f"Invalid page_rules in exam {index}: {e}")
+
+        if "image_policy" in exam:
+            try:
+                validate_image_policy(exam["image_policy"])
+            except ValueError as e:
+                raise ValueError(f"Invalid image_policy in exam {index}: {e}")
+
+    def _validate_queries(self, queries: Any, index: int) -> None:
+        if not isinstance(queries, list):
+            raise ValueError(f"'queries' must be a list in exam {index}")
+
+        for query in queries:
+            if not isinstance(query, dict):
+                raise ValueError(f"Each query must be an object in exam {index}")
+            for field in ("title", "keyword"):
+                value = query.get(field)
+                if not isinstance(value, str) or not value.strip():
+                    raise ValueError(
+                        f"Query field '{field}' must be a non-empty string in exam {index}"
+                    )
+
+    def get_query_templates(self, exam_code: str) -> List[Dict[str, str]]:
+        # The exam's own title and keyword come first, then extra queries
+        exam = self.get_exam_config(exam_code) or {}
+        templates = []
+        for query in [exam] + exam.get("queries", []):
+            template = {"title": query["title"], "keyword": query["keyword"]}
+            if template not in templates:
+                templates.append(template)
+        return templates
+
+    def get_page_rules(self, exam_code: str) -> Optional[Dict[str, Any]]:
+        # Exam rules take precedence over the shared default
+        exam = self.get_exam_config(exam_code) or {}
+        return exam.get("page_rules", self.config.get("page_rules"))
+
+    def get_image_policy(self, exam_code: str) -> Optional[Dict[str, Any]]:
+        exam = self.get_exam_config(exam_code) or {}
+        return exam.get("image_policy", self.config.get("image_policy"))
+
     def get_site_url(self) -> str:
         if not self.config:
             self.load_config()
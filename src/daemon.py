@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from config import ConfigManager
+from logger import get_app_logger
+from render_pool import RenderPool
+from runner import (
+    build_run_args,
+    create_optimizer,
+    create_render_pool,
+    processor_settings,
+    run_job,
+)
+
+
+# Render pools kept warm between jobs; the least recently used one is closed
+# when jobs with other worker options come in
+MAX_WARM_POOLS = 2
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    """``POST /jobs`` runs a job and streams its events as JSON lines."""
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {"status": "ok", "busy": self.server.job_daemon.busy})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            args = self.server.job_daemon.parse_job(request)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        disconnected = False
+
+        def emit(event: Dict[str, Any]) -> None:
+            # A client that goes away does not cancel the job
+            nonlocal disconnected
+            if disconnected:
+                return
+            try:
+                self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                disconnected = True
+
+        self.server.job_daemon.run(args, emit)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        get_app_logger().debug(f"Daemon request: {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class JobDaemon:
+    """Long-lived process that runs jobs with warm render workers.
+
+    Render pools are kept between jobs, keyed by the options their workers
+    were started with, so imports, fonts and fetched resources stay warm and
+    a job only pays for the questions it asks for. Up to ``max_pools`` pools
+    are kept. Jobs that hand their questions to a work queue get a
+    dispatcher of their own. Jobs run one at a time;
+    later requests are told they are queued and wait for their turn.
+    """
+
+    def __init__(
+        self,
+        config_path: str = "settings.json",
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        socket_path: Optional[str] = None,
+        max_pools: int = MAX_WARM_POOLS,
+    ):
+        self.config_path = config_path
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.logger = get_app_logger()
+        self.busy = False
+        self._job_lock = threading.Lock()
+        self.max_pools = max_pools
+        self._pools: "OrderedDict[tuple, RenderPool]" = OrderedDict()
+        self._server = None
+
+    def parse_job(self, request: Dict[str, Any]) -> argparse.Namespace:
+        """Turn a job request into run arguments, raising ValueError if invalid."""
+        if not isinstance(request, dict):
+            raise ValueError("Job must be a JSON object")
+        if any(key not in request for key in ("exam", "begin", "end")):
+            raise ValueError("Job needs 'exam', 'begin' and 'end'")
+
+        return build_run_args(
+            request["exam"],
+            request["begin"],
+            request["end"],
+            self.config_path,
+            request.get("options"),
+        )
+
+    def run(self, args: argparse.Namespace, emit: Callable[[Dict[str, Any]], None]) -> None:
+        if self._job_lock.locked():
+            emit({"event": "queued"})
+
+        with self._job_lock:
+            self.busy = True
+            emit({"event": "started", "exam": args.exam, "begin": args.begin, "end": args.end})
+            try:
+                config_manager = ConfigManager(args.config)
+                config_manager.load_config()
+
+                summary = run_job(
+                    args,
+                    config_manager,
+                    render_pool=self._pool_for(args, config_manager.get_log_level()),
+                    on_result=lambda result: emit({"event": "question", **asdict(result)}),
+                )
+                if summary is None:
+                    emit({"event": "failed", "error": "Invalid exam or question range"})
+                else:
+                    emit({"event": "finished", "summary": summary})
+
+            except Exception as e:
+                self.logger.error(f"Job for {args.exam} failed: {str(e)}")
+                emit({"event": "failed", "error": str(e)})
+            finally:
+                self.busy = False
+
+    def serve_forever(self) -> None:
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._server = _UnixHTTPServer(self.socket_path, _JobRequestHandler)
+            os.chmod(self.socket_path, 0o600)
+            self.logger.info(f"Daemon listening on {self.socket_path}")
+        else:
+            self._server = ThreadingHTTPServer((self.host, self.port), _JobRequestHandler)
+            self._server.daemon_threads = True
+            self.logger.info(f"Daemon listening on http://{self.host}:{self.port}")
+
+        self._server.job_daemon = self
+        self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = OrderedDict()
+
+    def _pool_for(self, args: argparse.Namespace, log_level: str) -> Optional[RenderPool]:
+        # A queue dispatcher is bound to its job, so run_job makes its own
+        if args.queue:
+            return None
+
+        settings = processor_settings(args)
+        pool = self._pools.get(settings)
+        if pool is not None:
+            self._pools.move_to_end(settings)
+            return pool
+
+        while len(self._pools) >= self.max_pools:
+            _, evicted = self._pools.popitem(last=False)
+            self.logger.info("Closing the least recently used render workers")
+            evicted.close()
+
+        self.logger.info(f"Starting {args.workers} render workers")
+        pool = create_render_pool(args, create_optimizer(args), log_level)
+        pool.start()
+        self._pools[settings] = pool
+        return pool
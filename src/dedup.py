@@ -0,0 +1,146 @@
+import hashlib
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Set, Tuple
+
+from logger import get_app_logger
+
+FINGERPRINT_BITS = 64
+BAND_BITS = 16
+
+
+class _TextExtractor(HTMLParser):
+    """Collects visible text, preferring the element that holds the question."""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template", "head"}
+    # Elements without an end tag, which must not count towards the depth
+    VOID_TAGS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input",
+        "link", "meta", "param", "source", "track", "wbr",
+    }
+
+    def __init__(self, content_class: str):
+        super().__init__()
+        self.content_class = content_class
+        self.page_text: List[str] = []
+        self.content_text: List[str] = []
+        self._skip_depth = 0
+        self._content_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        if tag in self.VOID_TAGS:
+            return
+        if self._content_depth:
+            self._content_depth += 1
+        elif self.content_class in (dict(attrs).get("class") or "").split():
+            self._content_depth = 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if self._content_depth and tag not in self.VOID_TAGS:
+            self._content_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.page_text.append(data)
+        if self._content_depth:
+            self.content_text.append(data)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles of the given text."""
+    words = re.findall(r"\w+", text.lower())
+    shingles = [" ".join(words[i : i + 3]) for i in range(max(1, len(words) - 2))]
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class DuplicateDetector:
+    """Detects questions that resolve to a page that was already rendered.
+
+    Exact duplicates are found by URL. Near-duplicates, such as mirrored pages
+    with the same question, are found by the Hamming distance between SimHash
+    fingerprints of the question text. Fingerprints are split into bands so
+    that candidates are looked up instead of compared against every page.
+    """
+
+    def __init__(self, max_distance: int = 3, content_class: str = "question-body"):
+        # Any two fingerprints within max_distance bits agree on at least one
+        # band as long as there are more bands than allowed differing bits.
+        if max_distance >= FINGERPRINT_BITS // BAND_BITS:
+            raise ValueError(
+                f"max_distance must be below {FINGERPRINT_BITS // BAND_BITS}"
+            )
+
+        self.max_distance = max_distance
+        self.content_class = content_class
+        self.logger = get_app_logger()
+        self._urls: Dict[str, int] = {}
+        self._fingerprints: Dict[int, int] = {}
+        self._bands: Dict[Tuple[int, int], Set[int]] = {}
+
+    def normalize_url(self, url: str) -> str:
+        return url.split("#", 1)[0].rstrip("/").lower()
+
+    def fingerprint(self, html: str) -> int:
+        extractor = _TextExtractor(self.content_class)
+        extractor.feed(html)
+        text = " ".join(extractor.content_text) or " ".join(extractor.page_text)
+        return simhash(text)
+
+    def find_by_url(self, url: str) -> Optional[int]:
+        return self._urls.get(self.normalize_url(url))
+
+    def find_by_fingerprint(self, fingerprint: int) -> Optional[int]:
+        candidates = set()
+        for band_key in self._band_keys(fingerprint):
+            candidates.update(self._bands.get(band_key, ()))
+
+        best = None
+        for question_num in sorted(candidates):
+            distance = bin(fingerprint ^ self._fingerprints[question_num]).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, question_num)
+
+        return best[1] if best else None
+
+    def add(self, question_num: int, url: str, fingerprint: Optional[int] = None) -> None:
+        self._urls.setdefault(self.normalize_url(url), question_num)
+        if fingerprint is None:
+            return
+
+        self._fingerprints[question_num] = fingerprint
+        for band_key in self._band_keys(fingerprint):
+            self._bands.setdefault(band_key, set()).add(question_num)
+
+    def remove(self, question_num: int) -> None:
+        # Forget a page that was claimed but never rendered
+        self._urls = {url: num for url, num in self._urls.items() if num != question_num}
+        fingerprint = self._fingerprints.pop(question_num, None)
+        if fingerprint is None:
+            return
+
+        for band_key in self._band_keys(fingerprint):
+            self._bands.get(band_key, set()).discard(question_num)
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << BAND_BITS) - 1
+        return [
+            (band, fingerprint >> (band * BAND_BITS) & mask)
+            for band in range(FINGERPRINT_BITS // BAND_BITS)
+        ]
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+
+from weasyprint.urls import URLFetcher, URLFetcherResponse
+from cassette import Cassette, atomic_write
+from image_policy import ImagePolicy
+from logger import get_app_logger
+from tracing import KIND_CLIENT, span
+
+FONT_EXTENSIONS = (".woff", ".woff2", ".ttf", ".otf", ".eot")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def default_font_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "dumps-search", "fonts")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a fetch error is worth retrying (timeouts, resets, 5xx, 429)."""
+    if isinstance(error, HTTPError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (URLError, socket.timeout, TimeoutError, ConnectionError))
+
+
+class CachingURLFetcher(URLFetcher):
+    """WeasyPrint URL fetcher that retries transient errors and caches responses.
+
+    Every response is read fully and kept in a size-bounded LRU cache, so a
+    render that is retried only downloads the resources that failed the first
+    time. Transient failures that survive all retries are recorded in
+    ``failures`` for the caller to inspect after a render. Downloads go
+    through the ``cassette`` when one is given.
+
+    Web fonts are also kept in ``font_cache_dir``, which outlives the process,
+    so every worker and every later run loads them from disk. Images are
+    passed through ``image_policy`` on their way to the layout, while the
+    caches keep the original bytes.
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff: float = 1.0,
+        cache_size_mb: float = 64,
+        cassette: Optional[Cassette] = None,
+        font_cache_dir: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.cassette = cassette
+        self.font_cache_dir = font_cache_dir
+        self.image_policy: Optional[ImagePolicy] = None
+        self.backoff = backoff
+        self.cache_size = int(cache_size_mb * 1024 * 1024)
+        self.failures: List[Tuple[str, str]] = []
+        self.logger = get_app_logger()
+        self._cache: "OrderedDict[str, Tuple[str, bytes, object, int]]" = OrderedDict()
+        self._cache_bytes = 0
+
+    def reset_failures(self) -> None:
+        self.failures = []
+
+    def fetch(self, url, headers=None):
+        with span("fetch", KIND_CLIENT, **{"url.full": url}) as fetch_span:
+            response = self._fetch(url, headers, fetch_span)
+            if not fetch_span.recording:
+                return response
+
+            body = response.read()
+            fetch_span.set("http.response.status_code", response.status)
+            fetch_span.set("http.response.body.size", len(body))
+            return URLFetcherResponse(response.url, body, response.headers, response.status)
+
+    def _fetch(self, url, headers, fetch_span) -> URLFetcherResponse:
+        cached = self._cache_get(url)
+        fetch_span.set("cache", "memory" if cached is not None else None)
+        if cached is None:
+            cached = self._font_cache_get(url)
+            fetch_span.set("cache", "disk" if cached is not None else None)
+        if cached is not None:
+            return self._prepare_image(url, cached)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            try:
+                if self.cassette is not None:
+                    downloaded = self.cassette.fetch(url, lambda: self._download(url, headers))
+                else:
+                    downloaded = self._download(url, headers)
+
+                fetch_span.set("attempts", attempt + 1)
+                self._cache_put(url, *downloaded)
+                self._font_cache_put(url, *downloaded)
+                return self._prepare_image(url, URLFetcherResponse(*downloaded))
+
+            except Exception as e:
+                last_error = e
+                if not is_transient_error(e):
+                    raise
+
+                if attempt < self.retries:
+                    delay = self.backoff * (2**attempt)
+                    self.logger.debug(
+                        f"Fetch attempt {attempt + 1} for {url} failed ({str(e)}), "
+                        f"retrying in {delay} seconds..."
+                    )
+                    time.sleep(delay)
+
+        self.failures.append((url, str(last_error)))
+        raise last_error
+
+    def _prepare_image(self, url: str, response: URLFetcherResponse) -> URLFetcherResponse:
+        if self.image_policy is None:
+            return response
+
+        content_type = response.headers.get("Content-Type") or ""
+        if content_type.startswith("image/svg") or not (
+            content_type.startswith("image/")
+            or urlparse(url).path.lower().endswith(IMAGE_EXTENSIONS)
+        ):
+            return response
+
+        body = response.read()
+        with span("image.prepare", **{"image.size": len(body)}) as prepare_span:
+            try:
+                prepared, mime_type = self.image_policy.apply(body)
+            except Exception as e:
+                self.logger.debug(f"Image policy skipped {url}: {str(e)}")
+                return URLFetcherResponse(
+                    response.url, body, response.headers, response.status
+                )
+            prepare_span.set("image.prepared_size", len(prepared))
+
+        if prepared is body:
+            return URLFetcherResponse(response.url, body, response.headers, response.status)
+
+        self.logger.debug(f"Image policy: {url} {len(body)} -> {len(prepared)} bytes")
+        return URLFetcherResponse(
+            response.url,
+            prepared,
+            {"Content-Type": mime_type} if mime_type else response.headers,
+            response.status,
+        )
+
+    def _download(self, url, headers):
+        response = super().fetch(url, headers)
+        try:
+            body = response.read()
+        finally:
+            response.close()
+        return response.url, body, response.headers, response.status
+
+    def _cache_get(self, url: str) -> Optional[URLFetcherResponse]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+
+        self._cache.move_to_end(url)
+        final_url, body, headers, status = entry
+        return URLFetcherResponse(final_url, body, headers, status)
+
+    def _cache_put(self, url, final_url, body, headers, status) -> None:
+        if len(body) > self.cache_size:
+            return
+
+        if url in self._cache:
+            self._cache_bytes -= len(self._cache.pop(url)[1])
+        self._cache[url] = (final_url, body, headers, status)
+        self._cache_bytes += len(body)
+
+        while self._cache_bytes > self.cache_size:
+            _, (_, evicted, _, _) = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def _font_cache_get(self, url: str) -> Optional[URLFetcherResponse]:
+        if not self.font_cache_dir:
+            return None
+
+        try:
+            with open(self._font_cache_path(url), "rb") as font_file:
+                body = font_file.read()
+        except OSError:
+            return None
+
+        self._cache_put(url, url, body, None, 200)
+        return URLFetcherResponse(url, body, None, 200)
+
+    def _font_cache_put(self, url, final_url, body, headers, status) -> None:
+        if not self.font_cache_dir or status not in (None, 200):
+            return
+
+        content_type = (headers.get("Content-Type") or "") if headers else ""
+        is_font = urlparse(url).path.lower().endswith(FONT_EXTENSIONS) or (
+            content_type.startswith("font/") or "font-" in content_type
+        )
+        if not is_font:
+            return
+
+        try:
+            atomic_write(self._font_cache_path(url), body)
+        except OSError as e:
+            self.logger.warning(f"Failed to cache font {url}: {str(e)}")
+
+    def _font_cache_path(self, url: str) -> str:
+        return os.path.join(self.font_cache_dir, hashlib.sha256(url.encode()).hexdigest())
@@ -0,0 +1,116 @@
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+# Printable width used to turn a DPI limit into pixels
+PAGE_WIDTH_INCHES = 8.27
+
+# Replaces dropped images so the page still lays out without them
+TRANSPARENT_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00"
+    b"\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+POLICY_FIELDS = {
+    "max_pixels": int,
+    "max_dpi": (int, float),
+    "jpeg_quality": int,
+    "drop_decorative": bool,
+    "decorative_max_pixels": int,
+}
+
+
+def validate_image_policy(policy: Any) -> None:
+    """Raise ValueError if an image policy is not well formed."""
+    if not isinstance(policy, dict):
+        raise ValueError("'image_policy' must be an object")
+
+    for key, value in policy.items():
+        if key not in POLICY_FIELDS:
+            raise ValueError(f"Unknown image policy field: {key}")
+        if value is None:
+            continue
+        if not isinstance(value, POLICY_FIELDS[key]) or (
+            isinstance(value, bool) and POLICY_FIELDS[key] is not bool
+        ):
+            raise ValueError(f"Invalid value for image policy field '{key}'")
+        if key != "drop_decorative" and value <= 0:
+            raise ValueError(f"Image policy field '{key}' must be positive")
+
+    if (policy.get("jpeg_quality") or 1) > 100:
+        raise ValueError("'jpeg_quality' must be between 1 and 100")
+
+
+@dataclass(frozen=True)
+class ImagePolicy:
+    """How fetched images are prepared before they reach the layout.
+
+    Images are shrunk so their longest side fits ``max_pixels`` or
+    ``max_dpi`` across the width of an A4 page, re-encoded as JPEG when
+    ``jpeg_quality`` is set, and replaced by a transparent pixel when
+    ``drop_decorative`` is set and they are no larger than
+    ``decorative_max_pixels``, as icons, avatars and spacers are.
+    """
+
+    max_pixels: Optional[int] = None
+    max_dpi: Optional[float] = None
+    jpeg_quality: Optional[int] = None
+    drop_decorative: bool = False
+    decorative_max_pixels: int = 48
+
+    @classmethod
+    def from_dict(cls, policy: Dict[str, Any]) -> "ImagePolicy":
+        return cls(**{key: value for key, value in policy.items() if value is not None})
+
+    @property
+    def pixel_limit(self) -> Optional[int]:
+        limits = [self.max_pixels] if self.max_pixels else []
+        if self.max_dpi:
+            limits.append(int(self.max_dpi * PAGE_WIDTH_INCHES))
+        return min(limits) if limits else None
+
+    def apply(self, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """Return the image to lay out and its MIME type.
+
+        An image that the policy leaves alone is returned as the same object.
+        """
+        image = Image.open(io.BytesIO(body))
+        if getattr(image, "is_animated", False):
+            return body, None
+
+        if self.drop_decorative and max(image.size) <= self.decorative_max_pixels:
+            return TRANSPARENT_GIF, "image/gif"
+
+        limit = self.pixel_limit
+        resize = limit is not None and max(image.size) > limit
+        to_jpeg = self.jpeg_quality is not None and image.format != "JPEG"
+        if not resize and not to_jpeg:
+            return body, None
+
+        original_format = image.format
+        if resize:
+            # JPEG decoding can skip straight to a smaller scale
+            image.draft(image.mode, (limit, limit))
+            image.thumbnail((limit, limit))
+
+        output = io.BytesIO()
+        if self.jpeg_quality is not None:
+            if image.mode in ("RGBA", "LA", "P", "PA"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(output, format="JPEG", quality=self.jpeg_quality, optimize=True)
+            mime_type = "image/jpeg"
+        else:
+            image.save(output, format=original_format)
+            mime_type = Image.MIME.get(original_format)
+
+        converted = output.getvalue()
+        if not resize and len(converted) >= len(body):
+            return body, None
+        return converted, mime_type
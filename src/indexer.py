@@ -0,0 +1,166 @@
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from pypdf import PdfReader
+from logger import get_app_logger
+from pdf_stream import release_reader
+
+
+class QuestionIndex:
+    """Local SQLite FTS5 index over the text of rendered question PDFs.
+
+    Every page of a question PDF is stored as one FTS row keyed by exam and
+    question number, so a query returns ranked questions together with the
+    pages that matched. When question PDFs are merged, the location of each
+    question inside the merged file is recorded so results keep pointing at a
+    file that still exists.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.logger = get_app_logger()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS question_pages USING fts5(
+                exam UNINDEXED,
+                question UNINDEXED,
+                page UNINDEXED,
+                body,
+                tokenize = 'porter unicode61'
+            );
+            CREATE TABLE IF NOT EXISTS question_files (
+                exam TEXT NOT NULL,
+                question INTEGER NOT NULL,
+                pdf_path TEXT NOT NULL,
+                first_page INTEGER NOT NULL DEFAULT 1,
+                page_count INTEGER NOT NULL,
+                PRIMARY KEY (exam, question)
+            );
+            """
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def index_pdf(self, exam: str, question_num: int, pdf_path: str) -> int:
+        try:
+            reader = PdfReader(pdf_path)
+            pages = [page.extract_text() or "" for page in reader.pages]
+            release_reader(reader)
+        except Exception as e:
+            self.logger.warning(
+                f"Failed to extract text for question {question_num}: {str(e)}"
+            )
+            return 0
+
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM question_pages WHERE exam = ? AND question = ?",
+                (exam, question_num),
+            )
+            self._conn.executemany(
+                "INSERT INTO question_pages (exam, question, page, body) VALUES (?, ?, ?, ?)",
+                [
+                    (exam, question_num, page_num, text)
+                    for page_num, text in enumerate(pages, start=1)
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO question_files "
+                "(exam, question, pdf_path, first_page, page_count) VALUES (?, ?, ?, 1, ?)",
+                (exam, question_num, os.path.abspath(pdf_path), len(pages)),
+            )
+
+        self.logger.debug(f"Indexed question {question_num} ({len(pages)} pages)")
+        return len(pages)
+
+    def record_archived_file(self, exam: str, question_num: int, archive_path: str) -> None:
+        # The question is the archive entry of its number, read with QuestionArchive
+        with self._conn:
+            self._conn.execute(
+                "UPDATE question_files SET pdf_path = ?, first_page = 1 "
+                "WHERE exam = ? AND question = ?",
+                (os.path.abspath(archive_path), exam, question_num),
+            )
+
+    def record_merged_file(
+        self, exam: str, merged_pages: List[Tuple[int, int, int]], merged_path: str
+    ) -> None:
+        # (question, first page, page count) as reported by the merger, so
+        # inputs it skipped do not shift the questions after them
+        merged_path = os.path.abspath(merged_path)
+
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE question_files SET pdf_path = ?, first_page = ?, page_count = ? "
+                "WHERE exam = ? AND question = ?",
+                [
+                    (merged_path, first_page, page_count, exam, question_num)
+                    for question_num, first_page, page_count in merged_pages
+                ],
+            )
+
+    def search(
+        self, query: str, exam: Optional[str] = None, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        match_expression = self._to_match_expression(query)
+        if not match_expression:
+            return []
+
+        sql = (
+            "SELECT p.exam, p.question, p.page, bm25(question_pages) AS score, "
+            "snippet(question_pages, 3, '[', ']', '...', 12), f.pdf_path, f.first_page "
+            "FROM question_pages p "
+            "LEFT JOIN question_files f ON f.exam = p.exam AND f.question = p.question "
+            "WHERE question_pages MATCH ?"
+        )
+        params: List[Any] = [match_expression]
+        if exam:
+            sql += " AND p.exam = ?"
+            params.append(exam)
+        sql += " ORDER BY score"
+
+        results: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for row_exam, question, page, score, snippet, pdf_path, first_page in (
+            self._conn.execute(sql, params)
+        ):
+            key = (row_exam, question)
+            if key not in results:
+                if len(results) >= limit:
+                    continue
+                results[key] = {
+                    "exam": row_exam,
+                    "question": question,
+                    "score": -score,
+                    "snippet": snippet,
+                    "pdf_path": pdf_path,
+                    "pages": [],
+                }
+            results[key]["pages"].append((first_page or 1) + page - 1)
+
+        return list(results.values())
+
+    def _to_match_expression(self, query: str) -> str:
+        # Treat the query as plain words rather than FTS5 syntax, so input
+        # like "S3 Object-Lock" cannot produce a syntax error
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"' for term in terms)
+
+    def __enter__(self) -> "QuestionIndex":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -2,40 +2,271 @@
 
 import argparse
 import os
+import signal
 import sys
+import tempfile
 
 from config import ConfigManager
-from search import SearchEngine
-from pdf_generator import PDFGenerator
-from pdf_merger import PDFMerger
+from daemon import MAX_WARM_POOLS, JobDaemon
+from indexer import QuestionIndex
 from logger import setup_logging, get_app_logger
+from pdf_linearizer import PDFLinearizer
+from pdf_merger import PDFMerger
+from pdf_optimizer import PDFOptimizer
+from queue_worker import QueueWorker
+from runner import build_run_parser, run_job
+from sharding import collect_question_pdfs
+from work_queue import WorkQueue
 
 
-def main():
-    parser = argparse.ArgumentParser(description="ExamTopics PDF Scraper")
+def query_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py query", description="Search the local question index"
+    )
+    parser.add_argument("text", help="Words to search for")
+    parser.add_argument(
+        "--index-db",
+        default=os.path.join("output", "questions_index.sqlite"),
+        help="Index database path",
+    )
+    parser.add_argument("--exam", default=None, help="Only search this exam")
+    parser.add_argument(
+        "--limit", type=int, default=10, help="Maximum number of questions to return"
+    )
 
-    parser.add_argument("--exam", required=True, help="Exam code (e.g., saa-c03)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index_db):
+        print(f"Index not found: {args.index_db}", file=sys.stderr)
+        sys.exit(1)
+
+    with QuestionIndex(args.index_db) as index:
+        results = index.search(args.text, exam=args.exam, limit=args.limit)
+
+    if not results:
+        print("No matching questions")
+        return
+
+    for result in results:
+        pages = ", ".join(str(page) for page in result["pages"])
+        print(
+            f"{result['exam']} question {result['question']} "
+            f"(pages {pages} of {result['pdf_path']})"
+        )
+        print(f"    {result['snippet']}")
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Run a daemon that processes jobs with warm render workers",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port to listen on (default: 8765)"
+    )
     parser.add_argument(
-        "--begin", type=int, required=True, help="Beginning question number"
+        "--socket", default=None, help="Listen on this Unix socket instead of TCP"
     )
-    parser.add_argument("--end", type=int, required=True, help="Ending question number")
     parser.add_argument(
-        "--output", default="output", help="Output directory for PDF files"
+        "--max-pools",
+        type=int,
+        default=MAX_WARM_POOLS,
+        help="Number of render worker pools with different options kept warm "
+        f"(default: {MAX_WARM_POOLS})",
     )
     parser.add_argument(
         "--config", default="settings.json", help="Configuration file path"
     )
+
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager(args.config)
+    config_manager.load_config()
+    setup_logging(config_manager.get_log_level())
+
+    job_daemon = JobDaemon(
+        args.config,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_pools=args.max_pools,
+    )
+    # Shut down cleanly, closing workers and the socket, when stopped
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        job_daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        job_daemon.close()
+
+
+def worker_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py worker",
+        description="Process questions from a shared work queue",
+    )
+    parser.add_argument("--queue", required=True, help="Work queue database path")
     parser.add_argument(
-        "--no-merge",
+        "--workers", type=int, default=1, help="Number of render processes (default: 1)"
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=600,
+        help="How long a question stays leased without renewal (default: 600)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between checks for new work (default: 2.0)",
+    )
+    parser.add_argument(
+        "--exit-when-idle",
         action="store_true",
-        help="Do not merge generated PDFs into a single file (default: merge is enabled)",
+        help="Exit once the queue has no open tasks instead of waiting for more",
     )
     parser.add_argument(
-        "--keep-individual",
+        "--config", default="settings.json", help="Configuration file path"
+    )
+
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager(args.config)
+    config_manager.load_config()
+    setup_logging(config_manager.get_log_level())
+
+    queue_worker = QueueWorker(
+        WorkQueue(args.queue, lease_seconds=args.lease_seconds),
+        worker_count=args.workers,
+        poll_interval=args.poll_interval,
+        log_level=config_manager.get_log_level(),
+        exit_when_idle=args.exit_when_idle,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        processed = queue_worker.run()
+        get_app_logger().info(f"Queue worker processed {processed} questions")
+    except KeyboardInterrupt:
+        pass
+
+
+def merge_question_pdfs(args, extract_dir):
+    logger = get_app_logger()
+
+    question_pdfs = collect_question_pdfs(
+        args.directories, args.exam, begin=args.begin, end=args.end, extract_dir=extract_dir
+    )
+    if not question_pdfs:
+        logger.error(f"No question PDFs for {args.exam} found in {', '.join(args.directories)}")
+        sys.exit(1)
+
+    questions = [question_num for question_num, _ in question_pdfs]
+    first = args.begin if args.begin is not None else questions[0]
+    last = args.end if args.end is not None else questions[-1]
+    missing = sorted(set(range(first, last + 1)) - set(questions))
+    if missing:
+        logger.warning(
+            f"{len(missing)} questions have no PDF: {', '.join(map(str, missing))}"
+        )
+
+    merged_path = os.path.join(
+        args.output, f"{args.exam}_questions{first}-{last}_merged.pdf"
+    )
+    os.makedirs(args.output, exist_ok=True)
+    pdf_merger = PDFMerger(
+        memory_limit_mb=args.merge_memory_limit,
+        merge_workers=args.merge_workers,
+        optimizer=PDFOptimizer() if args.optimize else None,
+        linearizer=PDFLinearizer() if args.linearize else None,
+    )
+    logger.info(f"Merging {len(question_pdfs)} PDFs into: {merged_path}")
+    try:
+        merged = pdf_merger.merge_pdfs([path for _, path in question_pdfs], merged_path)
+    finally:
+        pdf_merger.cleanup_temp_files()
+
+    if not merged:
+        logger.error("MERGE FAILED: Could not create merged PDF")
+        sys.exit(1)
+    return merged_path
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description="Merge the question PDFs written by sharded runs",
+    )
+    parser.add_argument(
+        "directories", nargs="+", help="Output directories of the shard runs"
+    )
+    parser.add_argument("--exam", required=True, help="Exam code (e.g., saa-c03)")
+    parser.add_argument(
+        "--begin", type=int, default=None, help="First question number to merge"
+    )
+    parser.add_argument("--end", type=int, default=None, help="Last question number to merge")
+    parser.add_argument(
+        "--output",
+        default="output",
+        help="Directory for the merged PDF (default: output)",
+    )
+    parser.add_argument(
+        "--merge-memory-limit",
+        type=float,
+        default=None,
+        help="Memory ceiling in MB for merging; larger merges are streamed to disk",
+    )
+    parser.add_argument(
+        "--merge-workers",
+        type=int,
+        default=1,
+        help="Number of processes for a parallel tree merge (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--optimize",
         action="store_true",
-        help="Keep individual PDF files after merging (default: delete them)",
+        help="Compress streams and pack objects in the merged PDF",
+    )
+    parser.add_argument(
+        "--linearize",
+        action="store_true",
+        help="Write the merged PDF linearized for fast opening",
+    )
+    parser.add_argument(
+        "--config", default="settings.json", help="Configuration file path"
     )
 
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager(args.config)
+    config_manager.load_config()
+    setup_logging(config_manager.get_log_level())
+    logger = get_app_logger()
+
+    # Questions of archived shard runs are extracted for the merge
+    with tempfile.TemporaryDirectory(prefix="examtopics_merge_") as extract_dir:
+        merged_path = merge_question_pdfs(args, extract_dir)
+
+    logger.info(f"MERGE SUCCESS: Created {merged_path}")
+
+
+SUBCOMMANDS = {
+    "merge": merge_main,
+    "query": query_main,
+    "serve": serve_main,
+    "worker": worker_main,
+}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+
+    parser = build_run_parser()
     args = parser.parse_args()
 
     try:
@@ -48,173 +279,7 @@ def main():
         setup_logging(config_log_level)
         logger = get_app_logger()
 
-        # Initialize components
-        logger.info("Starting ExamTopics PDF Scraper...")
-        search_engine = SearchEngine()
-        pdf_generator = PDFGenerator()
-
-        logger.info("Configuration loaded successfully")
-
-        # Get exam configuration
-        exam_config = config_manager.get_exam_config(args.exam)
-        if not exam_config:
-            logger.error(f"Exam '{args.exam}' not found in configuration")
-            logger.info(f"Available exams: {config_manager.list_available_exams()}")
-            return
-
-        logger.info(f"Found exam config for: {args.exam}")
-
-        # Validate question range
-        if args.begin > args.end:
-            logger.error(
-                f"Begin question number ({args.begin}) cannot be greater than end question number ({args.end})"
-            )
-            return
-
-        url_substring = exam_config["url_substring"]
-
-        logger.info(f"Processing questions {args.begin} to {args.end}")
-
-        # Track results
-        successful_urls = []
-        failed_questions = []
-        generated_pdfs = []
-        pdf_failures = []
-
-        # Process each question in the range
-        for question_num in range(args.begin, args.end + 1):
-            logger.info(f"Processing question {question_num}...")
-
-            # Replace placeholders in title and keyword for current question
-            title = exam_config["title"].replace("#QUESTION", str(question_num))
-            keyword = exam_config["keyword"].replace("#QUESTION", str(question_num))
-
-            logger.debug(f"Question {question_num} - Title: {title}")
-            logger.debug(f"Question {question_num} - Keyword: {keyword}")
-
-            # Perform search for current question
-            result_url = search_engine.search_question(keyword, title, url_substring)
-
-            if result_url:
-                successful_urls.append((question_num, result_url))
-                logger.info(f"SUCCESS: Found URL for question {question_num}")
-
-                # Generate PDF from the found URL
-                pdf_filename = f"{args.exam}_question{question_num}.pdf"
-                pdf_path = os.path.join(args.output, pdf_filename)
-
-                logger.info(f"Generating PDF for question {question_num}...")
-                pdf_success = pdf_generator.generate_pdf(result_url, pdf_path)
-
-                if pdf_success:
-                    generated_pdfs.append((question_num, pdf_path))
-                    logger.info(f"PDF SUCCESS: Generated {pdf_filename}")
-                else:
-                    pdf_failures.append((question_num, result_url))
-                    logger.error(
-                        f"PDF FAILED: Could not generate PDF for question {question_num}"
-                    )
-            else:
-                failed_questions.append(question_num)
-                logger.warning(
-                    f"FAILED: No valid URL found for question {question_num}"
-                )
-
-        # Log summary
-        logger.info(f"{'='*60}")
-        logger.info(f"PROCESSING SUMMARY")
-        logger.info(f"{'='*60}")
-        logger.info(f"Total questions processed: {args.end - args.begin + 1}")
-        logger.info(f"URLs found: {len(successful_urls)}")
-        logger.info(f"PDFs generated: {len(generated_pdfs)}")
-        logger.info(f"PDF generation failed: {len(pdf_failures)}")
-        logger.info(f"No URLs found: {len(failed_questions)}")
-
-        if generated_pdfs:
-            logger.info(f"SUCCESSFULLY GENERATED PDFs:")
-            for question_num, pdf_path in generated_pdfs:
-                logger.debug(f"  Question {question_num}: {pdf_path}")
-
-        if pdf_failures:
-            logger.info(f"PDF GENERATION FAILURES:")
-            for question_num, url in pdf_failures:
-                logger.debug(
-                    f"  Question {question_num}: Failed to generate PDF from {url}"
-                )
-
-        if failed_questions:
-            logger.info(f"NO URLs FOUND:")
-            for question_num in failed_questions:
-                logger.debug(f"  Question {question_num}: No valid URL found")
-
-        # Merge PDFs by default unless --no-merge is specified
-        if not args.no_merge and generated_pdfs:
-            logger.info("Starting PDF merge process...")
-            pdf_merger = PDFMerger()
-
-            try:
-                # Extract just the file paths from generated_pdfs
-                pdf_paths = [pdf_path for _, pdf_path in generated_pdfs]
-
-                # Create merged PDF filename
-                merged_filename = (
-                    f"{args.exam}_questions{args.begin}-{args.end}_merged.pdf"
-                )
-                merged_path = os.path.join(args.output, merged_filename)
-
-                logger.info(f"Merging {len(pdf_paths)} PDFs into: {merged_filename}")
-
-                # Perform the merge
-                merge_success = pdf_merger.merge_pdfs(pdf_paths, merged_path)
-
-                if merge_success:
-                    logger.info(f"{'='*60}")
-                    logger.info(f"PDF MERGE SUMMARY")
-                    logger.info(f"{'='*60}")
-                    logger.info(f"MERGE SUCCESS: Created {merged_filename}")
-                    logger.debug(f"  Location: {merged_path}")
-                    logger.debug(f"  Merged {len(pdf_paths)} individual PDFs")
-
-                    # Clean up individual PDFs if not keeping them
-                    if not args.keep_individual:
-                        logger.debug("Cleaning up individual PDF files...")
-                        cleanup_count = 0
-                        cleanup_failures = 0
-
-                        for _, pdf_path in generated_pdfs:
-                            try:
-                                if os.path.exists(pdf_path):
-                                    os.remove(pdf_path)
-                                    cleanup_count += 1
-                                    logger.debug(f"Removed individual PDF: {pdf_path}")
-                            except Exception as e:
-                                cleanup_failures += 1
-                                logger.warning(f"Failed to remove {pdf_path}: {str(e)}")
-
-                        logger.debug(
-                            f"  Cleaned up {cleanup_count} individual PDF files"
-                        )
-                        if cleanup_failures > 0:
-                            logger.warning(
-                                f"  Failed to clean up {cleanup_failures} files"
-                            )
-                    else:
-                        logger.debug(f"  Individual PDF files preserved")
-
-                else:
-                    logger.error(f"MERGE FAILED: Could not create merged PDF")
-                    logger.error("PDF merge operation failed")
-
-            except Exception as e:
-                logger.error(f"PDF merge error: {str(e)}")
-                logger.error(f"MERGE ERROR: {str(e)}")
-            finally:
-                # Clean up any temporary files created by the merger
-                pdf_merger.cleanup_temp_files()
-
-        elif not args.no_merge and not generated_pdfs:
-            logger.warning("PDF merge enabled but no PDFs were generated")
-            logger.warning("MERGE SKIPPED: No PDFs available to merge")
+        run_job(args, config_manager)
 
     except Exception as e:
         logger.error(f"Error: {str(e)}")
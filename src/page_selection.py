@@ -0,0 +1,113 @@
+import re
+from typing import Any, Dict, List, Optional
+
+SELECTOR_PATTERN = re.compile(r"^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+
+
+def matches_selector(element, selector: str) -> bool:
+    """Match an element against a simple selector like ``div.question-body``.
+
+    Supports a tag name followed by any number of ``.class`` and ``#id``
+    parts, which is enough to point at the landmarks of a rendered page.
+    """
+    match = SELECTOR_PATTERN.match(selector.strip())
+    if match is None or element is None or not isinstance(element.tag, str):
+        return False
+
+    tag, qualifiers = match.groups()
+    if tag and element.tag.rsplit("}", 1)[-1].lower() != tag.lower():
+        return False
+
+    classes = (element.get("class") or "").split()
+    for qualifier in re.findall(r"[.#][\w-]+", qualifiers):
+        if qualifier[0] == "." and qualifier[1:] not in classes:
+            return False
+        if qualifier[0] == "#" and element.get("id") != qualifier[1:]:
+            return False
+    return True
+
+
+def validate_page_rules(rules: Any) -> None:
+    """Raise ValueError if page selection rules are not well formed."""
+    if not isinstance(rules, dict):
+        raise ValueError("'page_rules' must be an object")
+    if "start" not in rules:
+        raise ValueError("'page_rules' needs a 'start' marker")
+
+    for name in ("start", "end"):
+        if name not in rules:
+            continue
+        marker = rules[name]
+        if not isinstance(marker, dict) or not (marker.keys() & {"selector", "text"}):
+            raise ValueError(f"'{name}' marker needs a 'selector' or 'text'")
+        for key in ("selector", "text"):
+            if key in marker and (
+                not isinstance(marker[key], str) or not marker[key].strip()
+            ):
+                raise ValueError(f"'{name}' marker '{key}' must be a non-empty string")
+        if "selector" in marker and not SELECTOR_PATTERN.match(marker["selector"].strip()):
+            raise ValueError(f"Unsupported selector: {marker['selector']}")
+
+    max_pages = rules.get("max_pages")
+    if max_pages is not None and (
+        not isinstance(max_pages, int) or isinstance(max_pages, bool) or max_pages < 1
+    ):
+        raise ValueError("'max_pages' must be a positive integer")
+
+
+class PageSelector:
+    """Picks the pages of a rendered question from markers in its layout.
+
+    The selection starts at the first page that contains the ``start``
+    marker and ends at the last page that contains the ``end`` marker, or at
+    the last page when there is no end marker. ``max_pages`` caps the result.
+    A marker is a simple CSS selector, a text anchor, or both.
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.start = rules["start"]
+        self.end = rules.get("end")
+        self.max_pages = rules.get("max_pages")
+
+    def select(self, page_boxes: List[Any]) -> Optional[List[int]]:
+        """Return 0-based page indices, or None when the start is not found."""
+        start = next(
+            (i for i, page in enumerate(page_boxes) if self._contains(page, self.start)),
+            None,
+        )
+        if start is None:
+            return None
+
+        end = len(page_boxes) - 1
+        if self.end is not None:
+            end = next(
+                (
+                    i
+                    for i in range(len(page_boxes) - 1, start - 1, -1)
+                    if self._contains(page_boxes[i], self.end)
+                ),
+                end,
+            )
+        if self.max_pages:
+            end = min(end, start + self.max_pages - 1)
+
+        return list(range(start, end + 1))
+
+    def _contains(self, page_box, marker: Dict[str, str]) -> bool:
+        selector = marker.get("selector")
+        text = marker.get("text")
+        texts = []
+
+        for box in page_box.descendants():
+            if selector and matches_selector(getattr(box, "element", None), selector):
+                return True
+            if text and getattr(box, "text", None):
+                texts.append(box.text)
+
+        if not text:
+            return False
+        return _normalize(text) in _normalize(" ".join(texts))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
@@ -1,5 +1,6 @@
 import logging
 import os
+from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 import tempfile
 
@@ -12,67 +13,113 @@ wp_logger.addHandler(logging.NullHandler())
 wp_logger.setLevel(40)
 
 from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+from weasyprint.urls import URLFetchingError
 from pypdf import PdfReader, PdfWriter
+from cassette import Cassette
+from fetcher import CachingURLFetcher
+from image_policy import ImagePolicy
 from logger import get_app_logger
+from page_selection import PageSelector
+from pdf_optimizer import PDFOptimizer
+from renderer import RENDERER_TEXT, RENDERER_WEASYPRINT, Renderer, TextRenderer
+from tracing import span
 
+# Reasons for the last failed generate_pdf call. Fetch failures are worth
+# retrying later, layout failures will fail the same way again.
+FAILURE_FETCH = "fetch"
+FAILURE_LAYOUT = "layout"
 
-class PDFGenerator:
+_font_config: Optional[FontConfiguration] = None
 
-    def __init__(self):
-        self.logger = get_app_logger()
 
-    def generate_pdf(self, url: str, output_path: str) -> bool:
-        try:
-            self.logger.debug(f"Generating PDF from URL: {url}")
+def shared_font_config() -> FontConfiguration:
+    """FontConfiguration shared by every render in this process.
 
-            if not self._validate_url(url):
-                self.logger.error(f"Invalid URL: {url}")
-                return False
+    Web fonts of an @font-face rule are downloaded, decoded and registered
+    with Fontconfig the first time a page uses them and reused afterwards.
+    """
+    global _font_config
+    if _font_config is None:
+        _font_config = FontConfiguration()
+    return _font_config
 
-            output_dir = os.path.dirname(output_path)
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
 
-            # Generate PDF to a temporary file first
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_pdf_path = temp_file.name
-            
-            try:
-                html_doc = HTML(url=url)
-                html_doc.write_pdf(temp_pdf_path)
+def layout_page_boxes(pages) -> Optional[List[Any]]:
+    """Layout boxes of rendered WeasyPrint pages, for matching page rules.
 
-                # Filter pages if necessary
-                if not self._filter_pdf_pages(temp_pdf_path, output_path):
-                    return False
+    WeasyPrint only keeps them in the internal ``Page._page_box`` attribute,
+    so None is returned if a release no longer has it.
+    """
+    try:
+        return [page._page_box for page in pages]
+    except AttributeError:
+        return None
 
-                # Verify the final PDF was created and has content
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                    self.logger.debug(
-                        f"PDF generated successfully: {output_path} ({os.path.getsize(output_path)} bytes)"
-                    )
-                    return True
-                else:
-                    self.logger.error(
-                        f"PDF file was not created or is empty: {output_path}"
+
+class WeasyPrintRenderer(Renderer):
+    """High-fidelity renderer that prints the full page with WeasyPrint."""
+
+    name = RENDERER_WEASYPRINT
+
+    def render(
+        self,
+        url: str,
+        html: Optional[str],
+        output_path: str,
+        page_rules: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        # Generate PDF to a temporary file first
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+            temp_pdf_path = temp_file.name
+
+        try:
+            if html is not None:
+                html_doc = HTML(string=html, base_url=url, url_fetcher=self.url_fetcher)
+            else:
+                html_doc = HTML(url=url, url_fetcher=self.url_fetcher)
+            with span("layout") as layout_span:
+                document = html_doc.render(font_config=shared_font_config())
+                layout_span.set("pages", len(document.pages))
+
+            # Keep the pages marked by the layout rules, falling back to
+            # the fixed page filter when the markers are not found
+            selected_pages = None
+            page_boxes = layout_page_boxes(document.pages) if page_rules else None
+            if page_rules and page_boxes is None:
+                self.logger.warning(
+                    "This WeasyPrint version does not expose page layout boxes, "
+                    "page rules are ignored"
+                )
+            elif page_rules:
+                selected_pages = PageSelector(page_rules).select(page_boxes)
+                if selected_pages is None:
+                    self.logger.warning(
+                        f"Page markers not found for {url}, using default page filter"
                     )
-                    return False
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_pdf_path):
-                    try:
-                        os.remove(temp_pdf_path)
-                    except Exception:
-                        pass
 
-        except Exception as e:
-            self.logger.error(f"PDF generation failed for {url}: {str(e)}")
-            # Clean up partial file if it exists
-            if os.path.exists(output_path):
+            if selected_pages is not None:
+                self.logger.debug(
+                    f"Keeping pages {selected_pages[0] + 1} to {selected_pages[-1] + 1} "
+                    f"of {len(document.pages)}"
+                )
+                with span("pages.select", pages=len(selected_pages)):
+                    document.copy(
+                        [document.pages[i] for i in selected_pages]
+                    ).write_pdf(output_path)
+                return True
+
+            # Filter pages if necessary
+            with span("pages.filter"):
+                document.write_pdf(temp_pdf_path)
+                return self._filter_pdf_pages(temp_pdf_path, output_path)
+        finally:
+            # Clean up temporary file
+            if os.path.exists(temp_pdf_path):
                 try:
-                    os.remove(output_path)
+                    os.remove(temp_pdf_path)
                 except Exception:
                     pass
-            return False
 
     def _filter_pdf_pages(self, input_path: str, output_path: str) -> bool:
         # If PDF has less than 3 pages, keep as is.
@@ -112,6 +159,127 @@ class PDFGenerator:
             self.logger.error(f"PDF page filtering failed: {str(e)}")
             return False
 
+
+class PDFGenerator:
+
+    def __init__(
+        self,
+        optimizer: Optional[PDFOptimizer] = None,
+        fetch_retries: int = 2,
+        retry_backoff: float = 1.0,
+        renderer: str = RENDERER_WEASYPRINT,
+        cassette: Optional[Cassette] = None,
+        font_cache_dir: Optional[str] = None,
+    ):
+        self.logger = get_app_logger()
+        self.optimizer = optimizer
+        self.url_fetcher = CachingURLFetcher(
+            retries=fetch_retries,
+            backoff=retry_backoff,
+            cassette=cassette,
+            font_cache_dir=font_cache_dir,
+        )
+        if renderer == RENDERER_TEXT:
+            self.renderer: Renderer = TextRenderer(self.url_fetcher)
+        else:
+            self.renderer = WeasyPrintRenderer(self.url_fetcher)
+        self.last_failure: Optional[str] = None
+
+    def fetch_html(self, url: str) -> Optional[str]:
+        # Fetch the page ahead of layout so it can be inspected, e.g. for
+        # duplicate detection, and then rendered without a second download
+        self.last_failure = None
+        with span("fetch.page", **{"url.full": url}) as page_span:
+            try:
+                response = self.url_fetcher.fetch(url)
+                try:
+                    body = response.read()
+                finally:
+                    response.close()
+
+                page_span.set("http.response.body.size", len(body))
+                return body.decode(response.charset or "utf-8", errors="replace")
+
+            except Exception as e:
+                self.logger.error(f"Failed to fetch page {url}: {str(e)}")
+                page_span.error(str(e))
+                self.last_failure = FAILURE_FETCH
+                return None
+
+    def generate_pdf(
+        self,
+        url: str,
+        output_path: str,
+        html: Optional[str] = None,
+        allow_missing_resources: bool = False,
+        page_rules: Optional[Dict[str, Any]] = None,
+        image_policy: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        # Images and stylesheets that fail to load do not stop the renderer,
+        # so they are collected by the fetcher and turn the render into a
+        # fetch failure unless missing resources are allowed
+        self.last_failure = None
+        self.url_fetcher.reset_failures()
+        self.url_fetcher.image_policy = (
+            ImagePolicy.from_dict(image_policy) if image_policy else None
+        )
+        try:
+            self.logger.debug(f"Generating PDF from URL: {url} ({self.renderer.name})")
+
+            if not self._validate_url(url):
+                self.logger.error(f"Invalid URL: {url}")
+                self.last_failure = FAILURE_LAYOUT
+                return False
+
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            with span("render", renderer=self.renderer.name) as render_span:
+                if not self.renderer.render(url, html, output_path, page_rules=page_rules):
+                    render_span.error("render failed")
+                    self.last_failure = FAILURE_LAYOUT
+                    return False
+
+            if self.url_fetcher.failures:
+                missing = ", ".join(
+                    resource_url for resource_url, _ in self.url_fetcher.failures
+                )
+                if not allow_missing_resources:
+                    raise RuntimeError(f"Failed to fetch resources: {missing}")
+                self.logger.warning(f"Rendered {url} without resources: {missing}")
+
+            if self.optimizer is not None:
+                with span("optimize") as optimize_span:
+                    optimize_span.set("bytes_saved", self.optimizer.optimize_pdf(output_path))
+
+            # Verify the final PDF was created and has content
+            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                self.logger.debug(
+                    f"PDF generated successfully: {output_path} ({os.path.getsize(output_path)} bytes)"
+                )
+                return True
+            else:
+                self.logger.error(
+                    f"PDF file was not created or is empty: {output_path}"
+                )
+                self.last_failure = FAILURE_LAYOUT
+                return False
+
+        except Exception as e:
+            self.logger.error(f"PDF generation failed for {url}: {str(e)}")
+            if isinstance(e, URLFetchingError) or self.url_fetcher.failures:
+                self.last_failure = FAILURE_FETCH
+            else:
+                self.last_failure = FAILURE_LAYOUT
+            # Clean up partial file if it exists
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except Exception:
+                    pass
+            return False
+
     def _validate_url(self, url: str) -> bool:
         try:
             result = urlparse(url)
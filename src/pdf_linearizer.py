@@ -0,0 +1,77 @@
+import os
+
+from pypdf import PdfReader
+from logger import get_app_logger
+from pdf_stream import PAGE_TREE_FANOUT, PDFStreamWriter, release_reader
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+
+class PDFLinearizer:
+    """Rewrites merged PDFs so viewers can show the first page right away.
+
+    The PDF is first rewritten with compressed object and cross-reference
+    streams and a page tree balanced for large page counts. It is then
+    linearized ("fast web view") with pikepdf, which puts the first page and
+    the hint tables needed to fetch any other page at the start of the file.
+    Without pikepdf the file keeps the compact layout but is not linearized.
+    """
+
+    def __init__(self, page_tree_fanout: int = PAGE_TREE_FANOUT):
+        self.page_tree_fanout = page_tree_fanout
+        self.logger = get_app_logger()
+        self._warned_unavailable = False
+
+    def linearize_pdf(self, pdf_path: str) -> bool:
+        # Rewrite in place and return whether the result is linearized
+        compact_path = f"{pdf_path}.compacting"
+        linearized_path = f"{pdf_path}.linearizing"
+
+        try:
+            reader = PdfReader(pdf_path)
+            with PDFStreamWriter(
+                compact_path,
+                compress_streams=True,
+                object_streams=True,
+                page_tree_fanout=self.page_tree_fanout,
+            ) as writer:
+                writer.append_reader(reader)
+            release_reader(reader)
+
+            if pikepdf is None:
+                if not self._warned_unavailable:
+                    self.logger.warning(
+                        "pikepdf is not installed, merged PDFs are compacted but not linearized"
+                    )
+                    self._warned_unavailable = True
+                os.replace(compact_path, pdf_path)
+                return False
+
+            with pikepdf.open(compact_path) as pdf:
+                pdf.save(
+                    linearized_path,
+                    linearize=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    compress_streams=True,
+                )
+            os.replace(linearized_path, pdf_path)
+            self.logger.debug(
+                f"Linearized {pdf_path} ({writer.page_count} pages, "
+                f"{os.path.getsize(pdf_path)} bytes)"
+            )
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"PDF linearization failed for {pdf_path}: {str(e)}")
+            return False
+
+        finally:
+            for temp_path in (compact_path, linearized_path):
+                if os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except Exception:
+                        pass
@@ -1,19 +1,75 @@
 import os
 import tempfile
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 from pathlib import Path
 
 from pypdf import PdfReader, PdfWriter
 from logger import get_app_logger
+from pdf_linearizer import PDFLinearizer
+from pdf_optimizer import PDFOptimizer
+from pdf_stream import PDFStreamWriter, release_reader
+
+# Rough ratio between the in-memory footprint of an in-memory pypdf merge and
+# the size of its input files on disk.
+MEMORY_OVERHEAD_FACTOR = 3
+
+
+def _merge_batch(
+    pdf_list: List[str], output_path: str
+) -> Tuple[int, List[Tuple[str, int, int]], List[Tuple[str, str]]]:
+    # Runs in a worker process, so it must stay a module-level function.
+    # Returns the page ranges of the inputs written, as in merged_pages.
+    # Unreadable inputs are skipped like in the serial merge and returned
+    # with their errors for the caller to log.
+    written = []
+    failures = []
+    with PDFStreamWriter(output_path) as writer:
+        for pdf_path in pdf_list:
+            first_page = writer.page_count + 1
+            try:
+                page_count = writer.append_pdf(pdf_path)
+            except Exception as e:
+                failures.append((pdf_path, str(e)))
+                continue
+            written.append((pdf_path, first_page, page_count))
+    return writer.page_count, written, failures
 
 
 class PDFMerger:
 
-    def __init__(self):
+    def __init__(
+        self,
+        memory_limit_mb: Optional[float] = None,
+        merge_workers: int = 1,
+        optimizer: Optional[PDFOptimizer] = None,
+        linearizer: Optional[PDFLinearizer] = None,
+    ):
         self.logger = get_app_logger()
         self.temp_files: List[str] = []
+        self.memory_limit_mb = memory_limit_mb
+        self.merge_workers = merge_workers
+        self.optimizer = optimizer
+        self.linearizer = linearizer
+        # (input path, first page, page count) for every input the last merge
+        # wrote, in output order; skipped inputs are left out
+        self.merged_pages: List[Tuple[str, int, int]] = []
 
     def merge_pdfs(self, pdf_list: List[str], output_path: str) -> bool:
+        self.merged_pages = []
+        merged = self._merge_pdfs(pdf_list, output_path)
+        if not merged:
+            self.merged_pages = []
+
+        if merged and self.optimizer is not None:
+            self.optimizer.optimize_pdf(output_path)
+
+        if merged and self.linearizer is not None:
+            self.linearizer.linearize_pdf(output_path)
+
+        return merged
+
+    def _merge_pdfs(self, pdf_list: List[str], output_path: str) -> bool:
         if not pdf_list:
             self.logger.error("No PDF files provided for merging")
             return False
@@ -31,6 +87,12 @@ class PDFMerger:
                     f"Only {len(valid_pdfs)} out of {len(pdf_list)} PDF files are valid"
                 )
 
+            if self.merge_workers > 1 and len(valid_pdfs) > self.merge_workers:
+                return self._merge_tree(valid_pdfs, output_path)
+
+            if self._exceeds_memory_limit(valid_pdfs):
+                return self._merge_streaming(valid_pdfs, output_path)
+
             output_dir = os.path.dirname(output_path)
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
@@ -44,12 +106,15 @@ class PDFMerger:
                     self.logger.debug(f"Processing PDF: {pdf_path}")
                     reader = PdfReader(pdf_path)
                     page_count = len(reader.pages)
+                    first_page = total_pages + 1
                     
-                    # Add all pages from current PDF
+                    # Add all pages from current PDF, counting each one so
+                    # that a failure part way keeps later offsets right
                     for page_num in range(page_count):
                         writer.add_page(reader.pages[page_num])
+                        total_pages += 1
                     
-                    total_pages += page_count
+                    self.merged_pages.append((pdf_path, first_page, page_count))
                     self.logger.debug(f"Added {page_count} pages from {pdf_path}")
                     
                 except Exception as e:
@@ -84,6 +149,135 @@ class PDFMerger:
                     pass
             return False
 
+    def _exceeds_memory_limit(self, pdf_list: List[str]) -> bool:
+        if self.memory_limit_mb is None:
+            return False
+
+        limit_bytes = self.memory_limit_mb * 1024 * 1024
+        estimated_bytes = (
+            sum(os.path.getsize(pdf_path) for pdf_path in pdf_list)
+            * MEMORY_OVERHEAD_FACTOR
+        )
+
+        if estimated_bytes <= limit_bytes:
+            return False
+
+        self.logger.debug(
+            f"Estimated merge memory ({estimated_bytes / (1024 * 1024):.1f} MB) exceeds "
+            f"limit ({self.memory_limit_mb} MB), using streaming merge"
+        )
+        return True
+
+    def _merge_streaming(self, pdf_list: List[str], output_path: str) -> bool:
+        # Each input is read, flushed to the output and released before the
+        # next one is opened, so memory stays flat however many inputs there are
+        limit_bytes = self.memory_limit_mb * 1024 * 1024
+        writer = PDFStreamWriter(output_path)
+
+        try:
+            writer.open()
+
+            for pdf_path in pdf_list:
+                if os.path.getsize(pdf_path) * MEMORY_OVERHEAD_FACTOR > limit_bytes:
+                    self.logger.warning(
+                        f"PDF {pdf_path} alone may exceed the merge memory limit"
+                    )
+                first_page = writer.page_count + 1
+                try:
+                    self.logger.debug(f"Streaming PDF: {pdf_path}")
+                    page_count = writer.append_pdf(pdf_path)
+                    self.merged_pages.append((pdf_path, first_page, page_count))
+                    self.logger.debug(f"Flushed {page_count} pages from {pdf_path}")
+                except Exception as e:
+                    self.logger.error(f"Failed to process PDF {pdf_path}: {str(e)}")
+                    continue
+
+            if writer.page_count == 0:
+                self.logger.error("No pages were added to the merged PDF")
+                writer.abort()
+                return False
+
+            writer.close()
+
+        except Exception as e:
+            self.logger.error(f"Streaming PDF merge failed: {str(e)}")
+            writer.abort()
+            return False
+
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            self.logger.debug(
+                f"PDF merge completed successfully: {output_path} "
+                f"({writer.page_count} pages, {os.path.getsize(output_path)} bytes)"
+            )
+            return True
+
+        self.logger.error("Merged PDF file was not created or is empty")
+        return False
+
+    def _merge_tree(self, pdf_list: List[str], output_path: str) -> bool:
+        # Split the inputs into contiguous batches so that concatenating the
+        # batch outputs in order reproduces the serial page order.
+        batch_count = self.merge_workers
+        batch_size = -(-len(pdf_list) // batch_count)
+        batches = [
+            pdf_list[start : start + batch_size]
+            for start in range(0, len(pdf_list), batch_size)
+        ]
+        batch_outputs = [
+            self.create_temp_file(prefix="examtopics_batch_") for _ in batches
+        ]
+
+        self.logger.debug(
+            f"Tree merge: {len(pdf_list)} PDFs in {len(batches)} batches "
+            f"across {self.merge_workers} processes"
+        )
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.merge_workers) as executor:
+                batch_results = list(executor.map(_merge_batch, batches, batch_outputs))
+
+            merged_batches = []
+            for batch_output, (page_count, written, failures) in zip(batch_outputs, batch_results):
+                for pdf_path, error in failures:
+                    self.logger.error(f"Failed to process PDF {pdf_path}: {error}")
+                self.logger.debug(
+                    f"Merged batch into {batch_output} ({page_count} pages)"
+                )
+                if page_count > 0:
+                    merged_batches.append(batch_output)
+                    offset = sum(count for _, _, count in self.merged_pages)
+                    self.merged_pages.extend(
+                        (pdf_path, offset + first_page, count)
+                        for pdf_path, first_page, count in written
+                    )
+
+            page_count = 0
+            if merged_batches:
+                page_count, _, failures = _merge_batch(merged_batches, output_path)
+                if failures:
+                    raise RuntimeError(f"Could not read merged batch {failures[0][0]}: {failures[0][1]}")
+
+        except Exception as e:
+            self.logger.error(f"Tree PDF merge failed: {str(e)}")
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except Exception:
+                    pass
+            return False
+        finally:
+            self.cleanup_temp_files(batch_outputs)
+
+        if page_count > 0 and os.path.exists(output_path):
+            self.logger.debug(
+                f"PDF merge completed successfully: {output_path} "
+                f"({page_count} pages, {os.path.getsize(output_path)} bytes)"
+            )
+            return True
+
+        self.logger.error("No pages were added to the merged PDF")
+        return False
+
     def _validate_pdf_files(self, pdf_list: List[str]) -> List[str]:
         valid_pdfs = []
         
@@ -114,6 +308,7 @@ class PDFMerger:
             
             # Try to access the first page to ensure it's readable
             _ = reader.pages[0]
+            release_reader(reader)
             
             self.logger.debug(f"PDF file is valid: {pdf_path} ({page_count} pages)")
             return True
@@ -0,0 +1,158 @@
+import math
+import os
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+from pypdf import PdfReader
+from pypdf.generic import (
+    DictionaryObject,
+    EncodedStreamObject,
+    NameObject,
+    NumberObject,
+)
+from logger import get_app_logger
+from pdf_stream import PDFStreamWriter, release_reader
+
+
+class PDFOptimizer:
+    """Rewrites PDFs with compressed streams and, optionally, smaller images.
+
+    Content streams are Flate-compressed and objects are packed into object
+    streams with a cross-reference stream. When ``image_dpi`` is set, images
+    larger than the page at that resolution are downsampled and re-encoded as
+    JPEG. The page size is used as an upper bound for the displayed size of an
+    image, so images drawn smaller than the page are never over-compressed.
+    """
+
+    def __init__(self, image_dpi: Optional[int] = None, image_quality: int = 75):
+        self.image_dpi = image_dpi
+        self.image_quality = image_quality
+        self.bytes_saved = 0
+        self.logger = get_app_logger()
+
+    def optimize_pdf(self, pdf_path: str) -> int:
+        # Optimize in place and return the number of bytes saved
+        temp_path = f"{pdf_path}.optimizing"
+
+        try:
+            original_size = os.path.getsize(pdf_path)
+            reader = PdfReader(pdf_path)
+
+            if self.image_dpi:
+                self._downsample_images(reader)
+
+            with PDFStreamWriter(
+                temp_path, compress_streams=True, object_streams=True
+            ) as writer:
+                writer.append_reader(reader)
+            release_reader(reader)
+
+            optimized_size = os.path.getsize(temp_path)
+            if optimized_size >= original_size:
+                self.logger.debug(
+                    f"Optimization did not reduce {pdf_path} ({original_size} bytes), keeping original"
+                )
+                os.remove(temp_path)
+                return 0
+
+            os.replace(temp_path, pdf_path)
+            saved = original_size - optimized_size
+            self.bytes_saved += saved
+            self.logger.debug(
+                f"Optimized {pdf_path}: {original_size} -> {optimized_size} bytes"
+            )
+            return saved
+
+        except Exception as e:
+            self.logger.warning(f"PDF optimization failed for {pdf_path}: {str(e)}")
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except Exception:
+                    pass
+            return 0
+
+    def _downsample_images(self, reader: PdfReader) -> None:
+        processed = set()
+
+        for page in reader.pages:
+            max_width = math.ceil(float(page.mediabox.width) / 72 * self.image_dpi)
+            max_height = math.ceil(float(page.mediabox.height) / 72 * self.image_dpi)
+
+            try:
+                images = page.images
+            except Exception as e:
+                self.logger.debug(f"Could not list page images: {str(e)}")
+                continue
+
+            for index in range(len(images)):
+                try:
+                    image_file = images[index]
+                except Exception as e:
+                    self.logger.debug(f"Could not decode image: {str(e)}")
+                    continue
+
+                ref = image_file.indirect_reference
+                if ref is None or (ref.generation, ref.idnum) in processed:
+                    continue
+                processed.add((ref.generation, ref.idnum))
+
+                replacement = self._recompress_image(
+                    ref.get_object(), image_file.image, max_width, max_height
+                )
+                if replacement is not None:
+                    # Every reference to this image now resolves to the new stream
+                    reader.resolved_objects[(ref.generation, ref.idnum)] = replacement
+
+    def _recompress_image(
+        self,
+        xobject: DictionaryObject,
+        image: Optional[Image.Image],
+        max_width: int,
+        max_height: int,
+    ) -> Optional[EncodedStreamObject]:
+        if image is None or xobject.get("/ImageMask"):
+            return None
+        if xobject.get("/BitsPerComponent", 8) != 8 or image.mode == "CMYK":
+            return None
+
+        width, height = image.size
+        scale = min(1.0, max_width / width, max_height / height)
+        if scale == 1.0 and xobject.get("/Filter") == "/DCTDecode":
+            return None
+
+        if scale < 1.0:
+            image = image.resize(
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                Image.LANCZOS,
+            )
+        if image.mode not in ("RGB", "L"):
+            # Any alpha channel stays in the untouched /SMask
+            image = image.convert("RGB")
+
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=self.image_quality, optimize=True)
+        data = buffer.getvalue()
+
+        if scale == 1.0 and len(data) >= len(xobject._data):
+            return None
+
+        replacement = EncodedStreamObject()
+        replacement._data = data
+        replacement[NameObject("/Type")] = NameObject("/XObject")
+        replacement[NameObject("/Subtype")] = NameObject("/Image")
+        replacement[NameObject("/Width")] = NumberObject(image.width)
+        replacement[NameObject("/Height")] = NumberObject(image.height)
+        replacement[NameObject("/ColorSpace")] = NameObject(
+            "/DeviceGray" if image.mode == "L" else "/DeviceRGB"
+        )
+        replacement[NameObject("/BitsPerComponent")] = NumberObject(8)
+        replacement[NameObject("/Filter")] = NameObject("/DCTDecode")
+        if "/SMask" in xobject:
+            replacement[NameObject("/SMask")] = xobject.raw_get("/SMask")
+
+        self.logger.debug(
+            f"Recompressed image {width}x{height} -> {image.width}x{image.height}"
+        )
+        return replacement
@@ -0,0 +1,390 @@
+import os
+import struct
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+)
+from logger import get_app_logger
+
+# Number of non-stream objects packed into each compressed object stream
+OBJECT_STREAM_SIZE = 100
+
+# Kids per node of a balanced page tree
+PAGE_TREE_FANOUT = 32
+
+
+def release_reader(reader: PdfReader) -> None:
+    # Readers sit in reference cycles with their pages and objects, so they
+    # are only reclaimed by the cyclic GC. Drop the bulky parts right away
+    # so the input's memory is returned as soon as we are done with it.
+    reader.flattened_pages = None
+    reader.resolved_objects.clear()
+    reader.stream = None
+
+
+class PDFStreamWriter:
+    """Append-only PDF writer that flushes every input to disk as it is added.
+
+    Unlike ``PdfWriter``, which keeps every page and every source reader alive
+    until ``write`` is called, this writer copies the objects of one input at a
+    time straight into the output file. Only object offsets and page object
+    numbers are kept in memory, so peak memory is bounded by the largest single
+    input rather than by the whole merge.
+
+    With ``compress_streams`` every unfiltered stream is Flate-encoded, and
+    with ``object_streams`` non-stream objects are packed into compressed
+    object streams indexed by a compressed cross-reference stream.
+
+    With ``page_tree_fanout`` pages are grouped under intermediate page tree
+    nodes of at most that many kids, so a viewer finds any page by walking a
+    few small nodes instead of scanning one ``/Kids`` array of every page.
+    """
+
+    CATALOG_NUM = 1
+    PAGES_NUM = 2
+
+    def __init__(
+        self,
+        output_path: str,
+        compress_streams: bool = False,
+        object_streams: bool = False,
+        page_tree_fanout: Optional[int] = None,
+    ):
+        if page_tree_fanout is not None and page_tree_fanout < 2:
+            raise ValueError("Page tree fanout must be at least 2")
+
+        self.output_path = output_path
+        self.compress_streams = compress_streams
+        self.object_streams = object_streams
+        self.page_tree_fanout = page_tree_fanout
+        self.logger = get_app_logger()
+        self.page_count = 0
+        self._file = None
+        # Cross-reference entries: (1, offset, 0) or (2, object stream, index)
+        self._xref: Dict[int, Tuple[int, int, int]] = {}
+        self._packed: List[Tuple[int, PdfObject]] = []
+        self._page_nums: List[int] = []
+        self._leaf_nums: List[int] = []
+        self._next_num = self.PAGES_NUM + 1
+
+    @property
+    def bytes_written(self) -> int:
+        return self._file.tell() if self._file is not None else 0
+
+    def open(self) -> None:
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        self._file = open(self.output_path, "wb")
+        self._file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def append_pdf(self, pdf_path: str) -> int:
+        reader = PdfReader(pdf_path)
+        try:
+            return self.append_reader(reader)
+        finally:
+            release_reader(reader)
+
+    def append_reader(
+        self, reader: PdfReader, page_indices: Optional[List[int]] = None
+    ) -> int:
+        if self._file is None:
+            raise ValueError("Stream writer is not open")
+
+        pages = reader.pages
+        if page_indices is None:
+            page_indices = list(range(len(pages)))
+
+        # Reserve numbers for the pages up front so that annotations and
+        # destinations pointing at them are rewritten instead of followed.
+        num_map: Dict[Tuple[int, int], int] = {}
+        selected = []
+        for index in page_indices:
+            page = pages[index]
+            new_num = self._allocate()
+            ref = page.indirect_reference
+            if ref is not None:
+                num_map[(ref.idnum, ref.generation)] = new_num
+            selected.append((new_num, page))
+
+        pending: List[Tuple[int, PdfObject]] = []
+        for new_num, page in selected:
+            page_dict = DictionaryObject()
+            for key, value in page.items():
+                if key == "/Parent":
+                    continue
+                page_dict[NameObject(key)] = self._remap(value, num_map, pending)
+            page_dict[NameObject("/Parent")] = IndirectObject(
+                self._parent_for_page(self.page_count), 0, None
+            )
+            self._write_object(new_num, page_dict)
+            self._page_nums.append(new_num)
+            self.page_count += 1
+
+            while pending:
+                obj_num, source = pending.pop()
+                self._write_object(obj_num, self._copy(source, num_map, pending))
+
+        return len(selected)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+
+        if self._leaf_nums:
+            self._write_balanced_page_tree()
+        else:
+            self._write_pages_node(self.PAGES_NUM, self._page_nums, len(self._page_nums))
+
+        catalog = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Catalog"),
+                NameObject("/Pages"): IndirectObject(self.PAGES_NUM, 0, None),
+            }
+        )
+        self._write_object(self.CATALOG_NUM, catalog)
+
+        if self.object_streams:
+            self._flush_object_stream()
+            self._write_xref_stream()
+        else:
+            self._write_xref_table()
+        self._file.close()
+        self._file = None
+
+    def abort(self) -> None:
+        # Drop a half-written output, e.g. after an error during a merge
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.output_path):
+            try:
+                os.remove(self.output_path)
+            except Exception:
+                pass
+
+    def _allocate(self) -> int:
+        num = self._next_num
+        self._next_num += 1
+        return num
+
+    def _parent_for_page(self, page_index: int) -> int:
+        # Pages are written before the tree, so each one is assigned to the
+        # leaf node it will end up under as soon as it is appended
+        if self.page_tree_fanout is None:
+            return self.PAGES_NUM
+        if page_index % self.page_tree_fanout == 0:
+            self._leaf_nums.append(self._allocate())
+        return self._leaf_nums[-1]
+
+    def _write_balanced_page_tree(self) -> None:
+        fanout = self.page_tree_fanout
+        # Each node is (object number, kid object numbers, page count)
+        level = [
+            (leaf_num, kids, len(kids))
+            for leaf_num, kids in (
+                (num, self._page_nums[index * fanout : (index + 1) * fanout])
+                for index, num in enumerate(self._leaf_nums)
+            )
+        ]
+
+        while len(level) > fanout:
+            parent_level = []
+            for start in range(0, len(level), fanout):
+                group = level[start : start + fanout]
+                parent_num = self._allocate()
+                for num, kids, count in group:
+                    self._write_pages_node(num, kids, count, parent_num)
+                parent_level.append(
+                    (parent_num, [num for num, _, _ in group], sum(c for _, _, c in group))
+                )
+            level = parent_level
+
+        for num, kids, count in level:
+            self._write_pages_node(num, kids, count, self.PAGES_NUM)
+        self._write_pages_node(
+            self.PAGES_NUM, [num for num, _, _ in level], self.page_count
+        )
+
+    def _write_pages_node(
+        self, num: int, kids: List[int], count: int, parent_num: Optional[int] = None
+    ) -> None:
+        node = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Pages"),
+                NameObject("/Kids"): ArrayObject(
+                    IndirectObject(kid, 0, None) for kid in kids
+                ),
+                NameObject("/Count"): NumberObject(count),
+            }
+        )
+        if parent_num is not None:
+            node[NameObject("/Parent")] = IndirectObject(parent_num, 0, None)
+        self._write_object(num, node)
+
+    def _remap(
+        self,
+        obj: PdfObject,
+        num_map: Dict[Tuple[int, int], int],
+        pending: List[Tuple[int, PdfObject]],
+    ) -> PdfObject:
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in num_map:
+                target = obj.get_object()
+                # References to pages that are not part of this append (or to
+                # the source page tree) must not drag those objects along.
+                if isinstance(target, DictionaryObject) and target.get("/Type") in (
+                    "/Page",
+                    "/Pages",
+                ):
+                    return NullObject()
+                num_map[key] = self._allocate()
+                pending.append((num_map[key], target))
+            return IndirectObject(num_map[key], 0, None)
+
+        if isinstance(obj, StreamObject):
+            # Streams must be indirect objects in the output
+            new_num = self._allocate()
+            pending.append((new_num, obj))
+            return IndirectObject(new_num, 0, None)
+
+        if isinstance(obj, (DictionaryObject, ArrayObject)):
+            return self._copy(obj, num_map, pending)
+
+        return obj
+
+    def _copy(
+        self,
+        obj: PdfObject,
+        num_map: Dict[Tuple[int, int], int],
+        pending: List[Tuple[int, PdfObject]],
+    ) -> PdfObject:
+        if isinstance(obj, StreamObject):
+            if isinstance(obj, EncodedStreamObject):
+                copied = EncodedStreamObject()
+                copied._data = obj._data
+            else:
+                copied = DecodedStreamObject()
+                copied.set_data(obj.get_data())
+            for key, value in obj.items():
+                if key != "/Length":
+                    copied[NameObject(key)] = self._remap(value, num_map, pending)
+            if self.compress_streams and isinstance(copied, DecodedStreamObject):
+                copied = copied.flate_encode()
+            return copied
+
+        if isinstance(obj, DictionaryObject):
+            copied = DictionaryObject()
+            for key, value in obj.items():
+                copied[NameObject(key)] = self._remap(value, num_map, pending)
+            return copied
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._remap(item, num_map, pending) for item in obj)
+
+        return obj
+
+    def _write_object(self, num: int, obj: PdfObject) -> None:
+        if self.object_streams and not isinstance(obj, StreamObject):
+            self._packed.append((num, obj))
+            if len(self._packed) >= OBJECT_STREAM_SIZE:
+                self._flush_object_stream()
+            return
+
+        self._xref[num] = (1, self._file.tell(), 0)
+        self._file.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self._file)
+        self._file.write(b"\nendobj\n")
+
+    def _flush_object_stream(self) -> None:
+        if not self._packed:
+            return
+
+        stream_num = self._allocate()
+        offsets = []
+        body = BytesIO()
+        for index, (num, obj) in enumerate(self._packed):
+            offsets.append(f"{num} {body.tell()}")
+            obj.write_to_stream(body)
+            body.write(b"\n")
+            self._xref[num] = (2, stream_num, index)
+
+        header = (" ".join(offsets) + "\n").encode()
+        object_stream = DecodedStreamObject()
+        object_stream.set_data(header + body.getvalue())
+        object_stream[NameObject("/Type")] = NameObject("/ObjStm")
+        object_stream[NameObject("/N")] = NumberObject(len(self._packed))
+        object_stream[NameObject("/First")] = NumberObject(len(header))
+        self._packed = []
+
+        self._xref[stream_num] = (1, self._file.tell(), 0)
+        self._file.write(f"{stream_num} 0 obj\n".encode())
+        object_stream.flate_encode().write_to_stream(self._file)
+        self._file.write(b"\nendobj\n")
+
+    def _write_xref_stream(self) -> None:
+        xref_num = self._allocate()
+        xref_offset = self._file.tell()
+        size = self._next_num
+        self._xref[xref_num] = (1, xref_offset, 0)
+
+        entries = BytesIO()
+        entries.write(struct.pack(">BIH", 0, 0, 65535))
+        for num in range(1, size):
+            entries.write(struct.pack(">BIH", *self._xref.get(num, (0, 0, 1))))
+
+        xref_stream = DecodedStreamObject()
+        xref_stream.set_data(entries.getvalue())
+        xref_stream[NameObject("/Type")] = NameObject("/XRef")
+        xref_stream[NameObject("/Size")] = NumberObject(size)
+        xref_stream[NameObject("/W")] = ArrayObject(
+            [NumberObject(1), NumberObject(4), NumberObject(2)]
+        )
+        xref_stream[NameObject("/Root")] = IndirectObject(self.CATALOG_NUM, 0, None)
+
+        self._file.write(f"{xref_num} 0 obj\n".encode())
+        xref_stream.flate_encode().write_to_stream(self._file)
+        self._file.write(b"\nendobj\n")
+        self._file.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def _write_xref_table(self) -> None:
+        xref_offset = self._file.tell()
+        size = self._next_num
+
+        self._file.write(f"xref\n0 {size}\n".encode())
+        self._file.write(b"0000000000 65535 f\r\n")
+        for num in range(1, size):
+            entry = self._xref.get(num)
+            if entry is None:
+                self._file.write(b"0000000000 00001 f\r\n")
+            else:
+                self._file.write(f"{entry[1]:010d} 00000 n\r\n".encode())
+
+        self._file.write(
+            f"trailer\n<< /Size {size} /Root {self.CATALOG_NUM} 0 R >>\n".encode()
+        )
+        self._file.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def __enter__(self) -> "PDFStreamWriter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,178 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from dedup import DuplicateDetector
+from logger import get_app_logger
+from tracing import Trace, activate, span
+
+# Outcomes of processing one question
+STATUS_SUCCESS = "success"
+STATUS_NO_URL = "no_url"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+STATUS_TIMED_OUT = "timed_out"
+
+# Called with (question_num, url, fingerprint) and returns the question the
+# page duplicates, if any. The fingerprint is None for a URL-only check.
+DuplicateCheck = Callable[[int, str, Optional[int]], Optional[int]]
+
+
+@dataclass
+class QuestionTask:
+    """Everything needed to search, fetch and render one question."""
+
+    exam: str
+    question: int
+    title: str
+    keyword: str
+    url_substring: str
+    pdf_path: str
+    topic: Optional[int] = None
+    url: Optional[str] = None
+    final_attempt: bool = False
+    dedup: bool = True
+    page_rules: Optional[Dict[str, Any]] = None
+    image_policy: Optional[Dict[str, Any]] = None
+    # Title/keyword pairs to search with, in order, instead of title and keyword
+    queries: Optional[List[Dict[str, str]]] = None
+    # Record a trace of the question's steps in the result
+    trace: bool = False
+
+
+@dataclass
+class QuestionResult:
+    question: int
+    status: str
+    url: Optional[str] = None
+    pdf_path: Optional[str] = None
+    duplicate_of: Optional[int] = None
+    failure: Optional[str] = None
+    error: Optional[str] = None
+    bytes_saved: int = 0
+    elapsed: float = 0.0
+    # Position of the query that found a verified URL, queries tried and
+    # search requests made
+    query_hit: Optional[int] = None
+    queries_tried: int = 0
+    searches: int = 0
+    # OpenTelemetry spans of the question, when a trace was asked for
+    spans: Optional[List[Dict[str, Any]]] = None
+
+
+class QuestionProcessor:
+    """Runs the search, fetch and render steps for single questions.
+
+    The processor holds no state about other questions. Duplicate detection
+    is delegated to a callback so that it can be answered by whoever sees
+    every question, such as the coordinator of several render workers.
+    """
+
+    def __init__(self, search_engine, pdf_generator, content_class: str = "question-body"):
+        self.search_engine = search_engine
+        self.pdf_generator = pdf_generator
+        self.fingerprinter = DuplicateDetector(content_class=content_class)
+        self.logger = get_app_logger()
+
+    def process(
+        self, task: QuestionTask, check_duplicate: Optional[DuplicateCheck] = None
+    ) -> QuestionResult:
+        started = time.monotonic()
+        trace = None
+        if task.trace:
+            trace = Trace(
+                "question",
+                exam=task.exam,
+                question=task.question,
+                final_attempt=task.final_attempt,
+            )
+
+        with activate(trace):
+            result = self._process(task, check_duplicate)
+        result.elapsed = time.monotonic() - started
+
+        if trace is not None:
+            trace.finish(status=result.status, failure=result.failure, **{"url.full": result.url})
+            result.spans = trace.spans
+        return result
+
+    def _process(
+        self, task: QuestionTask, check_duplicate: Optional[DuplicateCheck]
+    ) -> QuestionResult:
+        question_num = task.question
+        result = QuestionResult(question=question_num, status=STATUS_NO_URL)
+
+        # Use a known URL when there is one, otherwise search for it
+        url = task.url
+        if url:
+            self.logger.debug(f"Question {question_num} - Using known URL: {url}")
+        elif task.queries:
+            with span("search", queries=len(task.queries)) as search_span:
+                outcome = self.search_engine.search_plan(
+                    task.queries, task.url_substring, question_num, topic=task.topic
+                )
+                search_span.set("queries_tried", outcome.tried)
+                search_span.set("searches", outcome.searches)
+            result.query_hit = outcome.hit
+            result.queries_tried = outcome.tried
+            result.searches = outcome.searches
+            url = outcome.url
+            if not url:
+                return result
+        else:
+            self.logger.debug(f"Question {question_num} - Title: {task.title}")
+            self.logger.debug(f"Question {question_num} - Keyword: {task.keyword}")
+            with span("search"):
+                url = self.search_engine.search_question(
+                    task.keyword,
+                    task.title,
+                    task.url_substring,
+                    question_num=question_num,
+                    topic=task.topic,
+                )
+            if not url:
+                return result
+
+        result.url = url
+
+        # Check for a page that was already rendered before paying for
+        # layout: first by URL, then by a fingerprint of its content
+        html = None
+        if check_duplicate is not None:
+            duplicate_of = check_duplicate(question_num, url, None)
+            if duplicate_of is None:
+                html = self.pdf_generator.fetch_html(url)
+                if html is None:
+                    result.status = STATUS_FAILED
+                    result.failure = self.pdf_generator.last_failure
+                    return result
+
+                fingerprint = self.fingerprinter.fingerprint(html)
+                duplicate_of = check_duplicate(question_num, url, fingerprint)
+
+            if duplicate_of is not None:
+                result.status = STATUS_DUPLICATE
+                result.duplicate_of = duplicate_of
+                return result
+
+        optimizer = self.pdf_generator.optimizer
+        saved_before = optimizer.bytes_saved if optimizer is not None else 0
+
+        self.logger.info(f"Generating PDF for question {question_num}...")
+        if self.pdf_generator.generate_pdf(
+            url,
+            task.pdf_path,
+            html=html,
+            allow_missing_resources=task.final_attempt,
+            page_rules=task.page_rules,
+            image_policy=task.image_policy,
+        ):
+            result.status = STATUS_SUCCESS
+            result.pdf_path = task.pdf_path
+        else:
+            result.status = STATUS_FAILED
+            result.failure = self.pdf_generator.last_failure
+
+        if optimizer is not None:
+            result.bytes_saved = optimizer.bytes_saved - saved_before
+        return result
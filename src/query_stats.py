@@ -0,0 +1,67 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from cassette import atomic_write
+from logger import get_app_logger
+
+
+def template_key(template: Dict[str, str]) -> str:
+    return f"{template['title']}\n{template['keyword']}"
+
+
+class QueryStats:
+    """Hit rates of search query templates, kept in a JSON file between runs.
+
+    Every time a template is tried for a question it gets an attempt, and a
+    hit when it finds a verified URL. Templates are ordered by their hit rate
+    with one hit and one miss added, so a template that was never tried
+    starts at even odds, and the configured order breaks ties.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.logger = get_app_logger()
+        # exam -> template key -> {"attempts": n, "hits": n}
+        self._stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._stats = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable query stats {self.path}: {str(e)}")
+            self._stats = {}
+
+    def save(self) -> bool:
+        if not self.path:
+            return False
+
+        try:
+            atomic_write(self.path, json.dumps(self._stats, indent=2).encode("utf-8"))
+            return True
+        except OSError as e:
+            self.logger.warning(f"Failed to save query stats {self.path}: {str(e)}")
+            return False
+
+    def counts(self, exam: str, template: Dict[str, str]) -> Tuple[int, int]:
+        entry = self._stats.get(exam, {}).get(template_key(template), {})
+        return entry.get("attempts", 0), entry.get("hits", 0)
+
+    def hit_rate(self, exam: str, template: Dict[str, str]) -> float:
+        attempts, hits = self.counts(exam, template)
+        return (hits + 1) / (attempts + 2)
+
+    def order(self, exam: str, templates: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        return sorted(templates, key=lambda template: -self.hit_rate(exam, template))
+
+    def record(self, exam: str, template: Dict[str, str], hit: bool) -> None:
+        entry = self._stats.setdefault(exam, {}).setdefault(
+            template_key(template), {"attempts": 0, "hits": 0}
+        )
+        entry["attempts"] += 1
+        if hit:
+            entry["hits"] += 1
@@ -0,0 +1,137 @@
+import argparse
+import os
+import socket
+import time
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+from logger import get_app_logger
+from pipeline import STATUS_FAILED, QuestionResult
+from render_pool import RenderPool
+from runner import create_optimizer, create_render_pool
+from work_queue import WorkQueue
+
+
+class QueueWorker:
+    """Leases questions from a WorkQueue and processes them in render workers.
+
+    One render pool is started per job, using the options the job was
+    submitted with, and closed again once the job has no open tasks. Leases
+    of questions in progress are renewed while they run.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        worker_count: int = 1,
+        poll_interval: float = 2.0,
+        log_level: str = "info",
+        exit_when_idle: bool = False,
+    ):
+        self.queue = queue
+        self.worker_count = worker_count
+        self.poll_interval = poll_interval
+        self.log_level = log_level
+        self.exit_when_idle = exit_when_idle
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = 0
+        self.logger = get_app_logger()
+        self._pools: Dict[str, RenderPool] = {}
+        self._in_flight: Dict[Tuple[str, int], float] = {}
+
+    def run(self) -> int:
+        self.queue.open()
+        self.logger.info(f"Queue worker {self.worker_id} polling {self.queue.db_path}")
+        try:
+            while True:
+                while len(self._in_flight) < self.worker_count:
+                    leased = self.queue.lease(self.worker_id)
+                    if leased is None:
+                        break
+                    self._start_task(*leased)
+
+                if not self._in_flight:
+                    self._close_idle_pools()
+                    if self.exit_when_idle and not self.queue.has_open_work():
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                busy_pools = [
+                    (job_id, pool) for job_id, pool in self._pools.items() if pool.busy
+                ]
+                for job_id, pool in busy_pools:
+                    for result in pool.poll(timeout=self.poll_interval / len(busy_pools)):
+                        self._finish_task(job_id, result)
+
+                self._renew_leases()
+        finally:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools = {}
+            self.queue.close()
+
+        return self.processed
+
+    def _start_task(self, job_id, task) -> None:
+        pool = self._pool_for(job_id)
+        if pool is None:
+            self.queue.complete(
+                job_id,
+                self.worker_id,
+                QuestionResult(
+                    question=task.question,
+                    status=STATUS_FAILED,
+                    url=task.url,
+                    error="job options not found",
+                ),
+            )
+            return
+
+        pool.submit(task)
+        self._in_flight[(job_id, task.question)] = time.monotonic()
+
+    def _finish_task(self, job_id: str, result: QuestionResult) -> None:
+        self._in_flight.pop((job_id, result.question), None)
+        self.queue.complete(job_id, self.worker_id, result)
+        self.processed += 1
+
+    def _renew_leases(self) -> None:
+        now = time.monotonic()
+        for key, renewed in self._in_flight.items():
+            if now - renewed < self.queue.lease_seconds / 3:
+                continue
+
+            job_id, question_num = key
+            if not self.queue.renew(job_id, question_num, self.worker_id):
+                self.logger.warning(
+                    f"Lost the lease on question {question_num} of {job_id}"
+                )
+            self._in_flight[key] = now
+
+    def _pool_for(self, job_id: str) -> Optional[RenderPool]:
+        pool = self._pools.get(job_id)
+        if pool is not None:
+            return pool
+
+        options = self.queue.job_options(job_id)
+        if options is None:
+            self.logger.error(f"No options stored for job {job_id}")
+            return None
+
+        args = argparse.Namespace(**options)
+        args.workers = self.worker_count
+        args.queue = None
+
+        pool = create_render_pool(args, create_optimizer(args), self.log_level)
+        pool.check_duplicate = partial(self.queue.check_duplicate, job_id)
+        pool.start()
+        self._pools[job_id] = pool
+        self.logger.info(f"Started render workers for job {job_id}")
+        return pool
+
+    def _close_idle_pools(self) -> None:
+        for job_id in list(self._pools):
+            if not self.queue.has_open_tasks(job_id):
+                self._pools.pop(job_id).close()
+                self.logger.info(f"Job {job_id} has no open tasks, stopped its workers")
@@ -0,0 +1,323 @@
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from multiprocessing.connection import wait
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from logger import get_app_logger, setup_logging
+from pipeline import (
+    STATUS_FAILED,
+    STATUS_TIMED_OUT,
+    DuplicateCheck,
+    QuestionProcessor,
+    QuestionResult,
+    QuestionTask,
+)
+
+
+def memory_usage_mb() -> Tuple[Optional[float], Optional[float]]:
+    """Current and peak resident set size of this process in MB."""
+    peak = None
+    if resource is not None:
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak /= 1024 * 1024 if sys.platform == "darwin" else 1024
+
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), peak
+    except (OSError, ValueError, IndexError):
+        return peak, peak
+
+
+def _run_worker(
+    conn,
+    processor_factory: Callable[[], QuestionProcessor],
+    log_level: str,
+    max_tasks: Optional[int] = None,
+    max_rss_mb: Optional[float] = None,
+) -> None:
+    # The coordinator handles Ctrl+C and shuts the workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging(log_level)
+    processor = processor_factory()
+    tasks_done = 0
+
+    def check_duplicate(question_num, url, fingerprint):
+        conn.send(("check", question_num, url, fingerprint))
+        return conn.recv()
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        try:
+            result = processor.process(task, check_duplicate if task.dedup else None)
+        except Exception as e:
+            result = QuestionResult(
+                question=task.question, status=STATUS_FAILED, url=task.url, error=str(e)
+            )
+        tasks_done += 1
+
+        # Layout leaves the heap fragmented, so a worker that has grown too
+        # large or done enough work exits and the pool starts a fresh one
+        rss_mb, peak_mb = memory_usage_mb()
+        retiring = (max_tasks is not None and tasks_done >= max_tasks) or (
+            max_rss_mb is not None and rss_mb is not None and rss_mb > max_rss_mb
+        )
+        conn.send(("result", result, rss_mb, peak_mb, retiring))
+        if retiring:
+            break
+
+
+class _Worker:
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task: Optional[QuestionTask] = None
+        self.url: Optional[str] = None
+        self.deadline: Optional[float] = None
+        self.tasks_done = 0
+        self.rss_mb: Optional[float] = None
+
+
+class RenderPool:
+    """Worker processes that process questions under a per-question deadline.
+
+    Each worker builds its own ``QuestionProcessor`` once and keeps it warm
+    for every question it is given. A watchdog in ``poll`` kills a worker
+    whose question runs past the deadline, reports the question as timed out
+    and starts a replacement, so one stuck page cannot stall the run.
+    Duplicate checks from workers are answered in the coordinator process.
+
+    Workers report their memory use with every result and recycle themselves
+    after ``max_tasks_per_worker`` questions or once their RSS goes above
+    ``max_worker_rss_mb``. With a ``memory_budget_mb``, a new question only
+    starts while the running ones, each counted at the highest peak RSS any
+    worker has reached, still fit in the budget.
+    """
+
+    def __init__(
+        self,
+        processor_factory: Callable[[], QuestionProcessor],
+        worker_count: int = 1,
+        question_timeout: Optional[float] = None,
+        check_duplicate: Optional[DuplicateCheck] = None,
+        log_level: str = "info",
+        max_tasks_per_worker: Optional[int] = None,
+        max_worker_rss_mb: Optional[float] = None,
+        memory_budget_mb: Optional[float] = None,
+    ):
+        if worker_count < 1:
+            raise ValueError("worker_count must be at least 1")
+        if max_tasks_per_worker is not None and max_tasks_per_worker < 1:
+            raise ValueError("max_tasks_per_worker must be at least 1")
+
+        self.processor_factory = processor_factory
+        self.worker_count = worker_count
+        self.question_timeout = question_timeout
+        self.check_duplicate = check_duplicate
+        self.log_level = log_level
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self.memory_budget_mb = memory_budget_mb
+        self.recycled = 0
+        self.logger = get_app_logger()
+        # Pools are started from threads too, e.g. by the daemon, and forking
+        # a process with running threads can deadlock the child
+        self._context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        self._workers: List[_Worker] = []
+        self._peak_mb: Optional[float] = None
+
+    def start(self) -> None:
+        while len(self._workers) < self.worker_count:
+            self._workers.append(self._spawn())
+
+    @property
+    def busy(self) -> int:
+        return sum(1 for worker in self._workers if worker.task is not None)
+
+    def has_capacity(self) -> bool:
+        busy = self.busy
+        if busy >= len(self._workers):
+            return False
+        if self.memory_budget_mb is None or busy == 0:
+            return True
+        # Until a worker has reported its peak, renders run one at a time
+        if self._peak_mb is None:
+            return False
+        return (busy + 1) * self._peak_mb <= self.memory_budget_mb
+
+    def submit(self, task: QuestionTask) -> None:
+        worker = next((w for w in self._workers if w.task is None), None)
+        if worker is None:
+            raise RuntimeError("No idle render worker")
+
+        worker.conn.send(task)
+        worker.task = task
+        worker.url = task.url
+        if self.question_timeout:
+            worker.deadline = time.monotonic() + self.question_timeout
+        self.logger.info(f"Processing question {task.question}...")
+
+    def poll(self, timeout: Optional[float] = None) -> List[QuestionResult]:
+        """Wait for progress from busy workers and return finished questions."""
+        busy = [worker for worker in self._workers if worker.task is not None]
+        if not busy:
+            return []
+
+        deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+        if deadlines:
+            until_deadline = max(0.0, min(deadlines) - time.monotonic())
+            timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+
+        results = []
+        ready = wait([worker.conn for worker in busy], timeout)
+        for worker in busy:
+            if worker.conn not in ready:
+                continue
+
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                self.logger.error(
+                    f"Render worker exited while processing question {worker.task.question}"
+                )
+                results.append(
+                    QuestionResult(
+                        question=worker.task.question,
+                        status=STATUS_FAILED,
+                        url=worker.url,
+                        error="render worker exited",
+                    )
+                )
+                self._replace(worker)
+                continue
+
+            if message[0] == "check":
+                _, question_num, url, fingerprint = message
+                worker.url = url
+                worker.conn.send(
+                    self.check_duplicate(question_num, url, fingerprint)
+                    if self.check_duplicate is not None
+                    else None
+                )
+            else:
+                _, result, rss_mb, peak_mb, retiring = message
+                results.append(result)
+                worker.task = None
+                worker.deadline = None
+                worker.tasks_done += 1
+                worker.rss_mb = rss_mb
+                if peak_mb is not None:
+                    self._peak_mb = max(self._peak_mb or 0.0, peak_mb)
+                if retiring:
+                    self._recycle(worker)
+
+        now = time.monotonic()
+        for worker in busy:
+            if worker.task is not None and worker.deadline is not None and now >= worker.deadline:
+                self.logger.error(
+                    f"Question {worker.task.question} exceeded its "
+                    f"{self.question_timeout} second deadline, restarting its worker"
+                )
+                results.append(
+                    QuestionResult(
+                        question=worker.task.question,
+                        status=STATUS_TIMED_OUT,
+                        url=worker.url,
+                        elapsed=self.question_timeout,
+                    )
+                )
+                self._replace(worker)
+
+        return results
+
+    def cancel(self) -> None:
+        # Abandon questions in flight, e.g. when a job fails part way
+        for worker in list(self._workers):
+            if worker.task is not None:
+                self._replace(worker)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+
+        self._workers = []
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_run_worker,
+            args=(
+                child_conn,
+                self.processor_factory,
+                self.log_level,
+                self.max_tasks_per_worker,
+                self.max_worker_rss_mb,
+            ),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _recycle(self, worker: _Worker) -> None:
+        rss = f"{worker.rss_mb:.0f} MB" if worker.rss_mb is not None else "unknown"
+        self.logger.debug(
+            f"Recycling render worker after {worker.tasks_done} questions (RSS {rss})"
+        )
+        # The worker exits on its own once it has sent its last result
+        worker.process.join(timeout=5)
+        self._replace(worker)
+        self.recycled += 1
+
+    def _replace(self, worker: _Worker) -> None:
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+        # A killed render can leave a partly written PDF behind
+        if worker.task is not None and os.path.exists(worker.task.pdf_path):
+            try:
+                os.remove(worker.task.pdf_path)
+            except OSError:
+                pass
+        # The replaced worker may still be in a list being polled
+        worker.task = None
+        worker.deadline = None
+
+        self._workers[self._workers.index(worker)] = self._spawn()
+
+    def __enter__(self) -> "RenderPool":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,397 @@
+import abc
+import io
+import zlib
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import pydyf
+from PIL import Image
+
+from logger import get_app_logger
+from tracing import span
+
+RENDERER_WEASYPRINT = "weasyprint"
+RENDERER_TEXT = "text"
+RENDERERS = (RENDERER_WEASYPRINT, RENDERER_TEXT)
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+# Advance widths of the standard Helvetica font for ASCII 32-126, in 1/1000 em
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+class Renderer(abc.ABC):
+    """Turns a fetched question page into a PDF file.
+
+    ``render`` returns False for pages it cannot lay out. Resources are
+    downloaded through the shared URL fetcher so failed downloads are
+    reported the same way for every backend.
+    """
+
+    name = ""
+
+    def __init__(self, url_fetcher):
+        self.url_fetcher = url_fetcher
+        self.logger = get_app_logger()
+
+    @abc.abstractmethod
+    def render(
+        self,
+        url: str,
+        html: Optional[str],
+        output_path: str,
+        page_rules: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        pass
+
+    def _fetch(self, url: str) -> Tuple[bytes, Optional[str]]:
+        response = self.url_fetcher.fetch(url)
+        try:
+            return response.read(), getattr(response, "charset", None)
+        finally:
+            response.close()
+
+
+class _QuestionExtractor(HTMLParser):
+    """Collects the question content and the comments of a discussion page."""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template", "head", "button"}
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+    BLOCK_TAGS = {
+        "address", "article", "blockquote", "dd", "div", "dl", "dt", "figure", "footer",
+        "h1", "h2", "h3", "h4", "h5", "h6", "header", "li", "ol", "p", "pre", "section",
+        "table", "tr", "ul",
+    }
+    COMMENT_CLASS = "comment-container"
+    COMMENT_FIELDS = {
+        "comment-username": "author",
+        "comment-content": "text",
+        "upvote-count": "votes",
+    }
+
+    def __init__(self, content_class: str):
+        super().__init__()
+        self.content_class = content_class
+        self.found_content = False
+        # ("text", paragraph) and ("image", src) items in document order
+        self.blocks: List[Tuple[str, str]] = []
+        self.comments: List[Dict[str, List[str]]] = []
+        self._stack: List[Tuple[str, Optional[str]]] = []
+        self._paragraph: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag in self.VOID_TAGS:
+            if tag == "br":
+                self._break()
+            elif tag == "img" and attributes.get("src") and self._in_content():
+                self._break()
+                self.blocks.append(("image", attributes["src"]))
+            return
+
+        classes = (attributes.get("class") or "").split()
+        role = None
+        if tag in self.SKIPPED_TAGS:
+            role = "skip"
+        elif self.content_class in classes and not self._has_role("content"):
+            role = "content"
+            self.found_content = True
+        elif self.COMMENT_CLASS in classes and not self._has_role("comment"):
+            role = "comment"
+            self.comments.append({"author": [], "text": [], "votes": []})
+        elif self._has_role("comment"):
+            role = next(
+                (self.COMMENT_FIELDS[c] for c in classes if c in self.COMMENT_FIELDS), None
+            )
+
+        if tag in self.BLOCK_TAGS:
+            self._break()
+        self._stack.append((tag, role))
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.BLOCK_TAGS:
+            self._break()
+        # Unclosed elements in between are closed along with this one
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._has_role("skip"):
+            return
+        if self._in_content():
+            self._paragraph.append(data)
+            return
+
+        field = next(
+            (role for _, role in reversed(self._stack) if role in ("author", "text", "votes")),
+            None,
+        )
+        if field is not None:
+            self.comments[-1][field].append(data)
+
+    def close(self):
+        super().close()
+        self._break()
+
+    def _break(self):
+        text = _collapse("".join(self._paragraph))
+        if text:
+            self.blocks.append(("text", text))
+        self._paragraph = []
+
+    def _in_content(self) -> bool:
+        return self._has_role("content") and not self._has_role("comment")
+
+    def _has_role(self, role: str) -> bool:
+        return any(r == role for _, r in self._stack)
+
+
+class TextRenderer(Renderer):
+    """Fast renderer that lays out the question content as plain text.
+
+    Only the element that holds the question (its text, choices and
+    suggested answer), its images and the most upvoted comments are kept.
+    No stylesheets or fonts are downloaded and no CSS layout is done, which
+    makes it many times faster than a full page render.
+    """
+
+    name = RENDERER_TEXT
+
+    def __init__(self, url_fetcher, content_class: str = "question-body", max_comments: int = 3):
+        super().__init__(url_fetcher)
+        self.content_class = content_class
+        self.max_comments = max_comments
+
+    def render(
+        self,
+        url: str,
+        html: Optional[str],
+        output_path: str,
+        page_rules: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        # Page rules select pages of a full render, the question content is
+        # picked out directly here
+        if html is None:
+            body, charset = self._fetch(url)
+            html = body.decode(charset or "utf-8", errors="replace")
+
+        extractor = _QuestionExtractor(self.content_class)
+        extractor.feed(html)
+        extractor.close()
+
+        if not extractor.found_content:
+            self.logger.error(f"No '{self.content_class}' element found in {url}")
+            return False
+
+        with span("layout", blocks=len(extractor.blocks)):
+            layout = _TextLayout()
+            layout.add_text(url, size=8)
+            layout.add_space(8)
+
+            for kind, value in extractor.blocks:
+                if kind == "text":
+                    layout.add_text(value)
+                    layout.add_space(4)
+                else:
+                    image = self._load_image(urljoin(url, value))
+                    if image is not None:
+                        layout.add_image(*image)
+                        layout.add_space(4)
+
+            comments = self._top_comments(extractor.comments)
+            if comments:
+                layout.add_space(8)
+                layout.add_text("Top comments", size=13, bold=True)
+                layout.add_space(4)
+                for author, votes, text in comments:
+                    layout.add_text(
+                        f"{author or 'Anonymous'} ({votes} upvotes)", size=9, bold=True
+                    )
+                    layout.add_text(text)
+                    layout.add_space(6)
+
+            with open(output_path, "wb") as output_file:
+                layout.write(output_file)
+        return True
+
+    def _top_comments(self, comments: List[Dict[str, List[str]]]) -> List[Tuple[str, int, str]]:
+        ranked = []
+        for comment in comments:
+            text = _collapse(" ".join(comment["text"]))
+            if not text:
+                continue
+            digits = "".join(c for c in "".join(comment["votes"]) if c.isdigit())
+            ranked.append((_collapse(" ".join(comment["author"])), int(digits or 0), text))
+
+        # Stable sort keeps page order between comments with equal votes
+        ranked.sort(key=lambda comment: -comment[1])
+        return ranked[: self.max_comments]
+
+    def _load_image(self, image_url: str) -> Optional[Tuple[Image.Image, bytes]]:
+        try:
+            body, _ = self._fetch(image_url)
+            image = Image.open(io.BytesIO(body))
+            image.load()
+            return image, body
+        except Exception as e:
+            self.logger.warning(f"Skipping image {image_url}: {str(e)}")
+            return None
+
+
+class _TextLayout:
+    """Flows lines of text and images top to bottom over A4 pages."""
+
+    LINE_HEIGHT = 1.35
+
+    def __init__(self):
+        self.pdf = pydyf.PDF()
+        self.fonts = pydyf.Dictionary()
+        for key, base_font in (("F1", "/Helvetica"), ("F2", "/Helvetica-Bold")):
+            font = pydyf.Dictionary(
+                {
+                    "Type": "/Font",
+                    "Subtype": "/Type1",
+                    "BaseFont": base_font,
+                    "Encoding": "/WinAnsiEncoding",
+                }
+            )
+            self.pdf.add_object(font)
+            self.fonts[key] = font.reference
+        self.width = PAGE_WIDTH - 2 * MARGIN
+        self._stream: Optional[pydyf.Stream] = None
+        self._images: Optional[pydyf.Dictionary] = None
+        self._y = 0.0
+
+    def add_space(self, height: float) -> None:
+        self._y -= height
+
+    def add_text(self, text: str, size: float = 11, bold: bool = False) -> None:
+        line_height = size * self.LINE_HEIGHT
+        for line in _wrap(text, size, self.width):
+            self._reserve(line_height)
+            self._y -= line_height
+            self._stream.begin_text()
+            self._stream.set_font_size("F2" if bold else "F1", size)
+            self._stream.set_text_matrix(1, 0, 0, 1, MARGIN, self._y + size * 0.25)
+            self._stream.show_text_string(line.encode("cp1252", errors="replace"))
+            self._stream.end_text()
+
+    def add_image(self, image: Image.Image, data: bytes) -> None:
+        # Web images are laid out at 96 DPI and shrunk to fit the page
+        width = image.width * 0.75
+        height = image.height * 0.75
+        scale = min(1, self.width / width, (PAGE_HEIGHT - 2 * MARGIN) / height)
+        width, height = width * scale, height * scale
+
+        self._reserve(height)
+        self._y -= height
+        name = f"Im{len(self._images)}"
+        self._images[name] = self._image_object(image, data).reference
+        self._stream.push_state()
+        self._stream.set_matrix(width, 0, 0, height, MARGIN, self._y)
+        self._stream.draw_x_object(name)
+        self._stream.pop_state()
+
+    def write(self, output) -> None:
+        if self._stream is None:
+            self._new_page()
+        self.pdf.write(output)
+
+    def _reserve(self, height: float) -> None:
+        if self._stream is None or self._y - height < MARGIN:
+            self._new_page()
+
+    def _new_page(self) -> None:
+        self._stream = pydyf.Stream(compress=True)
+        self._images = pydyf.Dictionary()
+        self.pdf.add_object(self._stream)
+        self.pdf.add_page(
+            pydyf.Dictionary(
+                {
+                    "Type": "/Page",
+                    "Parent": self.pdf.pages.reference,
+                    "MediaBox": pydyf.Array([0, 0, PAGE_WIDTH, PAGE_HEIGHT]),
+                    "Contents": self._stream.reference,
+                    "Resources": pydyf.Dictionary(
+                        {"Font": self.fonts, "XObject": self._images}
+                    ),
+                }
+            )
+        )
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _image_object(self, image: Image.Image, data: bytes) -> pydyf.Stream:
+        extra = {
+            "Type": "/XObject",
+            "Subtype": "/Image",
+            "Width": image.width,
+            "Height": image.height,
+            "BitsPerComponent": 8,
+        }
+
+        # JPEG data is embedded as is, anything else as flate-compressed pixels
+        if image.format == "JPEG" and image.mode in ("RGB", "L"):
+            extra["ColorSpace"] = "/DeviceRGB" if image.mode == "RGB" else "/DeviceGray"
+            extra["Filter"] = "/DCTDecode"
+        else:
+            if image.mode in ("RGBA", "LA", "P", "PA"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "L":
+                image = image.convert("RGB")
+            extra["ColorSpace"] = "/DeviceRGB" if image.mode == "RGB" else "/DeviceGray"
+            extra["Filter"] = "/FlateDecode"
+            data = zlib.compress(image.tobytes())
+
+        stream = pydyf.Stream([data], pydyf.Dictionary(extra))
+        self.pdf.add_object(stream)
+        return stream
+
+
+def _text_width(text: str, size: float) -> float:
+    return sum(
+        HELVETICA_WIDTHS[ord(c) - 32] if 32 <= ord(c) <= 126 else 556 for c in text
+    ) * size / 1000
+
+
+def _wrap(text: str, size: float, width: float) -> List[str]:
+    lines: List[str] = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if _text_width(candidate, size) <= width:
+            line = candidate
+            continue
+
+        if line:
+            lines.append(line)
+        # Words wider than a line are broken wherever they run out of space
+        line = ""
+        for char in word:
+            if line and _text_width(line + char, size) > width:
+                lines.append(line)
+                line = ""
+            line += char
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
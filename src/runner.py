@@ -0,0 +1,1087 @@
+import argparse
+import os
+import threading
+from collections import deque
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from archive import QuestionArchiveWriter
+from cassette import MODE_RECORD, MODE_REPLAY, Cassette
+from config import ConfigManager
+from dedup import DuplicateDetector
+from fetcher import default_font_cache_dir
+from image_policy import validate_image_policy
+from indexer import QuestionIndex
+from query_stats import QueryStats
+from search import SearchEngine, parse_topic
+from sharding import parse_shard, shard_questions
+from pdf_generator import FAILURE_FETCH, PDFGenerator
+from pdf_linearizer import PDFLinearizer
+from pdf_merger import PDFMerger
+from pdf_optimizer import PDFOptimizer
+from pipeline import (
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_NO_URL,
+    STATUS_SUCCESS,
+    STATUS_TIMED_OUT,
+    QuestionProcessor,
+    QuestionResult,
+    QuestionTask,
+)
+from logger import get_app_logger
+from render_pool import RenderPool
+from renderer import RENDERER_WEASYPRINT, RENDERERS
+from streaming_merger import StreamingMerger
+from tracing import Trace, TraceLog
+from url_io import export_urls, load_url_map
+from volumes import VolumeWriter
+from work_queue import QueueDispatcher, WorkQueue
+
+# Seconds between checks for a stop request while questions are running
+STOP_CHECK_INTERVAL = 1.0
+
+
+def cleanup_individual_pdfs(generated_pdfs, logger):
+    logger.debug("Cleaning up individual PDF files...")
+    cleanup_count = 0
+    cleanup_failures = 0
+
+    for _, pdf_path in generated_pdfs:
+        try:
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+                cleanup_count += 1
+                logger.debug(f"Removed individual PDF: {pdf_path}")
+        except Exception as e:
+            cleanup_failures += 1
+            logger.warning(f"Failed to remove {pdf_path}: {str(e)}")
+
+    logger.debug(f"  Cleaned up {cleanup_count} individual PDF files")
+    if cleanup_failures > 0:
+        logger.warning(f"  Failed to clean up {cleanup_failures} files")
+
+
+def build_question_processor(
+    optimizer=None,
+    fetch_retries=2,
+    retry_backoff=1.0,
+    renderer=RENDERER_WEASYPRINT,
+    cassette=None,
+    font_cache_dir=None,
+):
+    # Runs inside each render worker, so every worker gets its own generator
+    return QuestionProcessor(
+        SearchEngine(cassette=cassette),
+        PDFGenerator(
+            optimizer=optimizer,
+            fetch_retries=fetch_retries,
+            retry_backoff=retry_backoff,
+            renderer=renderer,
+            cassette=cassette,
+            font_cache_dir=font_cache_dir,
+        ),
+    )
+
+
+def processor_settings(args: argparse.Namespace) -> tuple:
+    """Run options that are baked into render workers when they start."""
+    return (
+        bool(args.optimize or args.image_dpi),
+        args.image_dpi,
+        args.image_quality,
+        args.fetch_retries,
+        args.retry_backoff,
+        args.renderer,
+        args.workers,
+        args.max_tasks_per_worker,
+        args.max_worker_rss_mb,
+        args.record,
+        args.replay,
+        args.replay_latency,
+        args.font_cache,
+        args.no_font_cache,
+    )
+
+
+def create_optimizer(args: argparse.Namespace) -> Optional[PDFOptimizer]:
+    if args.optimize or args.image_dpi:
+        return PDFOptimizer(image_dpi=args.image_dpi, image_quality=args.image_quality)
+    return None
+
+
+def resolve_image_policy(
+    args: argparse.Namespace, configured: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Image policy of the exam with the run's image options applied on top."""
+    if args.keep_images:
+        return None
+
+    policy = dict(configured or {})
+    for key, value in (
+        ("max_pixels", args.image_max_pixels),
+        ("max_dpi", args.image_max_dpi),
+        ("jpeg_quality", args.image_jpeg_quality),
+    ):
+        if value is not None:
+            policy[key] = value
+    if args.drop_decorative_images:
+        policy["drop_decorative"] = True
+
+    validate_image_policy(policy)
+    return policy or None
+
+
+def shard_argument(text: str) -> Tuple[int, int]:
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def create_cassette(args: argparse.Namespace) -> Optional[Cassette]:
+    if args.record:
+        return Cassette(args.record, MODE_RECORD)
+    if args.replay:
+        return Cassette(args.replay, MODE_REPLAY, latency_scale=args.replay_latency)
+    return None
+
+
+def create_render_pool(
+    args: argparse.Namespace, optimizer: Optional[PDFOptimizer], log_level: str
+) -> Union[RenderPool, QueueDispatcher]:
+    if args.queue:
+        # Questions are processed by queue workers, this process coordinates
+        job_id = args.job_id or f"{args.exam}:{args.begin}-{args.end}"
+        if not args.job_id and args.shard:
+            job_id += ":shard{}of{}".format(*args.shard)
+        return QueueDispatcher(WorkQueue(args.queue), job_id, vars(args))
+
+    return RenderPool(
+        partial(
+            build_question_processor,
+            optimizer=optimizer,
+            fetch_retries=args.fetch_retries,
+            retry_backoff=args.retry_backoff,
+            renderer=args.renderer,
+            cassette=create_cassette(args),
+            font_cache_dir=None if args.no_font_cache else args.font_cache,
+        ),
+        worker_count=args.workers,
+        question_timeout=args.question_timeout,
+        log_level=log_level,
+        max_tasks_per_worker=args.max_tasks_per_worker,
+        max_worker_rss_mb=args.max_worker_rss_mb,
+        memory_budget_mb=args.memory_budget_mb,
+    )
+
+
+def build_run_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ExamTopics PDF Scraper")
+
+    parser.add_argument("--exam", required=True, help="Exam code (e.g., saa-c03)")
+    parser.add_argument(
+        "--begin", type=int, required=True, help="Beginning question number"
+    )
+    parser.add_argument("--end", type=int, required=True, help="Ending question number")
+    parser.add_argument(
+        "--output", default="output", help="Output directory for PDF files"
+    )
+    parser.add_argument(
+        "--config", default="settings.json", help="Configuration file path"
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_argument,
+        default=None,
+        metavar="I/N",
+        help="Process only shard I of N of the question range, dealt out in turn; "
+        "individual PDFs are kept for the 'merge' command",
+    )
+    parser.add_argument(
+        "--no-merge",
+        action="store_true",
+        help="Do not merge generated PDFs into a single file (default: merge is enabled)",
+    )
+    parser.add_argument(
+        "--keep-individual",
+        action="store_true",
+        help="Keep individual PDF files after merging (default: delete them)",
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Store question PDFs in one zip archive as they finish instead of "
+        "keeping loose files",
+    )
+    parser.add_argument(
+        "--merge-memory-limit",
+        type=float,
+        default=None,
+        help="Memory ceiling in MB for merging; larger merges are streamed to disk",
+    )
+    parser.add_argument(
+        "--merge-workers",
+        type=int,
+        default=1,
+        help="Number of processes for a parallel tree merge (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Compress streams and pack objects in generated and merged PDFs",
+    )
+    parser.add_argument(
+        "--linearize",
+        action="store_true",
+        help="Write merged PDFs linearized for fast opening, with object and "
+        "cross-reference streams and a balanced page tree",
+    )
+    parser.add_argument(
+        "--image-dpi",
+        type=int,
+        default=None,
+        help="Downsample embedded images to this DPI (implies --optimize)",
+    )
+    parser.add_argument(
+        "--image-quality",
+        type=int,
+        default=75,
+        help="JPEG quality for recompressed images (default: 75)",
+    )
+    parser.add_argument(
+        "--image-max-pixels",
+        type=int,
+        default=None,
+        help="Before layout, shrink images so their longest side is at most this many pixels",
+    )
+    parser.add_argument(
+        "--image-max-dpi",
+        type=float,
+        default=None,
+        help="Before layout, shrink images to at most this DPI across an A4 page width",
+    )
+    parser.add_argument(
+        "--image-jpeg-quality",
+        type=int,
+        default=None,
+        help="Before layout, convert images to JPEG at this quality",
+    )
+    parser.add_argument(
+        "--drop-decorative-images",
+        action="store_true",
+        help="Leave out small images such as icons and avatars",
+    )
+    parser.add_argument(
+        "--keep-images",
+        action="store_true",
+        help="Ignore the configured image policy and lay out images as downloaded",
+    )
+    parser.add_argument(
+        "--volume-size",
+        type=int,
+        default=None,
+        help="Split merged output into volumes of this many questions",
+    )
+    parser.add_argument(
+        "--volume-max-mb",
+        type=float,
+        default=None,
+        help="Split merged output into volumes of at most this many MB",
+    )
+    parser.add_argument(
+        "--stream-merge",
+        action="store_true",
+        help="Merge each question into the output as soon as it is ready",
+    )
+    parser.add_argument(
+        "--urls-in",
+        default=None,
+        help="CSV/JSONL file mapping question numbers to URLs; only missing questions are searched",
+    )
+    parser.add_argument(
+        "--urls-out",
+        default=None,
+        help="Write every resolved question URL to this CSV/JSONL file",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Render every question even if its page duplicates an earlier one",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Add the text of every generated question to the local search index",
+    )
+    parser.add_argument(
+        "--index-db",
+        default=None,
+        help="Index database path (default: <output>/questions_index.sqlite)",
+    )
+
+    parser.add_argument(
+        "--query-stats",
+        default=None,
+        help="File with the hit rates of the exam's search queries, used to try the "
+        "best query first (default: <output>/query_stats.json)",
+    )
+
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="FILE",
+        help="Append a trace of every question's search, fetch, layout and merge steps "
+        "to this JSONL file in OpenTelemetry (OTLP/JSON) format",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes that search, fetch and render questions (default: 1)",
+    )
+    parser.add_argument(
+        "--question-timeout",
+        type=float,
+        default=None,
+        help="Deadline in seconds for searching, fetching and rendering one question",
+    )
+    parser.add_argument(
+        "--max-tasks-per-worker",
+        type=int,
+        default=None,
+        help="Restart a render worker after it has processed this many questions",
+    )
+    parser.add_argument(
+        "--max-worker-rss-mb",
+        type=float,
+        default=None,
+        help="Restart a render worker once its resident memory goes above this many MB",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=None,
+        help="Total memory in MB for render workers; fewer questions run at once to stay within it",
+    )
+    parser.add_argument(
+        "--fetch-retries",
+        type=int,
+        default=2,
+        help="Retries with backoff for a page or resource that fails to download (default: 2)",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=1.0,
+        help="Delay in seconds before the first fetch retry, doubled on each retry (default: 1.0)",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=RENDERERS,
+        default=RENDERER_WEASYPRINT,
+        help="'weasyprint' prints the full page, 'text' lays out only the question "
+        "content and top comments, much faster (default: weasyprint)",
+    )
+    parser.add_argument(
+        "--font-cache",
+        default=default_font_cache_dir(),
+        metavar="DIR",
+        help="Directory where downloaded web fonts are kept between runs "
+        "(default: ~/.cache/dumps-search/fonts)",
+    )
+    parser.add_argument(
+        "--no-font-cache",
+        action="store_true",
+        help="Do not keep downloaded web fonts on disk",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        default=None,
+        metavar="DIR",
+        help="Save every search result and fetched response to this cassette directory",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        default=None,
+        metavar="DIR",
+        help="Serve searches and fetches from this cassette directory, fully offline",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="Replay each response after its recorded duration times this factor (default: 0)",
+    )
+    parser.add_argument(
+        "--queue",
+        default=None,
+        help="Work queue database; questions are left to 'worker' processes sharing it",
+    )
+    parser.add_argument(
+        "--job-id",
+        default=None,
+        help="Queue job name (default: <exam>:<begin>-<end>); rerunning a job resumes it",
+    )
+
+    return parser
+
+
+def build_run_args(
+    exam: str,
+    begin: int,
+    end: int,
+    config_path: str = "settings.json",
+    options: Optional[Dict[str, Any]] = None,
+) -> argparse.Namespace:
+    """Run arguments for a question range, raising ValueError if invalid.
+
+    ``options`` are named like the command line flags, with or without the
+    leading dashes and with dashes or underscores. They are parsed like the
+    command line, so values are converted and checked the same way; switches
+    take True or False.
+    """
+    try:
+        argv = [
+            "--exam",
+            str(exam),
+            "--begin",
+            str(int(begin)),
+            "--end",
+            str(int(end)),
+            "--config",
+            config_path,
+        ]
+    except (TypeError, ValueError):
+        raise ValueError("'begin' and 'end' must be question numbers")
+
+    options = options or {}
+    if not isinstance(options, dict):
+        raise ValueError("'options' must be a JSON object")
+
+    parser = build_run_parser()
+    flags = parser._option_string_actions
+    for name, value in options.items():
+        flag = "--" + name.lstrip("-").replace("_", "-")
+        action = flags.get(flag)
+        if action is None or action.dest in ("help", "exam", "begin", "end"):
+            raise ValueError(f"Unknown option: {name}")
+        if action.nargs == 0:
+            if not isinstance(value, bool):
+                raise ValueError(f"Option {name} must be true or false")
+            if value:
+                argv.append(flag)
+        elif value is not None:
+            argv.extend([flag, str(value)])
+
+    def fail(message):
+        raise ValueError(f"Invalid job arguments: {message}")
+
+    parser.error = fail
+    try:
+        return parser.parse_args(argv)
+    except SystemExit:
+        raise ValueError("Invalid job arguments")
+
+
+def run_job(
+    args: argparse.Namespace,
+    config_manager: ConfigManager,
+    render_pool: Optional[RenderPool] = None,
+    on_result: Optional[Callable[[QuestionResult], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[Dict[str, Any]]:
+    """Process one question range as described by the parsed run arguments.
+
+    A long-lived caller such as the daemon passes in a started render pool so
+    workers and their caches are reused between jobs. Every finished question
+    is passed to ``on_result``. Once ``stop_event`` is set, no new questions
+    are started and the run finishes with the questions done so far. Returns
+    a summary of the run, or None when the arguments do not describe a valid
+    run.
+    """
+    # If the run fails, outputs it was still writing are closed or dropped,
+    # so a long-lived caller does not keep them open into the next job
+    with ExitStack() as cleanup:
+        summary = _run_job(args, config_manager, render_pool, on_result, stop_event, cleanup)
+        cleanup.pop_all()
+    return summary
+
+
+def _run_job(
+    args: argparse.Namespace,
+    config_manager: ConfigManager,
+    render_pool: Optional[RenderPool],
+    on_result: Optional[Callable[[QuestionResult], None]],
+    stop_event: Optional[threading.Event],
+    cleanup: ExitStack,
+) -> Optional[Dict[str, Any]]:
+    logger = get_app_logger()
+
+    # Initialize components
+    logger.info("Starting ExamTopics PDF Scraper...")
+
+    optimizer = create_optimizer(args)
+    linearizer = PDFLinearizer() if args.linearize else None
+
+    logger.info("Configuration loaded successfully")
+
+    # Get exam configuration
+    exam_config = config_manager.get_exam_config(args.exam)
+    if not exam_config:
+        logger.error(f"Exam '{args.exam}' not found in configuration")
+        logger.info(f"Available exams: {config_manager.list_available_exams()}")
+        return None
+
+    logger.info(f"Found exam config for: {args.exam}")
+
+    # Validate question range
+    if args.begin > args.end:
+        logger.error(
+            f"Begin question number ({args.begin}) cannot be greater than end question number ({args.end})"
+        )
+        return None
+
+    if args.replay and not os.path.isdir(args.replay):
+        logger.error(f"Cassette directory not found: {args.replay}")
+        return None
+
+    url_substring = exam_config["url_substring"]
+    topic = parse_topic(exam_config["title"])
+    page_rules = config_manager.get_page_rules(args.exam)
+    query_templates = config_manager.get_query_templates(args.exam)
+    try:
+        image_policy = resolve_image_policy(args, config_manager.get_image_policy(args.exam))
+    except ValueError as e:
+        logger.error(f"Invalid image options: {str(e)}")
+        return None
+
+    questions = list(range(args.begin, args.end + 1))
+    merge_enabled = not args.no_merge
+    if args.shard:
+        # A shard holds every n-th question, so its PDFs are merged with the
+        # other shards' by the 'merge' command instead
+        shard_index, shard_count = args.shard
+        questions = shard_questions(args.begin, args.end, shard_index, shard_count)
+        merge_enabled = False
+        logger.info(
+            f"Processing shard {shard_index}/{shard_count} of questions "
+            f"{args.begin} to {args.end} ({len(questions)} questions)"
+        )
+    else:
+        logger.info(f"Processing questions {args.begin} to {args.end}")
+
+    # Track results
+    successful_urls = []
+    failed_questions = []
+    generated_pdfs = []
+    pdf_failures = []
+    duplicate_questions = []
+    timed_out_questions = []
+    merged_files = []
+
+    duplicate_detector = None if args.no_dedup else DuplicateDetector()
+
+    imported_urls = {}
+    if args.urls_in:
+        imported_urls = load_url_map(args.urls_in, exam=args.exam)
+        logger.info(f"Imported {len(imported_urls)} question URLs from {args.urls_in}")
+
+    merged_filename = f"{args.exam}_questions{args.begin}-{args.end}_merged.pdf"
+    merged_path = os.path.join(args.output, merged_filename)
+
+    trace_log = None
+    if args.trace:
+        trace_log = TraceLog(args.trace)
+        trace_log.open()
+        cleanup.callback(trace_log.close)
+
+    archive_writer = None
+    if args.archive:
+        archive_filename = f"{args.exam}_questions{args.begin}-{args.end}"
+        if args.shard:
+            archive_filename += "_shard{}of{}".format(*args.shard)
+        archive_writer = QuestionArchiveWriter(
+            args.exam, os.path.join(args.output, f"{archive_filename}.zip")
+        )
+        archive_writer.open()
+        cleanup.callback(archive_writer.abort)
+
+    # Volumes and streaming merges are written while questions are
+    # processed instead of merging everything at the end
+    volume_writer = None
+    stream_merger = None
+    if merge_enabled and (args.volume_size or args.volume_max_mb):
+        volume_writer = VolumeWriter(
+            args.exam,
+            args.output,
+            questions_per_volume=args.volume_size,
+            max_volume_mb=args.volume_max_mb,
+            optimizer=optimizer,
+            linearizer=linearizer,
+        )
+        stream_merger = StreamingMerger(
+            args.begin,
+            volume_writer=volume_writer,
+            trace_for=trace_log.get if trace_log is not None else None,
+        )
+    elif merge_enabled and args.stream_merge:
+        stream_merger = StreamingMerger(
+            args.begin,
+            output_path=merged_path,
+            optimizer=optimizer,
+            linearizer=linearizer,
+            trace_for=trace_log.get if trace_log is not None else None,
+        )
+    if stream_merger is not None:
+        cleanup.callback(stream_merger.abort)
+
+    # Hit rates carry over between runs, so the query that finds the most
+    # questions is tried first
+    query_stats = QueryStats(
+        args.query_stats or os.path.join(args.output, "query_stats.json")
+    )
+    query_stats.load()
+    query_plans = {}
+    search_requests = 0
+
+    question_index = None
+    if args.index:
+        question_index = QuestionIndex(
+            args.index_db or os.path.join(args.output, "questions_index.sqlite")
+        )
+        question_index.open()
+        cleanup.callback(question_index.close)
+
+    def check_duplicate(question_num, url, fingerprint):
+        if fingerprint is None:
+            return duplicate_detector.find_by_url(url)
+
+        duplicate_of = duplicate_detector.find_by_fingerprint(fingerprint)
+        if duplicate_of is None:
+            # Claim the page right away so questions rendered in parallel
+            # are compared against it too
+            duplicate_detector.add(question_num, url, fingerprint)
+        return duplicate_of
+
+    def record_result(result):
+        # Returns False while the question still has a retry ahead of it
+        nonlocal search_requests
+        question_num = result.question
+        retried = question_num in retry_attempted
+
+        search_requests += result.searches
+        plan = query_plans.pop(question_num, [])
+        for position, template in enumerate(plan[: result.queries_tried]):
+            query_stats.record(args.exam, template, hit=position == result.query_hit)
+
+        if result.status == STATUS_NO_URL:
+            failed_questions.append(question_num)
+            logger.warning(f"FAILED: No valid URL found for question {question_num}")
+            if stream_merger is not None:
+                stream_merger.skip(question_num)
+            return True
+
+        if result.url and not retried:
+            successful_urls.append((question_num, result.url))
+            logger.info(f"SUCCESS: Found URL for question {question_num}")
+
+        if optimizer is not None:
+            optimizer.bytes_saved += result.bytes_saved
+
+        if result.status == STATUS_SUCCESS and not os.path.exists(result.pdf_path):
+            logger.error(
+                f"PDF MISSING: Question {question_num} was rendered but "
+                f"{result.pdf_path} does not exist"
+            )
+            result.status = STATUS_FAILED
+
+        if result.status == STATUS_SUCCESS:
+            generated_pdfs.append((question_num, result.pdf_path))
+            logger.info(
+                f"PDF SUCCESS: Generated {os.path.basename(result.pdf_path)}"
+            )
+            if retried:
+                retried_questions.append(question_num)
+
+            if question_index is not None:
+                question_index.index_pdf(args.exam, question_num, result.pdf_path)
+
+            if stream_merger is not None:
+                stream_merger.add(question_num, result.pdf_path)
+
+            if archive_writer is not None and archive_writer.add(question_num, result.pdf_path):
+                # Without a merge nothing else reads the PDF; otherwise it is
+                # removed with the others once merged
+                if not merge_enabled and not args.keep_individual:
+                    cleanup_individual_pdfs([(question_num, result.pdf_path)], logger)
+                    if question_index is not None:
+                        question_index.record_archived_file(
+                            args.exam, question_num, archive_writer.output_path
+                        )
+            return True
+
+        if result.status == STATUS_DUPLICATE:
+            duplicate_questions.append((question_num, result.duplicate_of))
+            logger.warning(
+                f"DUPLICATE: Question {question_num} has the same page as "
+                f"question {result.duplicate_of}, skipping render"
+            )
+            if stream_merger is not None:
+                stream_merger.skip(question_num)
+            return True
+
+        if duplicate_detector is not None:
+            duplicate_detector.remove(question_num)
+
+        # Questions whose page or resources could not be fetched get one
+        # more attempt, after a network blip has had time to pass
+        if (
+            result.status == STATUS_FAILED
+            and result.failure == FAILURE_FETCH
+            and not retried
+        ):
+            retry_attempted.add(question_num)
+            retry_queue.append(
+                make_task(question_num, url=result.url, final_attempt=True)
+            )
+            logger.warning(
+                f"FETCH FAILED: Question {question_num} will be retried later"
+            )
+            return False
+
+        if result.status == STATUS_TIMED_OUT:
+            timed_out_questions.append((question_num, result.url))
+            logger.error(
+                f"TIMED OUT: Question {question_num} did not finish within "
+                f"{args.question_timeout} seconds"
+            )
+        else:
+            pdf_failures.append((question_num, result.url))
+            logger.error(
+                f"PDF FAILED: Could not generate PDF for question {question_num}"
+            )
+        if stream_merger is not None:
+            stream_merger.skip(question_num)
+        return True
+
+    def handle_result(result):
+        if trace_log is not None and result.spans:
+            trace_log.add(result.question, result.spans)
+
+        final = record_result(result)
+
+        # A question's trace is complete once it has been merged, which a
+        # streaming merge does in question order
+        if trace_log is not None:
+            if stream_merger is None or not final:
+                trace_log.write(result.question)
+            else:
+                trace_log.write_before(stream_merger.next_question)
+
+        if final and on_result is not None:
+            on_result(result)
+
+    def make_task(question_num, url=None, final_attempt=False):
+        plan = query_stats.order(args.exam, query_templates)
+        query_plans[question_num] = plan
+        queries = [
+            {
+                field: template[field].replace("#QUESTION", str(question_num))
+                for field in ("title", "keyword")
+            }
+            for template in plan
+        ]
+        return QuestionTask(
+            exam=args.exam,
+            question=question_num,
+            title=queries[0]["title"],
+            keyword=queries[0]["keyword"],
+            url_substring=url_substring,
+            # Queue workers may run in another directory, so they are
+            # given absolute paths under the shared output root
+            pdf_path=os.path.abspath(
+                os.path.join(args.output, f"{args.exam}_question{question_num}.pdf")
+            ),
+            topic=topic,
+            url=url,
+            final_attempt=final_attempt,
+            dedup=duplicate_detector is not None,
+            page_rules=page_rules,
+            image_policy=image_policy,
+            queries=queries,
+            trace=trace_log is not None,
+        )
+
+    # Tasks are built when they are submitted, so each question's query plan
+    # is ordered by the hit rates recorded so far in this run
+    pending = deque(questions)
+    retry_queue = deque()
+    retry_attempted = set()
+    retried_questions = []
+
+    own_pool = render_pool is None
+    if own_pool:
+        render_pool = create_render_pool(args, optimizer, config_manager.get_log_level())
+        render_pool.start()
+    render_pool.question_timeout = args.question_timeout
+    render_pool.memory_budget_mb = args.memory_budget_mb
+    render_pool.check_duplicate = check_duplicate
+
+    # Process each question in the range. A streaming merge can only hold
+    # back a window of questions, so new questions wait for it and pending
+    # retries are run early once they block the merge.
+    try:
+        while pending or retry_queue or render_pool.busy:
+            if stop_event is not None and stop_event.is_set():
+                logger.warning("Run stopped, skipping the remaining questions")
+                break
+
+            while render_pool.has_capacity():
+                if pending and (
+                    stream_merger is None
+                    or stream_merger.accepts(pending[0])
+                ):
+                    question_num = pending.popleft()
+                    render_pool.submit(
+                        make_task(question_num, url=imported_urls.get(question_num))
+                    )
+                elif retry_queue:
+                    logger.info(
+                        f"Retrying question {retry_queue[0].question} "
+                        f"after a fetch failure..."
+                    )
+                    render_pool.submit(retry_queue.popleft())
+                else:
+                    break
+
+            if not render_pool.busy:
+                logger.error("No question can be scheduled, stopping")
+                break
+
+            # Wake up now and then to notice a stop request
+            poll_timeout = STOP_CHECK_INTERVAL if stop_event is not None else None
+            for result in render_pool.poll(timeout=poll_timeout):
+                handle_result(result)
+    finally:
+        render_pool.check_duplicate = None
+        if own_pool:
+            render_pool.close()
+        else:
+            # Leave a shared pool idle for the next job
+            render_pool.cancel()
+
+    # Workers finish questions out of order
+    successful_urls.sort()
+    generated_pdfs.sort()
+    pdf_failures.sort()
+    failed_questions.sort()
+    duplicate_questions.sort()
+    timed_out_questions.sort()
+
+    # Replayed searches say nothing new about the queries
+    if not args.replay:
+        query_stats.save()
+
+    if args.urls_out:
+        export_urls(args.urls_out, args.exam, successful_urls)
+        logger.info(f"Exported {len(successful_urls)} question URLs to {args.urls_out}")
+
+    # Log summary
+    logger.info(f"{'='*60}")
+    logger.info(f"PROCESSING SUMMARY")
+    logger.info(f"{'='*60}")
+    logger.info(f"Total questions processed: {len(questions)}")
+    logger.info(f"URLs found: {len(successful_urls)}")
+    logger.info(f"Search requests: {search_requests}")
+    logger.info(f"PDFs generated: {len(generated_pdfs)}")
+    logger.info(f"PDF generation failed: {len(pdf_failures)}")
+    logger.info(f"Recovered on retry: {len(retried_questions)}")
+    logger.info(f"Timed out: {len(timed_out_questions)}")
+    logger.info(f"No URLs found: {len(failed_questions)}")
+    logger.info(f"Duplicates skipped: {len(duplicate_questions)}")
+
+    if len(query_templates) > 1:
+        logger.info(f"SEARCH QUERY HIT RATES:")
+        for template in query_stats.order(args.exam, query_templates):
+            attempts, hits = query_stats.counts(args.exam, template)
+            logger.info(f"  {hits}/{attempts}: {template['title']}")
+
+    if generated_pdfs:
+        logger.info(f"SUCCESSFULLY GENERATED PDFs:")
+        for question_num, pdf_path in generated_pdfs:
+            logger.debug(f"  Question {question_num}: {pdf_path}")
+
+    if pdf_failures:
+        logger.info(f"PDF GENERATION FAILURES:")
+        for question_num, url in pdf_failures:
+            logger.debug(
+                f"  Question {question_num}: Failed to generate PDF from {url}"
+            )
+
+    if failed_questions:
+        logger.info(f"NO URLs FOUND:")
+        for question_num in failed_questions:
+            logger.debug(f"  Question {question_num}: No valid URL found")
+
+    if timed_out_questions:
+        logger.info(f"TIMED OUT QUESTIONS:")
+        for question_num, url in timed_out_questions:
+            logger.debug(f"  Question {question_num}: Timed out ({url or 'no URL yet'})")
+
+    if duplicate_questions:
+        logger.info(f"DUPLICATE QUESTIONS:")
+        for question_num, duplicate_of in duplicate_questions:
+            logger.debug(
+                f"  Question {question_num}: Same page as question {duplicate_of}"
+            )
+
+    if volume_writer is not None:
+        stream_merger.finish()
+
+        logger.info(f"{'='*60}")
+        logger.info(f"VOLUME SUMMARY")
+        logger.info(f"{'='*60}")
+        for volume_path, first, last in volume_writer.volumes:
+            merged_files.append(volume_path)
+            logger.info(
+                f"VOLUME: {os.path.basename(volume_path)} (questions {first}-{last})"
+            )
+            if question_index is not None:
+                question_index.record_merged_file(
+                    args.exam, volume_writer.volume_pages[volume_path], volume_path
+                )
+
+        if volume_writer.volumes and not args.keep_individual:
+            cleanup_individual_pdfs(generated_pdfs, logger)
+
+    elif stream_merger is not None:
+        if stream_merger.finish():
+            logger.info(f"{'='*60}")
+            logger.info(f"PDF MERGE SUMMARY")
+            logger.info(f"{'='*60}")
+            logger.info(f"MERGE SUCCESS: Created {merged_filename}")
+            logger.debug(f"  Location: {merged_path}")
+            merged_files.append(merged_path)
+            logger.debug(f"  Merged {stream_merger.merged_count} individual PDFs")
+
+            if question_index is not None:
+                question_index.record_merged_file(
+                    args.exam, stream_merger.merged_pages, merged_path
+                )
+
+            if not args.keep_individual:
+                cleanup_individual_pdfs(generated_pdfs, logger)
+            else:
+                logger.debug(f"  Individual PDF files preserved")
+        else:
+            logger.error(f"MERGE FAILED: Could not create merged PDF")
+
+    # Merge PDFs by default unless --no-merge is specified
+    elif merge_enabled and generated_pdfs:
+        logger.info("Starting PDF merge process...")
+        pdf_merger = PDFMerger(
+            memory_limit_mb=args.merge_memory_limit,
+            merge_workers=args.merge_workers,
+            optimizer=optimizer,
+            linearizer=linearizer,
+        )
+
+        try:
+            # Extract just the file paths from generated_pdfs
+            pdf_paths = [pdf_path for _, pdf_path in generated_pdfs]
+
+            logger.info(f"Merging {len(pdf_paths)} PDFs into: {merged_filename}")
+
+            # Perform the merge, traced on its own as it covers every question
+            merge_trace = None
+            if trace_log is not None:
+                merge_trace = Trace("merge", exam=args.exam, pdfs=len(pdf_paths))
+            merge_success = pdf_merger.merge_pdfs(pdf_paths, merged_path)
+            if merge_trace is not None:
+                merge_trace.finish(success=merge_success)
+                trace_log.write_trace(merge_trace)
+
+            if merge_success:
+                logger.info(f"{'='*60}")
+                logger.info(f"PDF MERGE SUMMARY")
+                logger.info(f"{'='*60}")
+                logger.info(f"MERGE SUCCESS: Created {merged_filename}")
+                logger.debug(f"  Location: {merged_path}")
+                merged_files.append(merged_path)
+                logger.debug(f"  Merged {len(pdf_paths)} individual PDFs")
+
+                if question_index is not None:
+                    question_of = {pdf_path: num for num, pdf_path in generated_pdfs}
+                    question_index.record_merged_file(
+                        args.exam,
+                        [
+                            (question_of[pdf_path], first_page, page_count)
+                            for pdf_path, first_page, page_count in pdf_merger.merged_pages
+                        ],
+                        merged_path,
+                    )
+
+                # Clean up individual PDFs if not keeping them
+                if not args.keep_individual:
+                    cleanup_individual_pdfs(generated_pdfs, logger)
+                else:
+                    logger.debug(f"  Individual PDF files preserved")
+
+            else:
+                logger.error(f"MERGE FAILED: Could not create merged PDF")
+                logger.error("PDF merge operation failed")
+
+        except Exception as e:
+            logger.error(f"PDF merge error: {str(e)}")
+            logger.error(f"MERGE ERROR: {str(e)}")
+        finally:
+            # Clean up any temporary files created by the merger
+            pdf_merger.cleanup_temp_files()
+
+    elif merge_enabled and not generated_pdfs:
+        logger.warning("PDF merge enabled but no PDFs were generated")
+        logger.warning("MERGE SKIPPED: No PDFs available to merge")
+
+    archive_path = None
+    if archive_writer is not None:
+        if archive_writer.close():
+            archive_path = archive_writer.output_path
+            logger.info(
+                f"ARCHIVE: {os.path.basename(archive_path)} "
+                f"({len(archive_writer.questions)} questions)"
+            )
+        else:
+            logger.warning("ARCHIVE SKIPPED: No PDFs were archived")
+
+    if question_index is not None:
+        question_index.close()
+        logger.info(f"Search index updated: {question_index.db_path}")
+
+    if trace_log is not None:
+        trace_log.close()
+        logger.info(f"Question traces written to {args.trace}")
+
+    if optimizer is not None:
+        logger.info(
+            f"Optimization saved {optimizer.bytes_saved} bytes "
+            f"({optimizer.bytes_saved / (1024 * 1024):.2f} MB)"
+        )
+
+    return {
+        "exam": args.exam,
+        "begin": args.begin,
+        "end": args.end,
+        "generated": [num for num, _ in generated_pdfs],
+        "failed": [num for num, _ in pdf_failures],
+        "no_url": failed_questions,
+        "duplicates": duplicate_questions,
+        "timed_out": [num for num, _ in timed_out_questions],
+        "recovered": retried_questions,
+        "merged_files": merged_files,
+        "archive": archive_path,
+        "stopped": stop_event is not None and stop_event.is_set(),
+    }
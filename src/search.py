@@ -1,24 +1,71 @@
+import re
 import time
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from ddgs import DDGS
+from cassette import Cassette, CassetteMissError
 from logger import get_app_logger
+from tracing import KIND_CLIENT, span
+
+# ExamTopics discussion slugs end in "...-topic-<T>-question-<Q>-discussion/"
+SLUG_PATTERN = re.compile(r"topic-(\d+)-question-(\d+)(?:\D|$)", re.IGNORECASE)
+TITLE_PATTERN = re.compile(r"topic\s+(\d+)\s+question\s+#?(\d+)\b", re.IGNORECASE)
+
+# Candidate scores used to rank search hits
+SCORE_SLUG_MATCH = 3
+SCORE_TITLE_MATCH = 2
+SCORE_UNVERIFIED = 1
+
+SEARCH_BACKEND = "google"
+
+
+@dataclass
+class PlanOutcome:
+    """What a query plan found for one question, and what it cost."""
+
+    url: Optional[str] = None
+    # Position of the query that found a verified URL
+    hit: Optional[int] = None
+    # Queries of the plan that were tried, and search requests they made
+    tried: int = 0
+    searches: int = 0
+
+
+def parse_topic(text: str) -> Optional[int]:
+    match = re.search(r"topic[\s-]+(\d+)", text, re.IGNORECASE)
+    return int(match.group(1)) if match else None
 
 
 class SearchEngine:
 
     def __init__(
-        self, max_results: int = 10, retry_attempts: int = 3, retry_delay: float = 1.0
+        self,
+        max_results: int = 10,
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0,
+        cassette: Optional[Cassette] = None,
     ):
         self.max_results = max_results
         self.retry_attempts = retry_attempts
         self.retry_delay = retry_delay
+        self.cassette = cassette
         self.logger = get_app_logger()
 
     def search_question(
-        self, keyword: str, title: str, url_substring: str
+        self,
+        keyword: str,
+        title: str,
+        url_substring: str,
+        question_num: Optional[int] = None,
+        topic: Optional[int] = None,
     ) -> Optional[str]:
+        if question_num is not None:
+            return self._search_verified(
+                keyword, title, url_substring, question_num, topic
+            )
+
         # Construct advanced search query using DuckDuckGo syntax
         search_query = f'site:examtopics.com intitle:{title} "{keyword}"'
 
@@ -44,6 +91,181 @@ class SearchEngine:
             self.logger.error(f"Search failed for query '{search_query}': {str(e)}")
             return None
 
+    def search_plan(
+        self,
+        queries: List[Dict[str, str]],
+        url_substring: str,
+        question_num: int,
+        topic: Optional[int] = None,
+    ) -> PlanOutcome:
+        """Try title/keyword queries in order until one finds a verified URL.
+
+        The most specific search of every query runs before any query is
+        broadened, so a miss on the first query costs one search, not three.
+        """
+        outcome = PlanOutcome()
+        levels = [self._question_queries(query["keyword"], query["title"]) for query in queries]
+        searched = set()
+
+        for level in range(len(levels[0]) if levels else 0):
+            for position, query_searches in enumerate(levels):
+                search_query = query_searches[level]
+                outcome.tried = max(outcome.tried, position + 1)
+                # Queries with the same keyword share their broader searches
+                if search_query in searched:
+                    continue
+                searched.add(search_query)
+
+                outcome.searches += 1
+                url, verified = self._run_query(search_query, url_substring, question_num, topic)
+                if verified:
+                    self.logger.debug(f"Found verified URL with query {position + 1}: {url}")
+                    outcome.url, outcome.hit = url, position
+                    return outcome
+
+                outcome.url = outcome.url or url
+
+        if outcome.url:
+            self.logger.warning(
+                f"Could not verify question {question_num}, using unverified URL: {outcome.url}"
+            )
+        else:
+            self.logger.warning(f"No valid URLs found for question {question_num}")
+
+        return outcome
+
+    def _search_verified(
+        self,
+        keyword: str,
+        title: str,
+        url_substring: str,
+        question_num: int,
+        topic: Optional[int],
+    ) -> Optional[str]:
+        url, verified, _ = self._find_question(
+            keyword, title, url_substring, question_num, topic
+        )
+        if verified:
+            self.logger.debug(f"Found verified URL: {url}")
+        elif url:
+            self.logger.warning(
+                f"Could not verify question {question_num}, using unverified URL: {url}"
+            )
+        else:
+            self.logger.warning(f"No valid URLs found for question {question_num}")
+
+        return url
+
+    def _find_question(
+        self,
+        keyword: str,
+        title: str,
+        url_substring: str,
+        question_num: int,
+        topic: Optional[int],
+    ) -> Tuple[Optional[str], bool, int]:
+        # Returns the best URL, whether it was verified and the number of
+        # searches made
+        fallback_url = None
+        searches = 0
+
+        for search_query in self._question_queries(keyword, title):
+            searches += 1
+            url, verified = self._run_query(search_query, url_substring, question_num, topic)
+            if verified:
+                return url, True, searches
+
+            # Keep an unverifiable candidate in case no query yields a verified one
+            fallback_url = fallback_url or url
+
+        return fallback_url, False, searches
+
+    def _question_queries(self, keyword: str, title: str) -> List[str]:
+        # From most to least specific; a query whose hits are all for other
+        # questions falls through to the next one
+        return [
+            f'site:examtopics.com intitle:{title} "{keyword}"',
+            f'site:examtopics.com "{keyword}"',
+            f"examtopics {keyword}",
+        ]
+
+    def _run_query(
+        self,
+        search_query: str,
+        url_substring: str,
+        question_num: int,
+        topic: Optional[int],
+    ) -> Tuple[Optional[str], bool]:
+        # Returns the best candidate of one search and whether it is verified
+        self.logger.debug(f"Searching with query: {search_query}")
+
+        with span("search.query", **{"search.query": search_query}) as query_span:
+            try:
+                results = self._perform_search(search_query)
+            except Exception as e:
+                self.logger.error(f"Search failed for query '{search_query}': {str(e)}")
+                query_span.error(str(e))
+                return None, False
+
+            ranked = self.rank_urls(results, url_substring, question_num, topic)
+            query_span.set("search.candidates", len(ranked))
+        if not ranked:
+            self.logger.debug(
+                f"No candidate matched question {question_num} for query: {search_query}"
+            )
+            return None, False
+
+        url, score = ranked[0]
+        return url, score > SCORE_UNVERIFIED
+
+    def rank_urls(
+        self,
+        results: List[dict],
+        url_substring: str,
+        question_num: int,
+        topic: Optional[int] = None,
+    ) -> List[Tuple[str, int]]:
+        candidates = []
+
+        for position, result in enumerate(results):
+            url = result.get("href")
+            if not url or not self.validate_url(url, url_substring):
+                continue
+
+            score = self.score_candidate(url, result.get("title", ""), question_num, topic)
+            if score is None:
+                self.logger.debug(
+                    f"URL rejected (not question {question_num}): {url}"
+                )
+                continue
+
+            candidates.append((score, position, url))
+
+        # Best score first; the search engine's order breaks ties
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return [(url, score) for score, _, url in candidates]
+
+    def score_candidate(
+        self, url: str, title: str, question_num: int, topic: Optional[int] = None
+    ) -> Optional[int]:
+        # Returns None when the candidate is known to be another question
+        for pattern, text, score in (
+            (SLUG_PATTERN, urlparse(url).path, SCORE_SLUG_MATCH),
+            (TITLE_PATTERN, title or "", SCORE_TITLE_MATCH),
+        ):
+            match = pattern.search(text)
+            if not match:
+                continue
+
+            found_topic, found_question = int(match.group(1)), int(match.group(2))
+            if found_question != question_num:
+                return None
+            if topic is not None and found_topic != topic:
+                return None
+            return score
+
+        return SCORE_UNVERIFIED
+
     def _perform_search(self, query: str) -> List[dict]:
         last_exception = None
 
@@ -51,18 +273,23 @@ class SearchEngine:
             try:
                 self.logger.debug(f"Search attempt {attempt + 1} for query: {query}")
 
-                results = list(
-                    DDGS().text(
-                        query,
-                        max_results=self.max_results,
-                        safesearch="off",
-                        backend="google",
-                    )
-                )
+                with span(
+                    "search.attempt",
+                    KIND_CLIENT,
+                    **{"search.backend": SEARCH_BACKEND, "retry": attempt},
+                ) as attempt_span:
+                    if self.cassette is not None:
+                        results = self.cassette.search(query, lambda: self._query(query))
+                    else:
+                        results = self._query(query)
+                    attempt_span.set("search.results", len(results))
 
                 self.logger.debug(f"Retrieved {len(results)} search results")
                 return results
 
+            except CassetteMissError:
+                # Retrying cannot make an unrecorded query appear
+                raise
             except Exception as e:
                 last_exception = e
                 self.logger.warning(f"Search attempt {attempt + 1} failed: {str(e)}")
@@ -76,6 +303,16 @@ class SearchEngine:
             f"All {self.retry_attempts} search attempts failed. Last error: {str(last_exception)}"
         )
 
+    def _query(self, query: str) -> List[dict]:
+        return list(
+            DDGS().text(
+                query,
+                max_results=self.max_results,
+                safesearch="off",
+                backend=SEARCH_BACKEND,
+            )
+        )
+
     def get_first_valid_url(
         self, results: List[dict], url_substring: str
     ) -> Optional[str]:
@@ -0,0 +1,99 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from archive import QuestionArchive
+from logger import get_app_logger
+
+SHARD_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse ``i/n`` into a 1-based shard index and a shard count."""
+    match = SHARD_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Shard must look like i/n, got '{text}'")
+
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got '{text}'")
+    return index, count
+
+
+def shard_questions(begin: int, end: int, index: int, count: int) -> List[int]:
+    """Questions of ``begin``..``end`` that belong to shard ``index`` of ``count``.
+
+    Questions are dealt out in turn, so shard sizes differ by at most one and
+    every shard gets a share of the early and the late questions.
+    """
+    return list(range(begin + index - 1, end + 1, count))
+
+
+def question_pdf_pattern(exam: str) -> "re.Pattern[str]":
+    return re.compile(rf"^{re.escape(exam)}_question(\d+)\.pdf$")
+
+
+def question_archive_pattern(exam: str) -> "re.Pattern[str]":
+    return re.compile(rf"^{re.escape(exam)}_questions\d+-\d+(_shard\d+of\d+)?\.zip$")
+
+
+def collect_question_pdfs(
+    directories: Iterable[str],
+    exam: str,
+    begin: Optional[int] = None,
+    end: Optional[int] = None,
+    extract_dir: Optional[str] = None,
+) -> List[Tuple[int, str]]:
+    """Find the question PDFs of an exam in shard output directories.
+
+    Returns (question number, path) pairs ordered by question number. When a
+    question was written to more than one directory, the first one wins.
+    With ``extract_dir``, questions of ``--archive`` runs are also taken from
+    the archives in the directories and extracted there, loose PDFs first.
+    """
+    logger = get_app_logger()
+    pattern = question_pdf_pattern(exam)
+    archive_pattern = question_archive_pattern(exam)
+    found: Dict[int, str] = {}
+
+    def wanted(question_num: int) -> bool:
+        if begin is not None and question_num < begin:
+            return False
+        if end is not None and question_num > end:
+            return False
+        if question_num in found:
+            logger.warning(
+                f"Question {question_num} found more than once, using {found[question_num]}"
+            )
+            return False
+        return True
+
+    for directory in directories:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot read shard directory {directory}: {str(e)}")
+            continue
+
+        for name in names:
+            match = pattern.match(name)
+            if match and wanted(int(match.group(1))):
+                found[int(match.group(1))] = os.path.join(directory, name)
+
+        if extract_dir is None:
+            continue
+
+        for name in names:
+            if not archive_pattern.match(name):
+                continue
+
+            archive_path = os.path.join(directory, name)
+            try:
+                with QuestionArchive(archive_path) as archive:
+                    for question_num in archive.questions():
+                        if wanted(question_num):
+                            found[question_num] = archive.extract(question_num, extract_dir)
+            except Exception as e:
+                logger.warning(f"Cannot read question archive {archive_path}: {str(e)}")
+
+    return sorted(found.items())
@@ -0,0 +1,147 @@
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from logger import get_app_logger
+from pdf_linearizer import PDFLinearizer
+from pdf_optimizer import PDFOptimizer
+from pdf_stream import PDFStreamWriter
+from tracing import Trace, activate, span
+from volumes import VolumeWriter
+
+
+class StreamingMerger:
+    """Merges question PDFs in question order while questions are still finishing.
+
+    Questions can be reported in any order. Arrivals ahead of the next
+    expected question wait in a reorder buffer, and pages are appended as soon
+    as the next expected question is done, either to a single merged file or
+    to a ``VolumeWriter``. Producers must stay within ``window`` questions of
+    the next expected one (see ``accepts``), which bounds the buffer.
+    Appending a question is recorded in the trace ``trace_for`` returns for
+    it, if any.
+    """
+
+    def __init__(
+        self,
+        first_question: int,
+        output_path: Optional[str] = None,
+        volume_writer: Optional[VolumeWriter] = None,
+        window: int = 32,
+        optimizer: Optional[PDFOptimizer] = None,
+        linearizer: Optional[PDFLinearizer] = None,
+        trace_for: Optional[Callable[[int], Optional[Trace]]] = None,
+    ):
+        if (output_path is None) == (volume_writer is None):
+            raise ValueError("Exactly one of output_path or volume_writer is required")
+
+        self.output_path = output_path
+        self.volume_writer = volume_writer
+        self.window = window
+        self.optimizer = optimizer
+        self.linearizer = linearizer
+        self.trace_for = trace_for
+        self.next_question = first_question
+        self.merged_count = 0
+        # (question, first page, page count) of every question in the merged
+        # file; volumes keep their own
+        self.merged_pages: List[Tuple[int, int, int]] = []
+        self.logger = get_app_logger()
+
+        self._pending: Dict[int, str] = {}
+        self._skipped: Set[int] = set()
+        self._writer: Optional[PDFStreamWriter] = None
+        if output_path is not None:
+            self._writer = PDFStreamWriter(f"{output_path}.part")
+            self._writer.open()
+
+    def accepts(self, question_num: int) -> bool:
+        return question_num < self.next_question + self.window
+
+    def add(self, question_num: int, pdf_path: str) -> None:
+        self._check_window(question_num)
+        self._pending[question_num] = pdf_path
+        self._drain()
+
+    def skip(self, question_num: int) -> None:
+        # Failed questions are skipped so later ones are not held back
+        self._check_window(question_num)
+        self._skipped.add(question_num)
+        self._drain()
+
+    def finish(self) -> bool:
+        # Anything still buffered sits behind a question that never reported
+        # back; append it in order rather than dropping it.
+        for question_num in sorted(self._pending):
+            self.logger.warning(
+                f"Merging question {question_num} after missing question {self.next_question}"
+            )
+            self._append(question_num, self._pending.pop(question_num))
+
+        if self.volume_writer is not None:
+            self.volume_writer.finish()
+            return self.merged_count > 0
+
+        if self.merged_count == 0:
+            self.logger.error("No pages were added to the merged PDF")
+            self.abort()
+            return False
+
+        self._writer.close()
+        os.replace(self._writer.output_path, self.output_path)
+        self._writer = None
+
+        if self.optimizer is not None:
+            self.optimizer.optimize_pdf(self.output_path)
+        if self.linearizer is not None:
+            self.linearizer.linearize_pdf(self.output_path)
+
+        self.logger.debug(
+            f"Streaming merge completed: {self.output_path} ({self.merged_count} PDFs)"
+        )
+        return True
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        if self.volume_writer is not None:
+            self.volume_writer.abort()
+
+    def _check_window(self, question_num: int) -> None:
+        if question_num < self.next_question or not self.accepts(question_num):
+            raise ValueError(
+                f"Question {question_num} is outside the reorder window "
+                f"[{self.next_question}, {self.next_question + self.window})"
+            )
+
+    def _drain(self) -> None:
+        while True:
+            if self.next_question in self._pending:
+                self._append(self.next_question, self._pending.pop(self.next_question))
+            elif self.next_question in self._skipped:
+                self._skipped.discard(self.next_question)
+            else:
+                break
+            self.next_question += 1
+
+    def _append(self, question_num: int, pdf_path: str) -> None:
+        trace = self.trace_for(question_num) if self.trace_for is not None else None
+        with activate(trace), span("merge.append") as append_span:
+            if append_span.recording and os.path.exists(pdf_path):
+                append_span.set("pdf.size", os.path.getsize(pdf_path))
+            if self.volume_writer is not None:
+                appended = self.volume_writer.add(question_num, pdf_path)
+            else:
+                first_page = self._writer.page_count + 1
+                try:
+                    page_count = self._writer.append_pdf(pdf_path)
+                    self.merged_pages.append((question_num, first_page, page_count))
+                    appended = True
+                except Exception as e:
+                    self.logger.error(f"Failed to process PDF {pdf_path}: {str(e)}")
+                    append_span.error(str(e))
+                    appended = False
+
+        if appended:
+            self.merged_count += 1
+            self.logger.debug(f"Merged question {question_num} into output")
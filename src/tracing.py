@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "dumps-search"
+
+# OpenTelemetry span kinds and status codes
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_active_trace: ContextVar[Optional["Trace"]] = ContextVar("active_trace", default=None)
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    # OTLP/JSON encodes 64-bit integers as strings
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+class Span:
+    """An open span; attributes set on it are recorded when it ends."""
+
+    def __init__(self, record: Optional[Dict[str, Any]] = None):
+        self.record = record
+
+    @property
+    def recording(self) -> bool:
+        return self.record is not None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.record is not None and value is not None:
+            self.record["attributes"].append(_attribute(key, value))
+
+    def error(self, message: str) -> None:
+        if self.record is not None:
+            self.record["status"] = {"code": STATUS_ERROR, "message": message}
+
+
+class Trace:
+    """Nested spans of one question, kept as OTLP/JSON span objects.
+
+    Spans are plain dicts, so a trace started in a render worker can be sent
+    back with the question's result and continued by the coordinator with
+    ``Trace.resume``.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self.root = self._start(name, KIND_INTERNAL, attributes)
+
+    @classmethod
+    def resume(cls, spans: List[Dict[str, Any]]) -> "Trace":
+        trace = cls.__new__(cls)
+        trace.spans = list(spans)
+        trace.trace_id = spans[0]["traceId"]
+        trace.root = next(span for span in spans if "parentSpanId" not in span)
+        trace._stack = [trace.root]
+        return trace
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Span]:
+        record = self._start(name, kind, attributes)
+        span = Span(record)
+        try:
+            yield span
+        except BaseException as e:
+            span.error(str(e) or type(e).__name__)
+            raise
+        finally:
+            self._end(record)
+
+    def finish(self, **attributes: Any) -> None:
+        span = Span(self.root)
+        for key, value in attributes.items():
+            span.set(key, value)
+        self._end(self.root)
+
+    def _start(self, name: str, kind: int, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        record = {
+            "traceId": self.trace_id,
+            "spanId": os.urandom(8).hex(),
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": str(time.time_ns()),
+            "attributes": [
+                _attribute(key, value) for key, value in attributes.items() if value is not None
+            ],
+            "status": {"code": STATUS_OK},
+        }
+        if self._stack:
+            record["parentSpanId"] = self._stack[-1]["spanId"]
+        self.spans.append(record)
+        self._stack.append(record)
+        return record
+
+    def _end(self, record: Dict[str, Any]) -> None:
+        end = time.time_ns()
+        record["endTimeUnixNano"] = str(end)
+        self._stack = [open_span for open_span in self._stack if open_span is not record]
+
+        # Spans added by the coordinator after a worker ended the trace,
+        # such as merging, stretch the root span
+        if record is not self.root and int(self.root.get("endTimeUnixNano", end)) < end:
+            self.root["endTimeUnixNano"] = str(end)
+
+
+@contextmanager
+def activate(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """Make ``span`` record into ``trace`` for the duration of the block."""
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Span]:
+    """Record a span in the active trace, or do nothing when there is none."""
+    trace = _active_trace.get()
+    if trace is None:
+        yield Span()
+        return
+
+    with trace.span(name, kind, **attributes) as active_span:
+        yield active_span
+
+
+def export_request(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap spans in an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class TraceLog:
+    """Writes question traces to a JSONL file, one OTLP export request per line.
+
+    Traces are held by question until they are complete, since the merge
+    step of a question can come after later questions have finished.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._traces: Dict[int, Trace] = {}
+        self._file = None
+
+    def open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def add(self, question_num: int, spans: List[Dict[str, Any]]) -> Trace:
+        trace = Trace.resume(spans)
+        self._traces[question_num] = trace
+        return trace
+
+    def get(self, question_num: int) -> Optional[Trace]:
+        return self._traces.get(question_num)
+
+    def write(self, question_num: int) -> None:
+        trace = self._traces.pop(question_num, None)
+        if trace is not None:
+            self.write_trace(trace)
+
+    def write_before(self, question_num: int) -> None:
+        for held in sorted(q for q in self._traces if q < question_num):
+            self.write(held)
+
+    def write_trace(self, trace: Trace) -> None:
+        if self._file is not None:
+            self._file.write(json.dumps(export_request(trace.spans)) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        for question_num in sorted(self._traces):
+            self.write(question_num)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
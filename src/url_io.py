@@ -0,0 +1,81 @@
+import csv
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_app_logger
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported URL file format (use .csv or .jsonl): {path}")
+
+
+def load_url_map(path: str, exam: Optional[str] = None) -> Dict[int, str]:
+    """Load question number to URL mappings from a CSV or JSONL file.
+
+    CSV files need ``question`` and ``url`` columns, JSONL lines need
+    ``question`` and ``url`` keys. An optional ``exam`` column or key limits a
+    row to that exam, so one file can hold several exams.
+    """
+    logger = get_app_logger()
+    file_format = _file_format(path)
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            reader = csv.DictReader(f)
+            entries = [(reader.line_num, row) for row in reader]
+        else:
+            entries = [
+                (line_num, line) for line_num, line in enumerate(f, start=1) if line.strip()
+            ]
+
+    url_map: Dict[int, str] = {}
+    for line_num, row in entries:
+        try:
+            if file_format == "jsonl":
+                row = json.loads(row)
+            question_num = int(row["question"])
+            url = row["url"]
+            # Short CSV rows leave missing columns as None
+            if url is None or not str(url).strip():
+                raise ValueError("missing URL")
+            url = str(url).strip()
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Skipping invalid URL entry on line {line_num} of {path}")
+            continue
+
+        if exam and row.get("exam") and row["exam"] != exam:
+            continue
+        url_map[question_num] = url
+
+    logger.debug(f"Loaded {len(url_map)} question URLs from {path}")
+    return url_map
+
+
+def export_urls(path: str, exam: str, urls: List[Tuple[int, str]]) -> None:
+    """Write question number to URL mappings in the format ``load_url_map`` reads."""
+    file_format = _file_format(path)
+
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["exam", "question", "url"])
+            for question_num, url in sorted(urls):
+                writer.writerow([exam, question_num, url])
+        else:
+            for question_num, url in sorted(urls):
+                f.write(
+                    json.dumps({"exam": exam, "question": question_num, "url": url})
+                    + "\n"
+                )
+
+    get_app_logger().debug(f"Exported {len(urls)} question URLs to {path}")
@@ -0,0 +1,130 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_app_logger
+from pdf_linearizer import PDFLinearizer
+from pdf_optimizer import PDFOptimizer
+from pdf_stream import PDFStreamWriter
+
+
+class VolumeWriter:
+    """Splits merged output into volumes that are written while the run goes on.
+
+    Question PDFs are appended in order. A volume is closed as soon as it holds
+    ``questions_per_volume`` questions or would grow past ``max_volume_mb``.
+    Pages are flushed to disk as they are added, so no volume is ever held in
+    memory.
+    """
+
+    def __init__(
+        self,
+        exam: str,
+        output_dir: str,
+        questions_per_volume: Optional[int] = None,
+        max_volume_mb: Optional[float] = None,
+        optimizer: Optional[PDFOptimizer] = None,
+        linearizer: Optional[PDFLinearizer] = None,
+    ):
+        if not questions_per_volume and not max_volume_mb:
+            raise ValueError("A question count or a size limit is required for volumes")
+
+        self.exam = exam
+        self.output_dir = output_dir
+        self.questions_per_volume = questions_per_volume
+        self.max_volume_bytes = max_volume_mb * 1024 * 1024 if max_volume_mb else None
+        self.optimizer = optimizer
+        self.linearizer = linearizer
+        self.logger = get_app_logger()
+
+        # (path, first question, last question) for every finished volume
+        self.volumes: List[Tuple[str, int, int]] = []
+        # (question, first page, page count) of the questions in each volume
+        self.volume_pages: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._writer: Optional[PDFStreamWriter] = None
+        self._questions: List[int] = []
+        self._pages: List[Tuple[int, int, int]] = []
+
+    def add(self, question_num: int, pdf_path: str) -> bool:
+        if self._writer is not None and self._would_overflow(pdf_path):
+            self._finalize_volume()
+
+        if self._writer is None:
+            part_path = os.path.join(
+                self.output_dir, f"{self.exam}_vol{len(self.volumes) + 1}.pdf.part"
+            )
+            self._writer = PDFStreamWriter(part_path)
+            self._writer.open()
+
+        first_page = self._writer.page_count + 1
+        try:
+            page_count = self._writer.append_pdf(pdf_path)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to add question {question_num} to volume: {str(e)}"
+            )
+            return False
+
+        self._questions.append(question_num)
+        self._pages.append((question_num, first_page, page_count))
+        self.logger.debug(
+            f"Added question {question_num} to volume {len(self.volumes) + 1}"
+        )
+
+        if (
+            self.questions_per_volume
+            and len(self._questions) >= self.questions_per_volume
+        ):
+            self._finalize_volume()
+
+        return True
+
+    def finish(self) -> None:
+        if self._writer is not None:
+            self._finalize_volume()
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+            self._questions = []
+            self._pages = []
+
+    def _would_overflow(self, pdf_path: str) -> bool:
+        if self.max_volume_bytes is None:
+            return False
+
+        projected = self._writer.bytes_written + os.path.getsize(pdf_path)
+        return projected > self.max_volume_bytes
+
+    def _finalize_volume(self) -> None:
+        writer = self._writer
+        self._writer = None
+
+        if not self._questions:
+            writer.abort()
+            return
+
+        writer.close()
+
+        first, last = self._questions[0], self._questions[-1]
+        pages = self._pages
+        self._questions = []
+        self._pages = []
+
+        volume_number = len(self.volumes) + 1
+        volume_path = os.path.join(
+            self.output_dir,
+            f"{self.exam}_questions{first}-{last}_vol{volume_number}.pdf",
+        )
+        os.replace(writer.output_path, volume_path)
+
+        if self.optimizer is not None:
+            self.optimizer.optimize_pdf(volume_path)
+        if self.linearizer is not None:
+            self.linearizer.linearize_pdf(volume_path)
+
+        self.volumes.append((volume_path, first, last))
+        self.volume_pages[volume_path] = pages
+        self.logger.info(
+            f"VOLUME READY: {os.path.basename(volume_path)} ({writer.page_count} pages)"
+        )
@@ -0,0 +1,351 @@
+import json
+import os
+import sqlite3
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dedup import DuplicateDetector
+from logger import get_app_logger
+from pipeline import (
+    STATUS_FAILED,
+    STATUS_SUCCESS,
+    QuestionResult,
+    QuestionTask,
+)
+
+STATE_PENDING = "pending"
+STATE_LEASED = "leased"
+STATE_DONE = "done"
+
+
+class WorkQueue:
+    """Durable queue of per-question tasks in a SQLite file.
+
+    Any number of worker processes, on any machine that shares the file, can
+    lease tasks, process them and complete them. A lease that is not renewed
+    in time expires and the task goes to the next worker, so a crashed worker
+    only costs the tasks it held. Tasks are keyed by job and question, which
+    makes submitting the same job again resume it instead of starting over.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = get_app_logger()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Transactions are started explicitly so leasing can take the write
+        # lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                options TEXT NOT NULL,
+                created REAL NOT NULL,
+                finished REAL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                job_id TEXT NOT NULL,
+                question INTEGER NOT NULL,
+                task TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                url TEXT,
+                fingerprint TEXT,
+                PRIMARY KEY (job_id, question)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, lease_expires);
+            """
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def create_job(self, job_id: str, options: Dict[str, Any]) -> None:
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, options, created, finished) VALUES (?, ?, "
+                "COALESCE((SELECT created FROM jobs WHERE id = ?), ?), NULL)",
+                (job_id, json.dumps(options), job_id, time.time()),
+            )
+
+    def finish_job(self, job_id: str) -> None:
+        # The coordinator will submit nothing more for this job
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE jobs SET finished = ? WHERE id = ?", (time.time(), job_id)
+            )
+
+    def job_options(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT options FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def submit(self, job_id: str, task: QuestionTask) -> None:
+        """Add a task, keeping the result of an earlier run of the same attempt."""
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT task, state FROM tasks WHERE job_id = ? AND question = ?",
+                (job_id, task.question),
+            ).fetchone()
+
+            if row is not None:
+                previous = json.loads(row[0])
+                if previous["final_attempt"] or not task.final_attempt:
+                    return
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (job_id, question, task, state, attempts) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (job_id, task.question, json.dumps(asdict(task)), STATE_PENDING),
+            )
+
+    def lease(self, worker_id: str) -> Optional[Tuple[str, QuestionTask]]:
+        """Lease the next pending or expired task, oldest job and question first."""
+        now = time.time()
+        with self._transaction():
+            self._expire_abandoned(now)
+
+            row = self._conn.execute(
+                "SELECT job_id, question, task FROM tasks "
+                "WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY job_id, question LIMIT 1",
+                (STATE_PENDING, STATE_LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, question_num, task = row
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE job_id = ? AND question = ?",
+                (STATE_LEASED, worker_id, now + self.lease_seconds, job_id, question_num),
+            )
+
+        return job_id, QuestionTask(**json.loads(task))
+
+    def renew(self, job_id: str, question_num: int, worker_id: str) -> bool:
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE job_id = ? AND question = ? AND state = ? AND worker = ?",
+                (time.time() + self.lease_seconds, job_id, question_num, STATE_LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: QuestionResult) -> bool:
+        """Store a result, unless the lease was lost to another worker meanwhile."""
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE tasks SET state = ?, result = ?, lease_expires = NULL "
+                "WHERE job_id = ? AND question = ? AND state = ? AND worker = ?",
+                (
+                    STATE_DONE,
+                    json.dumps(asdict(result)),
+                    job_id,
+                    result.question,
+                    STATE_LEASED,
+                    worker_id,
+                ),
+            )
+            if cursor.rowcount == 1 and result.status != STATUS_SUCCESS:
+                self._release_claim(job_id, result.question)
+
+        if cursor.rowcount != 1:
+            self.logger.warning(
+                f"Lease on question {result.question} of {job_id} was lost, dropping result"
+            )
+        return cursor.rowcount == 1
+
+    def results(self, job_id: str, questions: Set[int]) -> List[QuestionResult]:
+        rows = self._conn.execute(
+            "SELECT question, result FROM tasks WHERE job_id = ? AND state = ?",
+            (job_id, STATE_DONE),
+        ).fetchall()
+        return [
+            QuestionResult(**json.loads(result))
+            for question_num, result in rows
+            if question_num in questions
+        ]
+
+    def has_open_tasks(self, job_id: Optional[str] = None) -> bool:
+        sql = "SELECT 1 FROM tasks WHERE state != ?"
+        params: List[Any] = [STATE_DONE]
+        if job_id is not None:
+            sql += " AND job_id = ?"
+            params.append(job_id)
+        return self._conn.execute(sql + " LIMIT 1", params).fetchone() is not None
+
+    def has_open_work(self) -> bool:
+        """Whether any task is open or any coordinator may still submit more."""
+        if self.has_open_tasks():
+            return True
+        return (
+            self._conn.execute("SELECT 1 FROM jobs WHERE finished IS NULL LIMIT 1").fetchone()
+            is not None
+        )
+
+    def check_duplicate(
+        self, job_id: str, question_num: int, url: str, fingerprint: Optional[int]
+    ) -> Optional[int]:
+        """Duplicate check across every worker of a job, see DuplicateDetector."""
+        with self._transaction():
+            detector = DuplicateDetector()
+            for other, other_url, other_fingerprint in self._conn.execute(
+                "SELECT question, url, fingerprint FROM tasks "
+                "WHERE job_id = ? AND question != ? AND url IS NOT NULL",
+                (job_id, question_num),
+            ):
+                detector.add(
+                    other,
+                    other_url,
+                    int(other_fingerprint) if other_fingerprint is not None else None,
+                )
+
+            if fingerprint is None:
+                return detector.find_by_url(url)
+
+            duplicate_of = detector.find_by_fingerprint(fingerprint)
+            if duplicate_of is None:
+                # Claim the page so other workers see it
+                self._conn.execute(
+                    "UPDATE tasks SET url = ?, fingerprint = ? WHERE job_id = ? AND question = ?",
+                    (url, str(fingerprint), job_id, question_num),
+                )
+            return duplicate_of
+
+    def _expire_abandoned(self, now: float) -> None:
+        # Tasks whose workers keep dying are failed instead of retried forever
+        rows = self._conn.execute(
+            "SELECT job_id, question, task FROM tasks "
+            "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+            (STATE_LEASED, now, self.max_attempts),
+        ).fetchall()
+
+        for job_id, question_num, task in rows:
+            result = QuestionResult(
+                question=question_num,
+                status=STATUS_FAILED,
+                url=json.loads(task).get("url"),
+                error=f"lease expired {self.max_attempts} times",
+            )
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, result = ?, lease_expires = NULL "
+                "WHERE job_id = ? AND question = ?",
+                (STATE_DONE, json.dumps(asdict(result)), job_id, question_num),
+            )
+            self._release_claim(job_id, question_num)
+            self.logger.warning(
+                f"Question {question_num} of {job_id} failed after "
+                f"{self.max_attempts} expired leases"
+            )
+
+    def _release_claim(self, job_id: str, question_num: int) -> None:
+        self._conn.execute(
+            "UPDATE tasks SET url = NULL, fingerprint = NULL WHERE job_id = ? AND question = ?",
+            (job_id, question_num),
+        )
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+    def __enter__(self) -> "WorkQueue":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _ImmediateTransaction:
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class QueueDispatcher:
+    """Stands in for a RenderPool and hands questions to queue workers instead.
+
+    ``run_job`` drives it like a local pool, so retries, streaming merges and
+    indexing work the same way, while the questions themselves are processed
+    by ``worker`` processes that share the queue file.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        job_id: str,
+        options: Dict[str, Any],
+        poll_interval: float = 2.0,
+    ):
+        self.queue = queue
+        self.job_id = job_id
+        self.options = options
+        self.poll_interval = poll_interval
+        self.logger = get_app_logger()
+        # Set by run_job; deadlines, memory limits and duplicate checks
+        # happen in the workers
+        self.question_timeout = None
+        self.memory_budget_mb = None
+        self.check_duplicate = None
+        self._outstanding: Set[int] = set()
+
+    def start(self) -> None:
+        self.queue.open()
+        self.queue.create_job(self.job_id, self.options)
+        self.logger.info(f"Queued job {self.job_id} in {self.queue.db_path}")
+
+    @property
+    def busy(self) -> int:
+        return len(self._outstanding)
+
+    def has_capacity(self) -> bool:
+        return True
+
+    def submit(self, task: QuestionTask) -> None:
+        self.queue.submit(self.job_id, task)
+        self._outstanding.add(task.question)
+
+    def poll(self, timeout: Optional[float] = None) -> List[QuestionResult]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._outstanding:
+            results = self.queue.results(self.job_id, self._outstanding)
+            if results:
+                self._outstanding.difference_update(r.question for r in results)
+                return results
+
+            if deadline is None:
+                time.sleep(self.poll_interval)
+            elif time.monotonic() >= deadline:
+                break
+            else:
+                time.sleep(min(self.poll_interval, deadline - time.monotonic()))
+        return []
+
+    def cancel(self) -> None:
+        self._outstanding = set()
+
+    def close(self) -> None:
+        self.queue.finish_job(self.job_id)
+        self.queue.close()
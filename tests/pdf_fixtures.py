@@ -0,0 +1,50 @@
+"""PDF files for tests that need real inputs on disk."""
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+
+def create_pdf(path, page_count=1, label=None, payload_size=0):
+    """Write a PDF whose pages carry an uncompressed content stream.
+
+    Each stream starts with a comment naming its page, ``% <label> page <n>``,
+    followed by ``payload_size`` filler bytes.
+    """
+    writer = PdfWriter()
+    prefix = f"% {label} page" if label is not None else "% page"
+    for page_num in range(page_count):
+        page = writer.add_blank_page(width=200, height=300)
+        content = DecodedStreamObject()
+        data = f"{prefix} {page_num}\n".encode()
+        if payload_size:
+            data += b"%" * payload_size + b"\n"
+        content.set_data(data)
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def create_text_pdf(path, page_texts):
+    """Write a PDF with one line of extractable text per page."""
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=400, height=300)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/Font"): DictionaryObject(
+                    {NameObject("/F1"): writer._add_object(font)}
+                )
+            }
+        )
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 10 100 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as f:
+        writer.write(f)
@@ -0,0 +1,115 @@
+"""Tests for the streaming library API."""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.api import run_range
+from src.pipeline import STATUS_NO_URL, STATUS_SUCCESS, QuestionResult
+
+
+class TestRunRange(unittest.TestCase):
+
+    def test_yields_each_result_before_the_run_ends(self):
+        proceed = threading.Event()
+
+        def fake_run_job(args, config_manager, on_result=None, stop_event=None):
+            on_result(QuestionResult(question=args.begin, status=STATUS_SUCCESS, pdf_path="q.pdf"))
+            # The second question only finishes once the first was consumed
+            self.assertTrue(proceed.wait(5))
+            on_result(QuestionResult(question=args.end, status=STATUS_NO_URL))
+            return {"generated": [args.begin]}
+
+        with patch("src.api.run_job", side_effect=fake_run_job):
+            run = run_range("saa-c03", 1, 2, output="pdfs")
+            self.assertEqual(run.args.output, "pdfs")
+
+            results = []
+            for result in run:
+                results.append(result)
+                proceed.set()
+
+        self.assertEqual([(r.question, r.status) for r in results], [(1, STATUS_SUCCESS), (2, STATUS_NO_URL)])
+        self.assertEqual(run.summary, {"generated": [1]})
+
+    def test_leaving_the_loop_stops_the_run(self):
+        stopped = []
+
+        def fake_run_job(args, config_manager, on_result=None, stop_event=None):
+            question_num = args.begin
+            while not stop_event.wait(0.01):
+                on_result(QuestionResult(question=question_num, status=STATUS_SUCCESS))
+                question_num += 1
+            stopped.append(True)
+            return {}
+
+        with patch("src.api.run_job", side_effect=fake_run_job):
+            for result in run_range("saa-c03", 1, 1000):
+                if result.question == 3:
+                    break
+
+        self.assertEqual(stopped, [True])
+
+    def test_invalid_run_raises(self):
+        with self.assertRaises(ValueError):
+            run_range("saa-c03", 1, 5, bogus=True)
+
+        with patch("src.api.run_job", return_value=None):
+            with self.assertRaises(ValueError):
+                list(run_range("saa-c03", 5, 1))
+
+    def test_async_iteration(self):
+        def fake_run_job(args, config_manager, on_result=None, stop_event=None):
+            for question_num in range(args.begin, args.end + 1):
+                on_result(QuestionResult(question=question_num, status=STATUS_SUCCESS))
+            return {}
+
+        async def collect():
+            return [result.question async for result in run_range("saa-c03", 1, 3)]
+
+        with patch("src.api.run_job", side_effect=fake_run_job):
+            self.assertEqual(asyncio.run(collect()), [1, 2, 3])
+
+    def test_leaving_the_async_loop_stops_the_run(self):
+        processed = []
+        stopped = []
+
+        def fake_run_job(args, config_manager, on_result=None, stop_event=None):
+            question_num = args.begin
+            while not stop_event.wait(0.01):
+                processed.append(question_num)
+                on_result(QuestionResult(question=question_num, status=STATUS_SUCCESS))
+                question_num += 1
+            stopped.append(True)
+            return {}
+
+        async def consume(use_context):
+            run = run_range("saa-c03", 1, 1000)
+            if use_context:
+                async with run:
+                    async for result in run:
+                        if result.question == 3:
+                            break
+            else:
+                async for result in run:
+                    if result.question == 3:
+                        break
+                # The generator is closed once it is dropped after the break
+                await asyncio.sleep(0.1)
+            self.assertFalse(run._thread.is_alive())
+            return len(processed)
+
+        with patch("src.api.run_job", side_effect=fake_run_job):
+            for use_context in (True, False):
+                processed.clear()
+                stopped.clear()
+                processed_when_closed = asyncio.run(consume(use_context))
+
+                self.assertEqual(stopped, [True])
+                self.assertLess(processed_when_closed, 1000)
+                self.assertEqual(len(processed), processed_when_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
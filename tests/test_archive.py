@@ -0,0 +1,101 @@
+"""Tests for storing question PDFs in a zip archive and reading them back."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from pypdf import PdfReader
+
+from src.archive import QuestionArchive, QuestionArchiveWriter
+from tests.pdf_fixtures import create_pdf
+
+
+class TestQuestionArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.temp_dir, "out", "saa-c03_questions1-3.zip")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_archive(self, questions):
+        writer = QuestionArchiveWriter("saa-c03", self.archive_path)
+        writer.open()
+        for question_num in questions:
+            pdf_path = os.path.join(self.temp_dir, f"q{question_num}.pdf")
+            create_pdf(pdf_path, question_num)
+            self.assertTrue(writer.add(question_num, pdf_path))
+        return writer
+
+    def test_archive_is_renamed_on_close(self):
+        writer = self.write_archive([3, 1])
+
+        self.assertTrue(os.path.exists(writer.part_path))
+        self.assertFalse(os.path.exists(self.archive_path))
+
+        self.assertTrue(writer.close())
+        self.assertFalse(os.path.exists(writer.part_path))
+        with zipfile.ZipFile(self.archive_path) as archive:
+            self.assertEqual(
+                archive.namelist(), ["saa-c03_question3.pdf", "saa-c03_question1.pdf"]
+            )
+            self.assertTrue(
+                all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+            )
+
+    def test_read_single_question(self):
+        self.write_archive([1, 2, 3]).close()
+
+        with QuestionArchive(self.archive_path) as archive:
+            self.assertEqual(archive.questions(), [1, 2, 3])
+            self.assertIn(2, archive)
+            self.assertNotIn(4, archive)
+
+            reader = PdfReader(io.BytesIO(archive.read(2)))
+            self.assertEqual(len(reader.pages), 2)
+
+            with self.assertRaises(KeyError):
+                archive.read(4)
+
+    def test_extract_single_question(self):
+        self.write_archive([1, 2, 3]).close()
+
+        with QuestionArchive(self.archive_path) as archive:
+            path = archive.extract(3, os.path.join(self.temp_dir, "extracted"))
+
+        self.assertEqual(os.path.basename(path), "saa-c03_question3.pdf")
+        self.assertEqual(len(PdfReader(path).pages), 3)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["saa-c03_question3.pdf"])
+
+    def test_duplicate_and_missing_questions_are_rejected(self):
+        writer = self.write_archive([1])
+
+        self.assertFalse(writer.add(1, os.path.join(self.temp_dir, "q1.pdf")))
+        self.assertFalse(writer.add(2, os.path.join(self.temp_dir, "missing.pdf")))
+        writer.close()
+
+        with QuestionArchive(self.archive_path) as archive:
+            self.assertEqual(archive.questions(), [1])
+
+    def test_empty_archive_is_not_kept(self):
+        writer = QuestionArchiveWriter("saa-c03", self.archive_path)
+        writer.open()
+
+        self.assertFalse(writer.close())
+        self.assertFalse(os.path.exists(writer.part_path))
+        self.assertFalse(os.path.exists(self.archive_path))
+
+    def test_abort_removes_partial_archive(self):
+        writer = self.write_archive([1])
+        writer.abort()
+
+        self.assertFalse(os.path.exists(writer.part_path))
+        self.assertFalse(os.path.exists(self.archive_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
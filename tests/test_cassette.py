@@ -0,0 +1,124 @@
+"""Tests for recording and replaying searches and fetches."""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from urllib.error import HTTPError
+
+from src.cassette import (
+    MODE_RECORD,
+    MODE_REPLAY,
+    Cassette,
+    CassetteMissError,
+)
+from src.search import SearchEngine
+
+RESULTS = [{"href": "https://www.examtopics.com/discussions/1/", "title": "Question #1"}]
+
+
+def _fail():
+    raise AssertionError("replay must not perform the request")
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+        self.recorder = Cassette(self.directory, MODE_RECORD)
+        self.player = Cassette(self.directory, MODE_REPLAY)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_replays_recorded_search(self):
+        self.assertEqual(self.recorder.search("query", lambda: RESULTS), RESULTS)
+
+        self.assertEqual(self.player.search("query", _fail), RESULTS)
+
+    def test_replays_recorded_fetch(self):
+        response = ("https://a/final", b"\x89PNG body", {"Content-Type": "image/png"}, 200)
+        self.recorder.fetch("https://a/", lambda: response)
+
+        final_url, body, headers, status = self.player.fetch("https://a/", _fail)
+
+        self.assertEqual(final_url, "https://a/final")
+        self.assertEqual(body, b"\x89PNG body")
+        self.assertEqual(headers, {"Content-Type": "image/png"})
+        self.assertEqual(status, 200)
+
+    def test_replays_recorded_errors(self):
+        def not_found():
+            raise HTTPError("https://a/missing", 503, "Service Unavailable", None, None)
+
+        with self.assertRaises(HTTPError):
+            self.recorder.fetch("https://a/missing", not_found)
+
+        with self.assertRaises(HTTPError) as raised:
+            self.player.fetch("https://a/missing", _fail)
+        self.assertEqual(raised.exception.code, 503)
+
+    def test_replays_outcomes_in_recorded_order(self):
+        def unavailable():
+            raise HTTPError("https://a/flaky", 503, "Service Unavailable", None, None)
+
+        with self.assertRaises(HTTPError):
+            self.recorder.fetch("https://a/flaky", unavailable)
+        self.recorder.fetch("https://a/flaky", lambda: ("https://a/flaky", b"ok", {}, 200))
+
+        with self.assertRaises(HTTPError):
+            self.player.fetch("https://a/flaky", _fail)
+        self.assertEqual(self.player.fetch("https://a/flaky", _fail)[1], b"ok")
+        self.assertEqual(self.player.fetch("https://a/flaky", _fail)[1], b"ok")
+
+    def test_concurrent_recorders_keep_every_outcome(self):
+        other = Cassette(self.directory, MODE_RECORD)
+        self.recorder.search("query", lambda: [])
+        other.search("query", lambda: RESULTS)
+
+        self.assertEqual(self.player.search("query", _fail), [])
+        self.assertEqual(self.player.search("query", _fail), RESULTS)
+
+    def test_unrecorded_request_is_a_miss(self):
+        with self.assertRaises(CassetteMissError):
+            self.player.search("never recorded", _fail)
+
+    def test_replay_latency_follows_recording(self):
+        def slow_search():
+            time.sleep(0.1)
+            return RESULTS
+
+        self.recorder.search("slow", slow_search)
+        player = Cassette(self.directory, MODE_REPLAY, latency_scale=1.0)
+
+        started = time.monotonic()
+        player.search("slow", _fail)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+        started = time.monotonic()
+        self.player.search("slow", _fail)
+        self.assertLess(time.monotonic() - started, 0.1)
+
+    def test_replay_needs_existing_directory(self):
+        with self.assertRaises(ValueError):
+            Cassette(os.path.join(self.directory, "missing"), MODE_REPLAY)
+
+
+class TestSearchEngineCassette(unittest.TestCase):
+
+    def test_search_replays_without_network(self):
+        with tempfile.TemporaryDirectory() as directory:
+            recorder = SearchEngine(cassette=Cassette(directory, MODE_RECORD))
+            with patch.object(recorder, "_query", return_value=RESULTS):
+                self.assertEqual(recorder.get_search_results("q"), RESULTS)
+
+            player = SearchEngine(cassette=Cassette(directory, MODE_REPLAY), retry_delay=0)
+            with patch("src.search.DDGS", side_effect=AssertionError("network used")):
+                self.assertEqual(player.get_search_results("q"), RESULTS)
+                self.assertEqual(player.get_search_results("other"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
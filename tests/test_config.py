@@ -190,3 +190,148 @@ class TestConfigManager:
             
         finally:
             os.unlink(temp_config_path)
+
+    def test_page_rules_exam_overrides_default(self):
+        """Test that exam page rules take precedence over the shared default."""
+        config_data = {
+            "site": "https://www.examtopics.com",
+            "page_rules": {"start": {"selector": ".question-body"}, "max_pages": 3},
+            "exams": [
+                {
+                    "exam": "saa-c03",
+                    "title": "SAA-C03 #QUESTION",
+                    "keyword": "saa keyword #QUESTION",
+                    "url_substring": "saa-c03-url"
+                },
+                {
+                    "exam": "dva-c01",
+                    "title": "DVA-C01 #QUESTION",
+                    "keyword": "dva keyword #QUESTION",
+                    "url_substring": "dva-c01-url",
+                    "page_rules": {"start": {"text": "Question #"}}
+                }
+            ]
+        }
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(config_data, f)
+            temp_config_path = f.name
+
+        try:
+            config_manager = ConfigManager(temp_config_path)
+            config_manager.load_config()
+
+            assert config_manager.get_page_rules("saa-c03")["max_pages"] == 3
+            assert config_manager.get_page_rules("dva-c01") == {"start": {"text": "Question #"}}
+
+        finally:
+            os.unlink(temp_config_path)
+
+    def test_invalid_page_rules(self):
+        """Test validation of malformed page rules."""
+        config_data = {
+            "site": "https://www.examtopics.com",
+            "exams": [
+                {
+                    "exam": "saa-c03",
+                    "title": "SAA-C03 #QUESTION",
+                    "keyword": "saa keyword #QUESTION",
+                    "url_substring": "saa-c03-url",
+                    "page_rules": {"end": {"selector": ".discussion-container"}}
+                }
+            ]
+        }
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(config_data, f)
+            temp_config_path = f.name
+
+        try:
+            config_manager = ConfigManager(temp_config_path)
+            with pytest.raises(ValueError, match="Invalid page_rules in exam 0"):
+                config_manager.load_config()
+
+        finally:
+            os.unlink(temp_config_path)
+
+    def test_image_policy_exam_overrides_default(self):
+        """Test image policy validation and per-exam override."""
+        config_data = {
+            "site": "https://www.examtopics.com",
+            "image_policy": {"max_pixels": 1600},
+            "exams": [
+                {
+                    "exam": "saa-c03",
+                    "title": "SAA-C03 #QUESTION",
+                    "keyword": "saa keyword #QUESTION",
+                    "url_substring": "saa-c03-url"
+                },
+                {
+                    "exam": "az-104",
+                    "title": "AZ-104 #QUESTION",
+                    "keyword": "az keyword #QUESTION",
+                    "url_substring": "az-104-url",
+                    "image_policy": {"max_dpi": 120, "jpeg_quality": 70}
+                }
+            ]
+        }
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(config_data, f)
+            temp_config_path = f.name
+
+        try:
+            config_manager = ConfigManager(temp_config_path)
+            config_manager.load_config()
+
+            assert config_manager.get_image_policy("saa-c03") == {"max_pixels": 1600}
+            assert config_manager.get_image_policy("az-104")["jpeg_quality"] == 70
+
+            config_data["exams"][1]["image_policy"] = {"jpeg_quality": 0}
+            with open(temp_config_path, 'w') as f:
+                json.dump(config_data, f)
+            with pytest.raises(ValueError, match="Invalid image_policy in exam 1"):
+                config_manager.load_config()
+
+        finally:
+            os.unlink(temp_config_path)
+
+    def test_query_templates(self):
+        """Test that extra queries follow the exam's own title and keyword."""
+        config_data = {
+            "site": "https://www.examtopics.com",
+            "exams": [
+                {
+                    "exam": "saa-c03",
+                    "title": "SAA-C03 #QUESTION",
+                    "keyword": "saa keyword #QUESTION",
+                    "url_substring": "saa-c03-url",
+                    "queries": [
+                        {"title": "SAA-C03 #QUESTION", "keyword": "saa keyword #QUESTION"},
+                        {"title": "Exam SAA-C03 #QUESTION", "keyword": "SAA-C03 #QUESTION"}
+                    ]
+                }
+            ]
+        }
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(config_data, f)
+            temp_config_path = f.name
+
+        try:
+            config_manager = ConfigManager(temp_config_path)
+            config_manager.load_config()
+
+            assert config_manager.get_query_templates("saa-c03") == [
+                {"title": "SAA-C03 #QUESTION", "keyword": "saa keyword #QUESTION"},
+                {"title": "Exam SAA-C03 #QUESTION", "keyword": "SAA-C03 #QUESTION"},
+            ]
+
+            config_data["exams"][0]["queries"] = [{"title": "SAA-C03 #QUESTION"}]
+            with open(temp_config_path, 'w') as f:
+                json.dump(config_data, f)
+            with pytest.raises(ValueError, match="Query field 'keyword'"):
+                config_manager.load_config()
+
+        finally:
+            os.unlink(temp_config_path)
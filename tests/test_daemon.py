@@ -0,0 +1,158 @@
+"""Tests for the daemon job API."""
+
+import json
+import threading
+import time
+import unittest
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+from src.daemon import JobDaemon
+from src.pipeline import STATUS_SUCCESS, QuestionResult
+
+
+class TestParseJob(unittest.TestCase):
+
+    def setUp(self):
+        self.daemon = JobDaemon("settings.json")
+
+    def test_builds_run_arguments_with_defaults(self):
+        args = self.daemon.parse_job({"exam": "saa-c03", "begin": 1, "end": 5})
+
+        self.assertEqual((args.exam, args.begin, args.end), ("saa-c03", 1, 5))
+        self.assertEqual(args.config, "settings.json")
+        self.assertEqual(args.workers, 1)
+
+    def test_applies_options(self):
+        args = self.daemon.parse_job(
+            {
+                "exam": "saa-c03",
+                "begin": 1,
+                "end": 5,
+                "options": {"no-merge": True, "question_timeout": 30},
+            }
+        )
+
+        self.assertTrue(args.no_merge)
+        self.assertEqual(args.question_timeout, 30)
+
+    def test_options_are_parsed_like_the_command_line(self):
+        args = self.daemon.parse_job(
+            {
+                "exam": "saa-c03",
+                "begin": 1,
+                "end": 5,
+                "options": {"shard": "2/4", "workers": "4", "--keep-individual": False},
+            }
+        )
+
+        self.assertEqual(args.shard, (2, 4))
+        self.assertEqual(args.workers, 4)
+        self.assertFalse(args.keep_individual)
+
+    def test_rejects_invalid_options(self):
+        for options in (
+            {"shard": "5/4"},
+            {"workers": "four"},
+            {"record": "cassette", "replay": "cassette"},
+            {"no-merge": "yes"},
+            {"help": True},
+        ):
+            with self.subTest(options=options):
+                with self.assertRaises(ValueError):
+                    self.daemon.parse_job(
+                        {"exam": "saa-c03", "begin": 1, "end": 5, "options": options}
+                    )
+
+    def test_rejects_invalid_jobs(self):
+        with self.assertRaises(ValueError):
+            self.daemon.parse_job({"exam": "saa-c03", "begin": 1})
+        with self.assertRaises(ValueError):
+            self.daemon.parse_job({"exam": "saa-c03", "begin": "x", "end": 5})
+        with self.assertRaises(ValueError):
+            self.daemon.parse_job(
+                {"exam": "saa-c03", "begin": 1, "end": 5, "options": {"bogus": 1}}
+            )
+
+
+class TestPools(unittest.TestCase):
+
+    def setUp(self):
+        self.daemon = JobDaemon("settings.json", max_pools=2)
+
+    def _args(self, **options):
+        return self.daemon.parse_job({"exam": "saa-c03", "begin": 1, "end": 5, "options": options})
+
+    def test_least_recently_used_pool_is_closed(self):
+        with patch("src.daemon.create_render_pool", side_effect=lambda *a: MagicMock()):
+            one = self.daemon._pool_for(self._args(workers=1), "info")
+            two = self.daemon._pool_for(self._args(workers=2), "info")
+            self.assertIs(self.daemon._pool_for(self._args(workers=1), "info"), one)
+
+            three = self.daemon._pool_for(self._args(workers=3), "info")
+
+        two.close.assert_called_once_with()
+        one.close.assert_not_called()
+        self.assertEqual(list(self.daemon._pools.values()), [one, three])
+
+    def test_queue_jobs_get_their_own_dispatcher(self):
+        with patch("src.daemon.create_render_pool") as create_render_pool:
+            self.assertIsNone(self.daemon._pool_for(self._args(queue="q.sqlite"), "info"))
+
+        create_render_pool.assert_not_called()
+        self.assertEqual(len(self.daemon._pools), 0)
+
+
+class TestJobAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.daemon = JobDaemon("settings.json", port=0)
+        self.thread = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+        self.thread.start()
+        while self.daemon._server is None:
+            time.sleep(0.01)
+        self.base_url = "http://127.0.0.1:%d" % self.daemon._server.server_address[1]
+
+    def tearDown(self):
+        self.daemon._server.shutdown()
+        self.daemon.close()
+
+    def _post(self, body):
+        request = urllib.request.Request(
+            self.base_url + "/jobs",
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        return urllib.request.urlopen(request)
+
+    def test_health(self):
+        with urllib.request.urlopen(self.base_url + "/health") as response:
+            self.assertEqual(json.load(response), {"status": "ok", "busy": False})
+
+    def test_streams_question_results_and_summary(self):
+        def fake_run_job(args, config_manager, render_pool=None, on_result=None):
+            for question_num in range(args.begin, args.end + 1):
+                on_result(QuestionResult(question=question_num, status=STATUS_SUCCESS))
+            return {"generated": list(range(args.begin, args.end + 1))}
+
+        with patch("src.daemon.ConfigManager"), patch(
+            "src.daemon.run_job", side_effect=fake_run_job
+        ), patch.object(JobDaemon, "_pool_for"):
+            with self._post({"exam": "saa-c03", "begin": 1, "end": 2}) as response:
+                events = [json.loads(line) for line in response]
+
+        self.assertEqual(
+            [event["event"] for event in events],
+            ["started", "question", "question", "finished"],
+        )
+        self.assertEqual(events[1]["question"], 1)
+        self.assertEqual(events[-1]["summary"], {"generated": [1, 2]})
+
+    def test_bad_request(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._post({"exam": "saa-c03"})
+        self.assertEqual(context.exception.code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for duplicate page detection."""
+
+import unittest
+
+from src.dedup import DuplicateDetector, simhash
+
+
+QUESTION_TEXT = (
+    "A company needs to store objects so that they cannot be deleted or "
+    "overwritten for a fixed amount of time. Which S3 feature meets these "
+    "requirements with the least operational overhead? A. S3 Object Lock "
+    "B. S3 Versioning C. S3 Glacier Vault Lock D. S3 Lifecycle rules"
+)
+
+
+def _page(question_text, comments="", nav="Home Exams Forum"):
+    return (
+        f"<html><head><title>Q</title><script>var x = 1;</script></head>"
+        f"<body><nav>{nav}</nav><div class='card question-body'>"
+        f"<p>{question_text}</p></div><div class='comments'>{comments}</div>"
+        f"</body></html>"
+    )
+
+
+class TestDuplicateDetector(unittest.TestCase):
+    """Test cases for DuplicateDetector."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.detector = DuplicateDetector()
+
+    def test_exact_url_duplicate(self):
+        """Test that the same URL is detected regardless of fragment and slash."""
+        self.detector.add(5, "https://www.examtopics.com/discussions/amazon/view/1-exam/")
+
+        self.assertEqual(
+            self.detector.find_by_url(
+                "https://www.examtopics.com/discussions/amazon/view/1-exam#comments"
+            ),
+            5,
+        )
+        self.assertIsNone(
+            self.detector.find_by_url("https://www.examtopics.com/discussions/amazon/view/2-exam/")
+        )
+
+    def test_near_duplicate_content(self):
+        """Test that mirrored pages with the same question text are matched."""
+        original = self.detector.fingerprint(_page(QUESTION_TEXT, "Selected Answer: A"))
+        self.detector.add(10, "https://example.com/a", original)
+
+        mirror = self.detector.fingerprint(
+            _page(QUESTION_TEXT, "Totally different comments", nav="Mirror site menu")
+        )
+
+        self.assertEqual(self.detector.find_by_fingerprint(mirror), 10)
+
+    def test_void_tags_do_not_leak_comments_into_question(self):
+        """Test that <br> and <img> in the question do not pull in the comments."""
+        question = QUESTION_TEXT.replace("time. ", "time.<br>").replace(
+            "overhead? ", "overhead?<img src='diagram.png'><hr/>"
+        )
+        original = self.detector.fingerprint(
+            _page(question, "Selected Answer: A, Object Lock is the only option " * 20)
+        )
+        self.detector.add(10, "https://example.com/a", original)
+
+        mirror = self.detector.fingerprint(
+            _page(
+                question,
+                "Totally different discussion about Glacier vault policies " * 20,
+                nav="Mirror site menu",
+            )
+        )
+
+        self.assertEqual(mirror, original)
+        self.assertEqual(self.detector.find_by_fingerprint(mirror), 10)
+
+    def test_different_question_is_not_a_duplicate(self):
+        """Test that pages with different questions are not matched."""
+        original = self.detector.fingerprint(_page(QUESTION_TEXT))
+        self.detector.add(10, "https://example.com/a", original)
+
+        other = self.detector.fingerprint(
+            _page(
+                "A solutions architect must design a highly available web "
+                "application on EC2 instances behind an Application Load "
+                "Balancer across multiple Availability Zones."
+            )
+        )
+
+        self.assertIsNone(self.detector.find_by_fingerprint(other))
+
+    def test_simhash_is_stable(self):
+        """Test that identical text always produces the same fingerprint."""
+        self.assertEqual(simhash(QUESTION_TEXT), simhash(QUESTION_TEXT))
+        self.assertNotEqual(simhash(QUESTION_TEXT), simhash("something else entirely"))
+
+    def test_removed_question_is_forgotten(self):
+        """Test that a removed question no longer matches by URL or content."""
+        fingerprint = self.detector.fingerprint(_page(QUESTION_TEXT))
+        self.detector.add(10, "https://example.com/a", fingerprint)
+
+        self.detector.remove(10)
+
+        self.assertIsNone(self.detector.find_by_url("https://example.com/a"))
+        self.assertIsNone(self.detector.find_by_fingerprint(fingerprint))
+
+    def test_max_distance_must_fit_bands(self):
+        """Test that distances the band index cannot guarantee are rejected."""
+        with self.assertRaises(ValueError):
+            DuplicateDetector(max_distance=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
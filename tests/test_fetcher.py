@@ -0,0 +1,181 @@
+"""Tests for the retrying, caching URL fetcher."""
+
+import io
+import os
+import socket
+import tempfile
+import unittest
+from unittest.mock import patch
+from urllib.error import HTTPError, URLError
+
+from PIL import Image
+from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+from src.cassette import MODE_RECORD, MODE_REPLAY, Cassette
+from src.fetcher import CachingURLFetcher, is_transient_error
+from src.image_policy import TRANSPARENT_GIF, ImagePolicy
+
+
+def _response(url, body=b"body"):
+    return URLFetcherResponse(url, body, status=200)
+
+
+class TestIsTransientError(unittest.TestCase):
+
+    def test_timeouts_and_connection_errors_are_transient(self):
+        self.assertTrue(is_transient_error(socket.timeout("timed out")))
+        self.assertTrue(is_transient_error(URLError("connection reset")))
+        self.assertTrue(is_transient_error(ConnectionResetError()))
+
+    def test_server_errors_are_transient_but_client_errors_are_not(self):
+        self.assertTrue(is_transient_error(HTTPError("u", 503, "unavailable", {}, None)))
+        self.assertTrue(is_transient_error(HTTPError("u", 429, "too many", {}, None)))
+        self.assertFalse(is_transient_error(HTTPError("u", 404, "not found", {}, None)))
+        self.assertFalse(is_transient_error(ValueError("bad url")))
+
+
+class TestCachingURLFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = CachingURLFetcher(retries=2, backoff=0)
+
+    def test_retries_transient_errors(self):
+        url = "https://example.com/image.png"
+        with patch.object(
+            URLFetcher,
+            "fetch",
+            side_effect=[socket.timeout("timed out"), _response(url)],
+        ) as mock_fetch:
+            response = self.fetcher.fetch(url)
+
+        self.assertEqual(response.read(), b"body")
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(self.fetcher.failures, [])
+
+    def test_records_failure_after_last_retry(self):
+        url = "https://example.com/image.png"
+        with patch.object(
+            URLFetcher, "fetch", side_effect=socket.timeout("timed out")
+        ) as mock_fetch:
+            with self.assertRaises(socket.timeout):
+                self.fetcher.fetch(url)
+
+        self.assertEqual(mock_fetch.call_count, 3)
+        self.assertEqual([failed for failed, _ in self.fetcher.failures], [url])
+
+    def test_does_not_retry_permanent_errors(self):
+        url = "https://example.com/missing.png"
+        with patch.object(
+            URLFetcher,
+            "fetch",
+            side_effect=HTTPError(url, 404, "not found", {}, None),
+        ) as mock_fetch:
+            with self.assertRaises(HTTPError):
+                self.fetcher.fetch(url)
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(self.fetcher.failures, [])
+
+    def test_serves_repeated_fetches_from_cache(self):
+        url = "https://example.com/style.css"
+        with patch.object(URLFetcher, "fetch", return_value=_response(url)) as mock_fetch:
+            first = self.fetcher.fetch(url).read()
+            second = self.fetcher.fetch(url).read()
+
+        self.assertEqual(first, second)
+        mock_fetch.assert_called_once()
+
+    def test_evicts_least_recently_used_entries(self):
+        fetcher = CachingURLFetcher(cache_size_mb=10 / (1024 * 1024))
+        with patch.object(
+            URLFetcher, "fetch", side_effect=lambda url, headers=None: _response(url, b"x" * 6)
+        ) as mock_fetch:
+            fetcher.fetch("https://example.com/a")
+            fetcher.fetch("https://example.com/b")
+            fetcher.fetch("https://example.com/a")
+
+        self.assertEqual(mock_fetch.call_count, 3)
+
+
+
+class TestCachingURLFetcherCassette(unittest.TestCase):
+
+    def test_replays_recorded_downloads_offline(self):
+        url = "https://example.com/page"
+        with tempfile.TemporaryDirectory() as directory:
+            recorder = CachingURLFetcher(cassette=Cassette(directory, MODE_RECORD))
+            with patch.object(URLFetcher, "fetch", return_value=_response(url, b"page")):
+                recorder.fetch(url)
+
+            player = CachingURLFetcher(cassette=Cassette(directory, MODE_REPLAY))
+            with patch.object(
+                URLFetcher, "fetch", side_effect=AssertionError("network used")
+            ):
+                self.assertEqual(player.fetch(url).read(), b"page")
+
+
+
+class TestFontCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.font_cache_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fonts_are_served_from_disk_in_later_runs(self):
+        url = "https://fonts.example.com/roboto.woff2"
+        first = CachingURLFetcher(font_cache_dir=self.font_cache_dir)
+        with patch.object(URLFetcher, "fetch", return_value=_response(url, b"wOF2 font")):
+            first.fetch(url)
+
+        second = CachingURLFetcher(font_cache_dir=self.font_cache_dir)
+        with patch.object(
+            URLFetcher, "fetch", side_effect=AssertionError("network used")
+        ):
+            self.assertEqual(second.fetch(url).read(), b"wOF2 font")
+
+    def test_fonts_are_recognized_by_content_type(self):
+        url = "https://fonts.example.com/css?family=Roboto&v=2"
+        response = URLFetcherResponse(url, b"font", {"Content-Type": "font/woff2"})
+        fetcher = CachingURLFetcher(font_cache_dir=self.font_cache_dir)
+        with patch.object(URLFetcher, "fetch", return_value=response):
+            fetcher.fetch(url)
+
+        self.assertEqual(len(os.listdir(self.font_cache_dir)), 1)
+
+    def test_other_resources_are_not_kept_on_disk(self):
+        url = "https://example.com/image.png"
+        fetcher = CachingURLFetcher(font_cache_dir=self.font_cache_dir)
+        with patch.object(URLFetcher, "fetch", return_value=_response(url)):
+            fetcher.fetch(url)
+
+        self.assertEqual(os.listdir(self.font_cache_dir), [])
+
+
+
+class TestImagePolicyInFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = CachingURLFetcher()
+        self.fetcher.image_policy = ImagePolicy(drop_decorative=True)
+
+    def test_policy_applies_to_images_but_cache_keeps_original(self):
+        url = "https://example.com/icon.png"
+        buffer = io.BytesIO()
+        Image.new("RGB", (16, 16)).save(buffer, format="PNG")
+        with patch.object(URLFetcher, "fetch", return_value=_response(url, buffer.getvalue())):
+            self.assertEqual(self.fetcher.fetch(url).read(), TRANSPARENT_GIF)
+
+        self.fetcher.image_policy = None
+        self.assertEqual(self.fetcher.fetch(url).read(), buffer.getvalue())
+
+    def test_policy_ignores_pages(self):
+        url = "https://example.com/page.html"
+        with patch.object(URLFetcher, "fetch", return_value=_response(url, b"<html>")):
+            self.assertEqual(self.fetcher.fetch(url).read(), b"<html>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for the pre-layout image policy."""
+
+import io
+import unittest
+
+from PIL import Image
+
+from src.image_policy import (
+    PAGE_WIDTH_INCHES,
+    TRANSPARENT_GIF,
+    ImagePolicy,
+    validate_image_policy,
+)
+
+
+def _image_bytes(size, image_format="PNG", mode="RGB"):
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert(mode).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def _open(body):
+    return Image.open(io.BytesIO(body))
+
+
+class TestImagePolicy(unittest.TestCase):
+
+    def test_downscales_to_max_pixels_keeping_format(self):
+        body, mime_type = ImagePolicy(max_pixels=400).apply(_image_bytes((1600, 800)))
+
+        image = _open(body)
+        self.assertEqual(image.size, (400, 200))
+        self.assertEqual(image.format, "PNG")
+        self.assertEqual(mime_type, "image/png")
+
+    def test_dpi_limit_is_measured_across_page_width(self):
+        body, _ = ImagePolicy(max_dpi=50).apply(_image_bytes((1600, 800)))
+
+        self.assertEqual(max(_open(body).size), int(50 * PAGE_WIDTH_INCHES))
+
+    def test_converts_to_jpeg(self):
+        original = _image_bytes((300, 300), mode="RGBA")
+
+        body, mime_type = ImagePolicy(jpeg_quality=60).apply(original)
+
+        self.assertEqual(_open(body).format, "JPEG")
+        self.assertEqual(mime_type, "image/jpeg")
+        self.assertLess(len(body), len(original))
+
+    def test_drops_decorative_images(self):
+        policy = ImagePolicy(drop_decorative=True, decorative_max_pixels=32)
+
+        self.assertEqual(policy.apply(_image_bytes((24, 24))), (TRANSPARENT_GIF, "image/gif"))
+        self.assertNotEqual(policy.apply(_image_bytes((64, 64)))[0], TRANSPARENT_GIF)
+
+    def test_leaves_small_images_alone(self):
+        original = _image_bytes((200, 100), image_format="JPEG")
+
+        body, mime_type = ImagePolicy(max_pixels=400, jpeg_quality=60).apply(original)
+
+        self.assertIs(body, original)
+        self.assertIsNone(mime_type)
+
+    def test_from_dict_ignores_unset_fields(self):
+        policy = ImagePolicy.from_dict({"max_pixels": 800, "jpeg_quality": None})
+
+        self.assertEqual(policy, ImagePolicy(max_pixels=800))
+
+
+class TestValidateImagePolicy(unittest.TestCase):
+
+    def test_accepts_valid_policy(self):
+        validate_image_policy(
+            {"max_pixels": 1600, "max_dpi": 150.0, "jpeg_quality": 75, "drop_decorative": True}
+        )
+
+    def test_rejects_invalid_policy(self):
+        invalid = [
+            [],
+            {"max_size": 100},
+            {"max_pixels": 0},
+            {"max_pixels": "100"},
+            {"jpeg_quality": 101},
+            {"drop_decorative": "yes"},
+            {"max_pixels": True},
+        ]
+        for policy in invalid:
+            with self.assertRaises(ValueError, msg=policy):
+                validate_image_policy(policy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Tests for the local full-text question index."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.indexer import QuestionIndex
+from tests.pdf_fixtures import create_text_pdf
+
+
+class TestQuestionIndex(unittest.TestCase):
+    """Test cases for QuestionIndex."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = QuestionIndex(os.path.join(self.temp_dir, "index.sqlite"))
+        self.index.open()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.index.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _index_question(self, question_num, page_texts, exam="saa-c03"):
+        path = os.path.join(self.temp_dir, f"{exam}_question{question_num}.pdf")
+        create_text_pdf(path, page_texts)
+        return self.index.index_pdf(exam, question_num, path)
+
+    def test_search_returns_ranked_questions_and_pages(self):
+        """Test that matching questions are returned with the matching pages."""
+        self._index_question(1, ["Configure an S3 bucket policy", "Answer B"])
+        self._index_question(2, ["Enable S3 Object Lock on the bucket", "S3 Object Lock retention"])
+        self._index_question(3, ["Launch an EC2 instance"])
+
+        results = self.index.search("S3 Object Lock")
+
+        self.assertEqual([result["question"] for result in results], [2])
+        self.assertEqual(sorted(results[0]["pages"]), [1, 2])
+        self.assertTrue(results[0]["pdf_path"].endswith("saa-c03_question2.pdf"))
+
+    def test_search_filters_by_exam(self):
+        """Test that results can be limited to one exam."""
+        self._index_question(1, ["Storage account redundancy"], exam="az-104-1")
+        self._index_question(1, ["Storage gateway"], exam="saa-c03")
+
+        results = self.index.search("storage", exam="az-104-1")
+
+        self.assertEqual([(r["exam"], r["question"]) for r in results], [("az-104-1", 1)])
+
+    def test_reindexing_replaces_previous_text(self):
+        """Test that indexing a question again replaces its old text."""
+        self._index_question(1, ["Old wording"])
+        self._index_question(1, ["New wording"])
+
+        self.assertEqual(self.index.search("old"), [])
+        self.assertEqual(len(self.index.search("new")), 1)
+
+    def test_record_merged_file_offsets_pages(self):
+        """Test that merged locations point at pages inside the merged file."""
+        self._index_question(1, ["First question", "continued"])
+        self._index_question(2, ["Second question about Route 53"])
+        merged_path = os.path.join(self.temp_dir, "merged.pdf")
+
+        self.index.record_merged_file("saa-c03", [(1, 1, 2), (2, 3, 1)], merged_path)
+        results = self.index.search("Route 53")
+
+        self.assertEqual(results[0]["pdf_path"], merged_path)
+        self.assertEqual(results[0]["pages"], [3])
+
+    def test_record_archived_file(self):
+        """Test that archived questions point at their archive."""
+        self._index_question(4, ["Question about Route 53", "continued"])
+        archive_path = os.path.join(self.temp_dir, "saa-c03_questions1-9.zip")
+
+        self.index.record_archived_file("saa-c03", 4, archive_path)
+        results = self.index.search("Route 53")
+
+        self.assertEqual(results[0]["pdf_path"], archive_path)
+        self.assertEqual(results[0]["pages"], [1])
+
+    def test_search_ignores_query_syntax(self):
+        """Test that punctuation in the query does not break the search."""
+        self._index_question(1, ["Object-Lock settings"])
+
+        self.assertEqual(len(self.index.search('Object-Lock "')), 1)
+        self.assertEqual(self.index.search("   "), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
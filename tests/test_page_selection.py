@@ -0,0 +1,127 @@
+"""Tests for layout-based page selection."""
+
+import unittest
+import xml.etree.ElementTree as ET
+
+from src.page_selection import PageSelector, matches_selector, validate_page_rules
+
+XHTML = "{http://www.w3.org/1999/xhtml}"
+
+
+class _Box:
+    """Minimal stand-in for a WeasyPrint box tree."""
+
+    def __init__(self, element=None, text=None, children=()):
+        self.element = element
+        self.text = text
+        self.children = list(children)
+
+    def descendants(self):
+        yield self
+        for child in self.children:
+            yield from child.descendants()
+
+
+def _element(tag, **attributes):
+    return ET.Element(XHTML + tag, {k.rstrip("_"): v for k, v in attributes.items()})
+
+
+def _page(*children):
+    return _Box(_element("html"), children=children)
+
+
+class TestMatchesSelector(unittest.TestCase):
+
+    def test_tag_class_and_id(self):
+        element = _element("div", class_="question-body card", id="q1")
+
+        self.assertTrue(matches_selector(element, "div"))
+        self.assertTrue(matches_selector(element, ".question-body"))
+        self.assertTrue(matches_selector(element, "div.card.question-body"))
+        self.assertTrue(matches_selector(element, "#q1"))
+        self.assertFalse(matches_selector(element, "span.question-body"))
+        self.assertFalse(matches_selector(element, ".discussion"))
+        self.assertFalse(matches_selector(element, "#q2"))
+
+    def test_unsupported_selector_never_matches(self):
+        self.assertFalse(matches_selector(_element("div"), "div > p"))
+        self.assertFalse(matches_selector(None, "div"))
+
+
+class TestPageSelector(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = [
+            _page(_Box(_element("header"), text="ExamTopics")),
+            _page(_Box(_element("nav"), text="Menu")),
+            _page(_Box(_element("div", class_="question-body"), text="Question #5 Which service")),
+            _page(_Box(_element("div", class_="discussion-container"), text="Comments")),
+            _page(_Box(_element("div", class_="discussion-container"), text="More comments")),
+            _page(_Box(_element("footer"), text="Footer")),
+        ]
+
+    def test_selects_from_start_to_last_end_marker(self):
+        selector = PageSelector(
+            {
+                "start": {"selector": ".question-body"},
+                "end": {"selector": ".discussion-container"},
+            }
+        )
+
+        self.assertEqual(selector.select(self.pages), [2, 3, 4])
+
+    def test_max_pages_caps_selection(self):
+        selector = PageSelector(
+            {
+                "start": {"selector": ".question-body"},
+                "end": {"selector": ".discussion-container"},
+                "max_pages": 2,
+            }
+        )
+
+        self.assertEqual(selector.select(self.pages), [2, 3])
+
+    def test_text_anchor_ignores_case_and_whitespace(self):
+        selector = PageSelector({"start": {"text": "question   #5"}, "max_pages": 1})
+
+        self.assertEqual(selector.select(self.pages), [2])
+
+    def test_without_end_marker_keeps_rest_of_document(self):
+        selector = PageSelector({"start": {"selector": ".question-body"}})
+
+        self.assertEqual(selector.select(self.pages), [2, 3, 4, 5])
+
+    def test_missing_start_marker_returns_none(self):
+        selector = PageSelector({"start": {"selector": ".missing"}})
+
+        self.assertIsNone(selector.select(self.pages))
+
+
+class TestValidatePageRules(unittest.TestCase):
+
+    def test_accepts_valid_rules(self):
+        validate_page_rules(
+            {
+                "start": {"selector": ".question-body"},
+                "end": {"text": "Discussion"},
+                "max_pages": 3,
+            }
+        )
+
+    def test_rejects_invalid_rules(self):
+        invalid = [
+            [],
+            {},
+            {"start": {}},
+            {"start": {"selector": ""}},
+            {"start": {"selector": "div > p"}},
+            {"start": {"text": "x"}, "max_pages": 0},
+            {"start": {"text": "x"}, "max_pages": True},
+        ]
+        for rules in invalid:
+            with self.assertRaises(ValueError, msg=rules):
+                validate_page_rules(rules)
+
+
+if __name__ == "__main__":
+    unittest.main()
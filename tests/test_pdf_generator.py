@@ -5,7 +5,10 @@ import tempfile
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 
-from src.pdf_generator import PDFGenerator
+from weasyprint import HTML
+
+from src.page_selection import PageSelector
+from src.pdf_generator import PDFGenerator, layout_page_boxes, shared_font_config
 
 
 class TestPDFGenerator(unittest.TestCase):
@@ -26,7 +29,7 @@ class TestPDFGenerator(unittest.TestCase):
              tempfile.NamedTemporaryFile() as temp_input, \
              tempfile.NamedTemporaryFile() as temp_output:
             
-            result = self.pdf_generator._filter_pdf_pages(temp_input.name, temp_output.name)
+            result = self.pdf_generator.renderer._filter_pdf_pages(temp_input.name, temp_output.name)
             
             self.assertTrue(result)
             mock_copy.assert_called_once_with(temp_input.name, temp_output.name)
@@ -47,7 +50,7 @@ class TestPDFGenerator(unittest.TestCase):
              tempfile.NamedTemporaryFile() as temp_input, \
              tempfile.NamedTemporaryFile() as temp_output:
             
-            result = self.pdf_generator._filter_pdf_pages(temp_input.name, temp_output.name)
+            result = self.pdf_generator.renderer._filter_pdf_pages(temp_input.name, temp_output.name)
             
             self.assertTrue(result)
             # Should add pages 2, 3, 4 (0-indexed, which are pages 3, 4, 5)
@@ -70,7 +73,7 @@ class TestPDFGenerator(unittest.TestCase):
              tempfile.NamedTemporaryFile() as temp_input, \
              tempfile.NamedTemporaryFile() as temp_output:
             
-            result = self.pdf_generator._filter_pdf_pages(temp_input.name, temp_output.name)
+            result = self.pdf_generator.renderer._filter_pdf_pages(temp_input.name, temp_output.name)
             
             self.assertTrue(result)
             # Should add pages 2, 3, 4 (0-indexed, which are pages 3, 4, 5)
@@ -92,12 +95,40 @@ class TestPDFGenerator(unittest.TestCase):
              tempfile.NamedTemporaryFile() as temp_input, \
              tempfile.NamedTemporaryFile() as temp_output:
             
-            result = self.pdf_generator._filter_pdf_pages(temp_input.name, temp_output.name)
+            result = self.pdf_generator.renderer._filter_pdf_pages(temp_input.name, temp_output.name)
             
             self.assertTrue(result)
             # Should add pages 2, 3 (0-indexed, which are pages 3, 4)
             self.assertEqual(mock_writer.add_page.call_count, 2)
 
+    def test_font_configuration_is_shared_by_renders(self):
+        """Test that every render in a process reuses one font configuration."""
+        self.assertIs(shared_font_config(), shared_font_config())
+
+
+    def test_layout_page_boxes_of_rendered_pages(self):
+        """Test that page rules can still see the layout boxes of WeasyPrint pages.
+
+        They are read from the internal ``Page._page_box`` attribute, so this
+        fails when a WeasyPrint release removes or changes it.
+        """
+        document = HTML(
+            string="<p>Intro</p><div class='question-body'>Which service?</div>"
+        ).render()
+
+        page_boxes = layout_page_boxes(document.pages)
+
+        self.assertIsNotNone(
+            page_boxes, "WeasyPrint pages no longer have _page_box, page rules are ignored"
+        )
+        self.assertEqual(
+            PageSelector({"start": {"selector": ".question-body"}}).select(page_boxes), [0]
+        )
+
+    def test_layout_page_boxes_missing(self):
+        """Test that pages without layout boxes are reported as unavailable."""
+        self.assertIsNone(layout_page_boxes([object()]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for writing merged PDFs linearized for fast opening."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pypdf import PdfReader
+
+from src.pdf_linearizer import PDFLinearizer, pikepdf
+from tests.pdf_fixtures import create_pdf
+
+
+class TestPDFLinearizer(unittest.TestCase):
+    """Test cases for PDFLinearizer."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "merged.pdf")
+        create_pdf(self.path, page_count=40)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _check_compact(self):
+        reader = PdfReader(self.path)
+        self.assertEqual(len(reader.pages), 40)
+        self.assertIn(b"page 39", reader.pages[39].get_contents().get_data())
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.assertIn(b"/XRef", data)
+        self.assertIn(b"/ObjStm", data)
+        self.assertEqual(len(reader.trailer["/Root"]["/Pages"]["/Kids"]), 5)
+        self.assertEqual(os.listdir(self.temp_dir), ["merged.pdf"])
+
+    @unittest.skipIf(pikepdf is None, "pikepdf is not installed")
+    def test_linearize(self):
+        """Test that the output is linearized with a balanced page tree."""
+        linearized = PDFLinearizer(page_tree_fanout=8).linearize_pdf(self.path)
+
+        self.assertTrue(linearized)
+        with pikepdf.open(self.path) as pdf:
+            self.assertTrue(pdf.is_linearized)
+            self.assertTrue(pdf.check_linearization())
+        self._check_compact()
+
+    def test_without_pikepdf_output_is_compacted(self):
+        """Test that a missing pikepdf still leaves a compact, valid PDF."""
+        linearizer = PDFLinearizer(page_tree_fanout=8)
+        with patch("src.pdf_linearizer.pikepdf", None):
+            self.assertFalse(linearizer.linearize_pdf(self.path))
+
+        self._check_compact()
+
+    def test_failure_keeps_original(self):
+        """Test that an unreadable PDF is left as it is."""
+        with open(self.path, "wb") as f:
+            f.write(b"not a pdf")
+
+        self.assertFalse(PDFLinearizer().linearize_pdf(self.path))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"not a pdf")
+        self.assertEqual(os.listdir(self.temp_dir), ["merged.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
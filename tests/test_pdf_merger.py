@@ -2,14 +2,16 @@
 
 import os
 import tempfile
+import tracemalloc
 import unittest
 from unittest.mock import Mock, patch, mock_open
 from pathlib import Path
 
 import pytest
-from pypdf import PdfReader, PdfWriter
+from pypdf import PdfReader
 
 from src.pdf_merger import PDFMerger
+from tests.pdf_fixtures import create_pdf
 
 
 class TestPDFMerger(unittest.TestCase):
@@ -334,6 +336,117 @@ class TestPDFMerger(unittest.TestCase):
             expected_dir = os.path.dirname(output_path)
             mock_makedirs.assert_called_with(expected_dir, exist_ok=True)
 
+    def _peak_merge_memory(self, input_count):
+        pdf_list = []
+        for index in range(input_count):
+            path = os.path.join(self.temp_dir, f"q{input_count}_{index}.pdf")
+            create_pdf(path, page_count=2, payload_size=50_000)
+            pdf_list.append(path)
+
+        output_path = os.path.join(self.temp_dir, f"merged{input_count}.pdf")
+        merger = PDFMerger(memory_limit_mb=1)
+
+        tracemalloc.start()
+        try:
+            result = merger.merge_pdfs(pdf_list, output_path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertTrue(result)
+        self.assertEqual(len(PdfReader(output_path).pages), input_count * 2)
+        return peak
+
+    def test_merge_pdfs_memory_limit_keeps_peak_flat(self):
+        """Test that a memory-bounded merge does not grow with the input count."""
+        small_peak = self._peak_merge_memory(5)
+        large_peak = self._peak_merge_memory(40)
+
+        # 8x the inputs must not cost anywhere near 8x the memory
+        self.assertLess(large_peak, small_peak * 1.5)
+
+    def test_merge_pdfs_memory_limit_not_exceeded_uses_in_memory_merge(self):
+        """Test that merges under the ceiling keep using the in-memory writer."""
+        path = os.path.join(self.temp_dir, "input.pdf")
+        create_pdf(path)
+        merger = PDFMerger(memory_limit_mb=100)
+
+        with patch.object(merger, "_merge_streaming") as mock_streaming:
+            result = merger.merge_pdfs([path], os.path.join(self.temp_dir, "out.pdf"))
+
+        self.assertTrue(result)
+        mock_streaming.assert_not_called()
+
+    def test_merge_pdfs_tree_matches_serial_merge(self):
+        """Test that a parallel tree merge produces the serial page sequence."""
+        pdf_list = []
+        for index in range(10):
+            path = os.path.join(self.temp_dir, f"question{index}.pdf")
+            create_pdf(path, page_count=index % 3 + 1, payload_size=64)
+            pdf_list.append(path)
+
+        serial_path = os.path.join(self.temp_dir, "serial.pdf")
+        tree_path = os.path.join(self.temp_dir, "tree.pdf")
+
+        self.assertTrue(PDFMerger().merge_pdfs(pdf_list, serial_path))
+        tree_merger = PDFMerger(merge_workers=3)
+        self.assertTrue(tree_merger.merge_pdfs(pdf_list, tree_path))
+
+        serial_pages = PdfReader(serial_path).pages
+        tree_pages = PdfReader(tree_path).pages
+        self.assertEqual(len(tree_pages), len(serial_pages))
+        for serial_page, tree_page in zip(serial_pages, tree_pages):
+            self.assertEqual(
+                tree_page.get_contents().get_data(),
+                serial_page.get_contents().get_data(),
+            )
+            self.assertEqual(tree_page.mediabox, serial_page.mediabox)
+
+        # Intermediate batch files are removed after the final pass
+        self.assertEqual(tree_merger.get_temp_files_count(), 0)
+
+    def test_merge_pdfs_tree_skips_unreadable_inputs(self):
+        """Test that unreadable inputs are skipped like in the serial merge."""
+        pdf_list = []
+        for index in range(10):
+            path = os.path.join(self.temp_dir, f"question{index}.pdf")
+            # The second of the three batches is entirely unreadable
+            if index == 2 or 4 <= index <= 7:
+                with open(path, "wb") as f:
+                    f.write(b"not a pdf")
+            else:
+                create_pdf(path, page_count=index % 3 + 1, payload_size=64)
+            pdf_list.append(path)
+
+        serial_path = os.path.join(self.temp_dir, "serial.pdf")
+        tree_path = os.path.join(self.temp_dir, "tree.pdf")
+        serial_merger = PDFMerger()
+        tree_merger = PDFMerger(merge_workers=3)
+
+        # Inputs may also become unreadable after they were validated
+        for merger in (serial_merger, tree_merger):
+            patch.object(merger, "_validate_pdf_files", side_effect=lambda pdfs: pdfs).start()
+        self.addCleanup(patch.stopall)
+
+        self.assertTrue(serial_merger.merge_pdfs(pdf_list, serial_path))
+        self.assertTrue(tree_merger.merge_pdfs(pdf_list, tree_path))
+
+        serial_pages = PdfReader(serial_path).pages
+        tree_pages = PdfReader(tree_path).pages
+        self.assertEqual(len(serial_pages), 8)
+        expected_ranges = [
+            (pdf_list[0], 1, 1),
+            (pdf_list[1], 2, 2),
+            (pdf_list[3], 4, 1),
+            (pdf_list[8], 5, 3),
+            (pdf_list[9], 8, 1),
+        ]
+        self.assertEqual(serial_merger.merged_pages, expected_ranges)
+        self.assertEqual(tree_merger.merged_pages, expected_ranges)
+        self.assertEqual(
+            [page.get_contents().get_data() for page in tree_pages],
+            [page.get_contents().get_data() for page in serial_pages],
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""Tests for the PDF optimization stage."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+from pypdf import PdfReader
+
+from src.pdf_optimizer import PDFOptimizer
+from tests.pdf_fixtures import create_pdf
+
+
+class TestPDFOptimizer(unittest.TestCase):
+    """Test cases for PDFOptimizer."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.optimizer = PDFOptimizer()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_optimize_compresses_content_streams(self):
+        """Test that uncompressed content streams are compressed losslessly."""
+        path = os.path.join(self.temp_dir, "text.pdf")
+        create_pdf(path, page_count=3, payload_size=8000)
+        original_contents = [
+            page.get_contents().get_data() for page in PdfReader(path).pages
+        ]
+        original_size = os.path.getsize(path)
+
+        saved = self.optimizer.optimize_pdf(path)
+
+        self.assertGreater(saved, 0)
+        self.assertEqual(os.path.getsize(path), original_size - saved)
+        self.assertEqual(self.optimizer.bytes_saved, saved)
+
+        reader = PdfReader(path)
+        self.assertEqual(
+            [page.get_contents().get_data() for page in reader.pages],
+            original_contents,
+        )
+        self.assertEqual(reader.pages[0]["/Contents"]["/Filter"], "/FlateDecode")
+
+    def test_optimize_downsamples_images_to_target_dpi(self):
+        """Test that oversized images are downsampled to the requested DPI."""
+        path = os.path.join(self.temp_dir, "image.pdf")
+        image = Image.linear_gradient("L").resize((1600, 1600)).convert("RGB")
+        # 1600px at 320 DPI is a 5 inch (360pt) square page
+        image.save(path, "PDF", resolution=320)
+
+        optimizer = PDFOptimizer(image_dpi=100, image_quality=60)
+        saved = optimizer.optimize_pdf(path)
+
+        self.assertGreater(saved, 0)
+        images = PdfReader(path).pages[0].images
+        self.assertEqual(len(images), 1)
+        self.assertLessEqual(images[0].image.width, 500)
+
+    def test_optimize_keeps_original_when_not_smaller(self):
+        """Test that the original file is kept when optimization does not help."""
+        path = os.path.join(self.temp_dir, "text.pdf")
+        create_pdf(path, payload_size=8000)
+        self.optimizer.optimize_pdf(path)
+        optimized_size = os.path.getsize(path)
+
+        self.assertEqual(self.optimizer.optimize_pdf(path), 0)
+        self.assertEqual(os.path.getsize(path), optimized_size)
+        self.assertFalse(os.path.exists(f"{path}.optimizing"))
+
+    def test_optimize_invalid_file(self):
+        """Test that an unreadable PDF is left alone and reports no savings."""
+        path = os.path.join(self.temp_dir, "broken.pdf")
+        with open(path, "wb") as f:
+            f.write(b"not a pdf")
+
+        self.assertEqual(self.optimizer.optimize_pdf(path), 0)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"not a pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the append-only PDF stream writer."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypdf import PdfReader
+
+from src.pdf_stream import PDFStreamWriter
+from tests.pdf_fixtures import create_pdf
+
+
+class TestPDFStreamWriter(unittest.TestCase):
+    """Test cases for PDFStreamWriter."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_append_preserves_page_order(self):
+        """Test that pages from every input appear in append order."""
+        inputs = []
+        for index, page_count in enumerate([2, 1, 3]):
+            path = os.path.join(self.temp_dir, f"input{index}.pdf")
+            create_pdf(path, page_count, f"input{index}")
+            inputs.append(path)
+
+        output_path = os.path.join(self.temp_dir, "out.pdf")
+        with PDFStreamWriter(output_path) as writer:
+            for path in inputs:
+                writer.append_pdf(path)
+
+        self.assertEqual(writer.page_count, 6)
+
+        reader = PdfReader(output_path)
+        contents = [page.get_contents().get_data() for page in reader.pages]
+        self.assertEqual(len(contents), 6)
+        self.assertIn(b"input0 page 0", contents[0])
+        self.assertIn(b"input1 page 0", contents[2])
+        self.assertIn(b"input2 page 2", contents[5])
+
+    def test_append_selected_pages(self):
+        """Test appending only a subset of pages from a reader."""
+        path = os.path.join(self.temp_dir, "input.pdf")
+        create_pdf(path, 5, "input")
+
+        output_path = os.path.join(self.temp_dir, "out.pdf")
+        with PDFStreamWriter(output_path) as writer:
+            writer.append_reader(PdfReader(path), page_indices=[2, 3])
+
+        reader = PdfReader(output_path)
+        self.assertEqual(len(reader.pages), 2)
+        self.assertIn(b"input page 2", reader.pages[0].get_contents().get_data())
+
+    def test_error_removes_partial_output(self):
+        """Test that an exception inside the context drops the output file."""
+        output_path = os.path.join(self.temp_dir, "out.pdf")
+
+        with self.assertRaises(ValueError):
+            with PDFStreamWriter(output_path):
+                raise ValueError("boom")
+
+        self.assertFalse(os.path.exists(output_path))
+
+    def test_balanced_page_tree(self):
+        """Test that pages are spread over nodes of at most the fanout."""
+        path = os.path.join(self.temp_dir, "input.pdf")
+        create_pdf(path, 70, "input")
+
+        output_path = os.path.join(self.temp_dir, "out.pdf")
+        with PDFStreamWriter(output_path, object_streams=True, page_tree_fanout=4) as writer:
+            writer.append_pdf(path)
+
+        reader = PdfReader(output_path)
+        self.assertEqual(len(reader.pages), 70)
+        self.assertIn(b"input page 0", reader.pages[0].get_contents().get_data())
+        self.assertIn(b"input page 69", reader.pages[69].get_contents().get_data())
+
+        def check_node(node, parent, depth):
+            if node["/Type"] == "/Page":
+                self.assertIs(node["/Parent"].get_object(), parent)
+                return [depth]
+            self.assertLessEqual(len(node["/Kids"]), 4)
+            if parent is not None:
+                self.assertIs(node["/Parent"].get_object(), parent)
+            depths = []
+            for kid in node["/Kids"]:
+                depths.extend(check_node(kid.get_object(), node, depth + 1))
+            self.assertEqual(node["/Count"], len(depths))
+            return depths
+
+        # 70 pages: 18 leaves, then 5 and 2 nodes above them, then the root
+        root = reader.trailer["/Root"]["/Pages"]
+        self.assertEqual(set(check_node(root, None, 0)), {4})
+
+    def test_single_leaf_page_tree(self):
+        """Test a balanced tree with fewer pages than the fanout."""
+        path = os.path.join(self.temp_dir, "input.pdf")
+        create_pdf(path, 3, "input")
+
+        output_path = os.path.join(self.temp_dir, "out.pdf")
+        with PDFStreamWriter(output_path, page_tree_fanout=32) as writer:
+            writer.append_pdf(path)
+
+        reader = PdfReader(output_path)
+        self.assertEqual(len(reader.pages), 3)
+        self.assertEqual(len(reader.trailer["/Root"]["/Pages"]["/Kids"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Tests for the per-question search, fetch and render steps."""
+
+import unittest
+from unittest.mock import Mock
+
+from src.pipeline import (
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_NO_URL,
+    STATUS_SUCCESS,
+    QuestionProcessor,
+    QuestionTask,
+)
+from src.search import PlanOutcome
+
+URL = "https://www.examtopics.com/discussions/amazon/view/1-exam-topic-1-question-5-discussion/"
+
+
+def _task(**kwargs):
+    values = dict(
+        exam="saa-c03",
+        question=5,
+        title="Topic 1 Question #5",
+        keyword="SAA-C03",
+        url_substring="/discussions/amazon/",
+        pdf_path="output/saa-c03_question5.pdf",
+        topic=1,
+    )
+    values.update(kwargs)
+    return QuestionTask(**values)
+
+
+class TestQuestionProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.search_engine = Mock()
+        self.search_engine.search_question.return_value = URL
+        self.pdf_generator = Mock()
+        self.pdf_generator.optimizer = None
+        self.pdf_generator.fetch_html.return_value = "<p>question text</p>"
+        self.pdf_generator.generate_pdf.return_value = True
+        self.processor = QuestionProcessor(self.search_engine, self.pdf_generator)
+
+    def test_renders_found_question(self):
+        result = self.processor.process(_task())
+
+        self.assertEqual(result.status, STATUS_SUCCESS)
+        self.assertEqual(result.url, URL)
+        self.assertEqual(result.pdf_path, "output/saa-c03_question5.pdf")
+        self.search_engine.search_question.assert_called_once_with(
+            "SAA-C03", "Topic 1 Question #5", "/discussions/amazon/", question_num=5, topic=1
+        )
+
+    def test_known_url_skips_search(self):
+        result = self.processor.process(_task(url=URL))
+
+        self.assertEqual(result.status, STATUS_SUCCESS)
+        self.search_engine.search_question.assert_not_called()
+
+    def test_reports_missing_url(self):
+        self.search_engine.search_question.return_value = None
+
+        result = self.processor.process(_task())
+
+        self.assertEqual(result.status, STATUS_NO_URL)
+        self.pdf_generator.generate_pdf.assert_not_called()
+
+    def test_duplicate_by_url_skips_fetch_and_render(self):
+        check_duplicate = Mock(return_value=2)
+
+        result = self.processor.process(_task(), check_duplicate)
+
+        self.assertEqual(result.status, STATUS_DUPLICATE)
+        self.assertEqual(result.duplicate_of, 2)
+        check_duplicate.assert_called_once_with(5, URL, None)
+        self.pdf_generator.fetch_html.assert_not_called()
+
+    def test_duplicate_by_fingerprint_skips_render(self):
+        check_duplicate = Mock(side_effect=[None, 3])
+
+        result = self.processor.process(_task(), check_duplicate)
+
+        self.assertEqual(result.status, STATUS_DUPLICATE)
+        self.assertEqual(result.duplicate_of, 3)
+        self.assertIsInstance(check_duplicate.call_args_list[1][0][2], int)
+        self.pdf_generator.generate_pdf.assert_not_called()
+
+    def test_fetched_page_is_rendered_without_second_download(self):
+        result = self.processor.process(_task(), Mock(return_value=None))
+
+        self.assertEqual(result.status, STATUS_SUCCESS)
+        self.assertEqual(
+            self.pdf_generator.generate_pdf.call_args[1]["html"], "<p>question text</p>"
+        )
+
+    def test_failure_kind_is_reported(self):
+        self.pdf_generator.generate_pdf.return_value = False
+        self.pdf_generator.last_failure = "fetch"
+
+        result = self.processor.process(_task(final_attempt=True))
+
+        self.assertEqual(result.status, STATUS_FAILED)
+        self.assertEqual(result.failure, "fetch")
+        self.assertTrue(
+            self.pdf_generator.generate_pdf.call_args[1]["allow_missing_resources"]
+        )
+
+    def test_query_plan_outcome_is_reported(self):
+        queries = [{"title": "a 5", "keyword": "a 5"}, {"title": "b 5", "keyword": "b 5"}]
+        self.search_engine.search_plan.return_value = PlanOutcome(
+            url=URL, hit=1, tried=2, searches=4
+        )
+
+        result = self.processor.process(_task(queries=queries))
+
+        self.assertEqual(result.status, STATUS_SUCCESS)
+        self.assertEqual((result.query_hit, result.queries_tried, result.searches), (1, 2, 4))
+        self.search_engine.search_plan.assert_called_once_with(
+            queries, "/discussions/amazon/", 5, topic=1
+        )
+        self.search_engine.search_question.assert_not_called()
+
+    def test_trace_is_returned_with_result(self):
+        result = self.processor.process(_task(trace=True))
+
+        names = [record["name"] for record in result.spans]
+        self.assertEqual(names, ["question", "search"])
+        self.assertEqual(result.spans[1]["parentSpanId"], result.spans[0]["spanId"])
+        self.assertIsNone(self.processor.process(_task()).spans)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for search query hit-rate statistics."""
+
+import os
+import tempfile
+import unittest
+
+from src.query_stats import QueryStats
+
+FIRST = {"title": "Exam SAA-C03 #QUESTION", "keyword": "SAA-C03 #QUESTION"}
+SECOND = {"title": "SAA-C03 question #QUESTION", "keyword": "saa-c03 #QUESTION"}
+THIRD = {"title": "Topic 1 #QUESTION", "keyword": "SAA #QUESTION"}
+
+
+class TestQueryStats(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "query_stats.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_untried_templates_keep_configured_order(self):
+        stats = QueryStats(self.path)
+
+        self.assertEqual(stats.order("saa", [FIRST, SECOND, THIRD]), [FIRST, SECOND, THIRD])
+
+    def test_most_productive_template_goes_first(self):
+        stats = QueryStats(self.path)
+        for _ in range(3):
+            stats.record("saa", FIRST, hit=False)
+            stats.record("saa", SECOND, hit=True)
+
+        self.assertEqual(stats.order("saa", [FIRST, SECOND, THIRD]), [SECOND, THIRD, FIRST])
+        self.assertEqual(stats.counts("saa", SECOND), (3, 3))
+        # Other exams are not affected
+        self.assertEqual(stats.order("az", [FIRST, SECOND]), [FIRST, SECOND])
+
+    def test_stats_persist_between_runs(self):
+        stats = QueryStats(self.path)
+        stats.record("saa", SECOND, hit=True)
+        self.assertTrue(stats.save())
+
+        reloaded = QueryStats(self.path)
+        reloaded.load()
+
+        self.assertEqual(reloaded.counts("saa", SECOND), (1, 1))
+        self.assertEqual(reloaded.order("saa", [FIRST, SECOND]), [SECOND, FIRST])
+
+    def test_unreadable_file_is_ignored(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+
+        stats = QueryStats(self.path)
+        stats.load()
+
+        self.assertEqual(stats.counts("saa", FIRST), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""Tests for the render worker pool and its per-question watchdog."""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.pipeline import (
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_SUCCESS,
+    STATUS_TIMED_OUT,
+    QuestionResult,
+    QuestionTask,
+)
+from src.render_pool import RenderPool
+
+STUCK_QUESTION = 2
+CRASH_QUESTION = 99
+
+
+class _FakeProcessor:
+    """Finishes every question at once, except one that hangs and one that crashes."""
+
+    def process(self, task, check_duplicate=None):
+        if task.question == CRASH_QUESTION:
+            os._exit(1)
+
+        if check_duplicate is not None:
+            duplicate_of = check_duplicate(task.question, f"url-{task.question}", None)
+            if duplicate_of is not None:
+                return QuestionResult(
+                    question=task.question, status=STATUS_DUPLICATE, duplicate_of=duplicate_of
+                )
+
+        if task.question == STUCK_QUESTION:
+            with open(task.pdf_path, "w") as f:
+                f.write("partial")
+            time.sleep(60)
+
+        # The worker's pid shows which process handled the question
+        return QuestionResult(
+            question=task.question,
+            status=STATUS_SUCCESS,
+            url=str(os.getpid()),
+            pdf_path=task.pdf_path,
+        )
+
+
+def _fake_processor_factory():
+    return _FakeProcessor()
+
+
+class TestRenderPool(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _task(self, question_num):
+        return QuestionTask(
+            exam="test",
+            question=question_num,
+            title="",
+            keyword="",
+            url_substring="",
+            pdf_path=os.path.join(self.temp_dir.name, f"q{question_num}.pdf"),
+        )
+
+    def _run(self, pool, question_nums):
+        pending = [self._task(num) for num in question_nums]
+        results = {}
+        self.max_busy = 0
+        with pool:
+            while pending or pool.busy:
+                while pending and pool.has_capacity():
+                    pool.submit(pending.pop(0))
+                self.max_busy = max(self.max_busy, pool.busy)
+                for result in pool.poll():
+                    results[result.question] = result
+        return results
+
+    def test_processes_every_question(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=2)
+
+        results = self._run(pool, [1, 3, 4, 5])
+
+        self.assertEqual(sorted(results), [1, 3, 4, 5])
+        self.assertTrue(all(r.status == STATUS_SUCCESS for r in results.values()))
+
+    def test_stuck_question_times_out_without_stalling_others(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=2, question_timeout=1)
+
+        started = time.monotonic()
+        results = self._run(pool, [1, 2, 3, 4, 5])
+
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(results[STUCK_QUESTION].status, STATUS_TIMED_OUT)
+        for question_num in (1, 3, 4, 5):
+            self.assertEqual(results[question_num].status, STATUS_SUCCESS)
+        self.assertFalse(os.path.exists(self._task(STUCK_QUESTION).pdf_path))
+
+    def test_worker_exit_past_its_deadline_is_reported_once(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=1, question_timeout=1)
+
+        with pool:
+            pool.submit(self._task(CRASH_QUESTION))
+            # The worker is gone and its deadline has passed by the next poll
+            worker = pool._workers[0]
+            worker.process.join(timeout=30)
+            time.sleep(max(0.0, worker.deadline - time.monotonic()) + 0.1)
+            results = pool.poll()
+
+            self.assertEqual([(r.question, r.status) for r in results], [(CRASH_QUESTION, STATUS_FAILED)])
+            self.assertEqual(pool.busy, 0)
+
+            pool.submit(self._task(1))
+            results = []
+            while not results:
+                results = pool.poll()
+            self.assertEqual(results[0].status, STATUS_SUCCESS)
+
+    def test_duplicate_checks_are_answered_by_coordinator(self):
+        seen = []
+
+        def check_duplicate(question_num, url, fingerprint):
+            seen.append(question_num)
+            return 1 if question_num == 3 else None
+
+        pool = RenderPool(
+            _fake_processor_factory, worker_count=1, check_duplicate=check_duplicate
+        )
+
+        results = self._run(pool, [1, 3])
+
+        self.assertEqual(sorted(seen), [1, 3])
+        self.assertEqual(results[3].status, STATUS_DUPLICATE)
+        self.assertEqual(results[3].duplicate_of, 1)
+
+    def test_workers_recycle_after_max_tasks(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=1, max_tasks_per_worker=2)
+
+        results = self._run(pool, [1, 3, 4, 5, 6])
+
+        self.assertTrue(all(r.status == STATUS_SUCCESS for r in results.values()))
+        self.assertEqual(pool.recycled, 2)
+        pids = [results[num].url for num in (1, 3, 4, 5, 6)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(len(set(pids)), 3)
+
+    def test_workers_recycle_above_rss_limit(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=2, max_worker_rss_mb=1)
+
+        results = self._run(pool, [1, 3, 4])
+
+        self.assertTrue(all(r.status == STATUS_SUCCESS for r in results.values()))
+        self.assertEqual(pool.recycled, 3)
+
+    def test_memory_budget_limits_concurrent_questions(self):
+        pool = RenderPool(_fake_processor_factory, worker_count=3, memory_budget_mb=1)
+
+        results = self._run(pool, [1, 3, 4, 5])
+
+        self.assertEqual(sorted(results), [1, 3, 4, 5])
+        self.assertEqual(self.max_busy, 1)
+
+    def test_rejects_zero_workers(self):
+        with self.assertRaises(ValueError):
+            RenderPool(_fake_processor_factory, worker_count=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Tests for the fast text renderer."""
+
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+from pypdf import PdfReader
+
+from src.renderer import Renderer, TextRenderer, _wrap, _text_width
+
+PAGE = """
+<html><head><title>Question</title><script>var x = "hidden";</script></head>
+<body>
+  <nav>Home | Exams</nav>
+  <div class="question-body">
+    <p class="card-text">Which service stores objects?<br>Pick one.</p>
+    <img src="/media/diagram.png">
+    <div class="question-choices-container"><ul>
+      <li class="multi-choice-item"><span class="multi-choice-letter">A.</span> Amazon S3</li>
+      <li class="multi-choice-item"><span class="multi-choice-letter">B.</span> Amazon EC2</li>
+    </ul></div>
+    <p class="question-answer">Suggested Answer: <span class="correct-answer">A</span></p>
+    <button>Reveal Solution</button>
+  </div>
+  <div class="discussion-container">
+    <div class="comment-container">
+      <h5 class="comment-username">alice</h5>
+      <div class="comment-content">A is right</div>
+      <span class="upvote-count">2</span>
+    </div>
+    <div class="comment-container">
+      <h5 class="comment-username">bob</h5>
+      <div class="comment-content">Definitely A, S3 is object storage</div>
+      <span class="upvote-count">15</span>
+    </div>
+    <div class="comment-container">
+      <h5 class="comment-username">carol</h5>
+      <div class="comment-content"></div>
+      <span class="upvote-count">40</span>
+    </div>
+  </div>
+</body></html>
+"""
+
+
+def _png_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (40, 20), (255, 0, 0, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _Response:
+
+    def __init__(self, body):
+        self.body = body
+        self.charset = None
+
+    def read(self):
+        return self.body
+
+    def close(self):
+        pass
+
+
+class _FakeFetcher:
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.fetched = []
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        if url not in self.resources:
+            raise OSError(f"404 {url}")
+        return _Response(self.resources[url])
+
+
+class TestTextRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.temp_dir.name, "question.pdf")
+        self.fetcher = _FakeFetcher({"https://example.com/media/diagram.png": _png_bytes()})
+        self.renderer = TextRenderer(self.fetcher, max_comments=2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _render(self, html=PAGE):
+        return self.renderer.render("https://example.com/discussions/1/", html, self.output_path)
+
+    def _text(self):
+        return "\n".join(page.extract_text() for page in PdfReader(self.output_path).pages)
+
+    def test_renders_question_content_and_top_comments(self):
+        self.assertTrue(self._render())
+
+        text = self._text()
+        self.assertIn("Which service stores objects?", text)
+        self.assertIn("A. Amazon S3", text)
+        self.assertIn("Suggested Answer: A", text)
+        self.assertIn("Definitely A, S3 is object storage", text)
+        self.assertNotIn("Home | Exams", text)
+        self.assertNotIn("hidden", text)
+        self.assertNotIn("Reveal Solution", text)
+        # Most upvoted comments with text come first
+        self.assertLess(text.index("bob (15 upvotes)"), text.index("alice (2 upvotes)"))
+
+    def test_embeds_images_relative_to_page(self):
+        self.assertTrue(self._render())
+
+        page = PdfReader(self.output_path).pages[0]
+        images = page["/Resources"]["/XObject"]
+        self.assertEqual(len(images), 1)
+        self.assertIn("https://example.com/media/diagram.png", self.fetcher.fetched)
+
+    def test_missing_image_is_skipped(self):
+        self.fetcher.resources = {}
+
+        self.assertTrue(self._render())
+        self.assertIn("Which service stores objects?", self._text())
+
+    def test_long_content_flows_over_pages(self):
+        html = '<div class="question-body">' + "<p>word " * 400 + "</div>"
+
+        self.assertTrue(self._render(html))
+        self.assertGreater(len(PdfReader(self.output_path).pages), 1)
+
+    def test_page_without_question_content_fails(self):
+        self.assertFalse(self._render("<html><body><p>Not found</p></body></html>"))
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_fetches_page_when_html_not_given(self):
+        self.fetcher.resources["https://example.com/discussions/1/"] = PAGE.encode()
+
+        self.assertTrue(self._render(html=None))
+
+
+class TestRenderer(unittest.TestCase):
+
+    def test_backend_must_implement_render(self):
+        class Incomplete(Renderer):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete(_FakeFetcher({}))
+
+
+class TestWrap(unittest.TestCase):
+
+    def test_lines_fit_width(self):
+        lines = _wrap("The quick brown fox jumps over the lazy dog " * 10, 11, 200)
+
+        self.assertGreater(len(lines), 1)
+        for line in lines:
+            self.assertLessEqual(_text_width(line, 11), 200)
+
+    def test_long_word_is_broken(self):
+        lines = _wrap("x" * 200, 11, 100)
+
+        self.assertEqual("".join(lines), "x" * 200)
+        for line in lines:
+            self.assertLessEqual(_text_width(line, 11), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
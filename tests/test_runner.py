@@ -0,0 +1,173 @@
+"""Tests for running a question range with a stand-in render pool."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.config import ConfigManager
+from src.pipeline import STATUS_NO_URL, STATUS_SUCCESS, QuestionResult
+from src.runner import build_run_args, run_job
+from src.sharding import collect_question_pdfs
+from tests.pdf_fixtures import create_pdf
+
+
+class FakePool:
+    """Runs one task at a time by handing it to ``respond``."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.tasks = []
+        self.busy = []
+        self.question_timeout = None
+        self.memory_budget_mb = None
+        self.check_duplicate = None
+
+    def has_capacity(self):
+        return not self.busy
+
+    def submit(self, task):
+        self.tasks.append(task)
+        self.busy.append(task)
+
+    def poll(self, timeout=None):
+        results = [self.respond(task) for task in self.busy]
+        self.busy = []
+        return results
+
+    def cancel(self):
+        self.busy = []
+
+    def close(self):
+        pass
+
+
+class RunnerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.temp_dir, "output")
+        self.config_path = os.path.join(self.temp_dir, "settings.json")
+        with open(self.config_path, "w") as f:
+            json.dump(
+                {
+                    "site": "https://www.examtopics.com",
+                    "log_level": "error",
+                    "exams": [
+                        {
+                            "exam": "saa-c03",
+                            "title": "Associate SAA-C03 topic 1 question #QUESTION discussion",
+                            "keyword": "Associate SAA-C03 topic 1 question #QUESTION discussion",
+                            "url_substring": "saa-c03",
+                            "queries": [
+                                {"title": "SAA-C03 question #QUESTION", "keyword": "saa-c03 #QUESTION"}
+                            ],
+                        }
+                    ],
+                },
+                f,
+            )
+        self.config_manager = ConfigManager(self.config_path)
+        self.config_manager.load_config()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_range(self, begin, end, respond, **options):
+        options.setdefault("output", self.output)
+        args = build_run_args("saa-c03", begin, end, self.config_path, options)
+        pool = FakePool(respond)
+        return run_job(args, self.config_manager, render_pool=pool), pool
+
+
+class TestQueryOrder(RunnerTestCase):
+
+    def test_hit_rates_reorder_queries_within_a_run(self):
+        def respond(task):
+            # Only the second configured query ever finds the question
+            hit = next(
+                (position for position, query in enumerate(task.queries)
+                 if query["title"].startswith("SAA-C03")),
+                None,
+            )
+            return QuestionResult(
+                task.question, STATUS_NO_URL, query_hit=hit, queries_tried=hit + 1, searches=hit + 1
+            )
+
+        _, pool = self.run_range(1, 3, respond, no_merge=True)
+
+        first_titles = [task.queries[0]["title"] for task in pool.tasks]
+        self.assertTrue(first_titles[0].startswith("Associate"))
+        self.assertEqual(first_titles[1:], ["SAA-C03 question 2", "SAA-C03 question 3"])
+
+
+def render(task):
+    os.makedirs(os.path.dirname(task.pdf_path), exist_ok=True)
+    create_pdf(task.pdf_path)
+    return QuestionResult(task.question, STATUS_SUCCESS, url="u", pdf_path=task.pdf_path)
+
+
+class TestArchive(RunnerTestCase):
+
+    def test_sharded_archives_can_be_merged(self):
+        for shard_index in (1, 2):
+            summary, _ = self.run_range(1, 5, render, shard=f"{shard_index}/2", archive=True)
+            self.assertIsNotNone(summary["archive"])
+
+        self.assertEqual(
+            sorted(os.listdir(self.output)),
+            [
+                "query_stats.json",
+                "saa-c03_questions1-5_shard1of2.zip",
+                "saa-c03_questions1-5_shard2of2.zip",
+            ],
+        )
+
+        extract_dir = os.path.join(self.temp_dir, "extracted")
+        collected = collect_question_pdfs([self.output], "saa-c03", extract_dir=extract_dir)
+        self.assertEqual([q for q, _ in collected], [1, 2, 3, 4, 5])
+
+    def test_failed_run_drops_partial_outputs(self):
+        def respond(task):
+            if task.question == 3:
+                raise RuntimeError("boom")
+            return render(task)
+
+        with self.assertRaises(RuntimeError):
+            self.run_range(1, 5, respond, archive=True, stream_merge=True, keep_individual=True)
+
+        self.assertEqual(
+            sorted(os.listdir(self.output)), ["saa-c03_question1.pdf", "saa-c03_question2.pdf"]
+        )
+
+
+class TestOutputPaths(RunnerTestCase):
+
+    def test_tasks_get_absolute_paths(self):
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            _, pool = self.run_range(1, 2, render, output="output", no_merge=True)
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(
+            [task.pdf_path for task in pool.tasks],
+            [os.path.join(self.output, f"saa-c03_question{q}.pdf") for q in (1, 2)],
+        )
+
+    def test_missing_pdf_is_a_failure(self):
+        def respond(task):
+            if task.question == 2:
+                return QuestionResult(task.question, STATUS_SUCCESS, url="u", pdf_path=task.pdf_path)
+            return render(task)
+
+        summary, _ = self.run_range(1, 3, respond, no_merge=True)
+
+        self.assertEqual(summary["generated"], [1, 3])
+        self.assertEqual(summary["failed"], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
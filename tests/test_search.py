@@ -0,0 +1,165 @@
+"""Tests for search result verification and ranking."""
+
+import unittest
+from unittest.mock import patch
+
+from src.search import SearchEngine, parse_topic
+
+
+SUBSTRING = "exam-aws-certified-solutions-architect-associate-saa-c03"
+
+
+def _hit(view_id, question, topic=1, title=""):
+    return {
+        "href": (
+            f"https://www.examtopics.com/discussions/amazon/view/{view_id}-{SUBSTRING}"
+            f"-topic-{topic}-question-{question}-discussion/"
+        ),
+        "title": title,
+    }
+
+
+class TestSearchEngine(unittest.TestCase):
+    """Test cases for SearchEngine result verification."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.search_engine = SearchEngine(retry_attempts=1, retry_delay=0)
+
+    def test_parse_topic(self):
+        """Test extracting the topic number from titles and URL substrings."""
+        self.assertEqual(parse_topic("Exam AZ-104 topic 1 question #QUESTION discussion"), 1)
+        self.assertEqual(parse_topic("exam-az-104-topic-2"), 2)
+        self.assertIsNone(parse_topic("Exam CKA question #QUESTION"))
+
+    def test_rank_urls_rejects_other_question_numbers(self):
+        """Test that hits for questions 157 and 5 are not taken for 57."""
+        results = [_hit(1, 157), _hit(2, 5), _hit(3, 57)]
+
+        ranked = self.search_engine.rank_urls(results, SUBSTRING, 57, topic=1)
+
+        self.assertEqual(len(ranked), 1)
+        self.assertIn("question-57-discussion", ranked[0][0])
+
+    def test_rank_urls_rejects_other_topics(self):
+        """Test that the same question number in another topic is rejected."""
+        results = [_hit(1, 57, topic=2)]
+
+        self.assertEqual(self.search_engine.rank_urls(results, SUBSTRING, 57, topic=1), [])
+
+    def test_rank_urls_prefers_verified_candidates(self):
+        """Test that verified slugs outrank titles and unverifiable hits."""
+        unverified = {"href": f"https://www.examtopics.com/discussions/amazon/view/9-{SUBSTRING}/"}
+        by_title = {
+            "href": f"https://www.examtopics.com/discussions/amazon/view/8-{SUBSTRING}/",
+            "title": "Exam SAA-C03 topic 1 question 57 discussion - ExamTopics",
+        }
+        results = [unverified, by_title, _hit(3, 57)]
+
+        ranked = self.search_engine.rank_urls(results, SUBSTRING, 57, topic=1)
+
+        self.assertEqual([url for url, _ in ranked], [results[2]["href"], by_title["href"], unverified["href"]])
+
+    def test_search_question_retries_with_another_query(self):
+        """Test that a query with only mismatching hits falls through to the next one."""
+        with patch.object(
+            self.search_engine,
+            "_perform_search",
+            side_effect=[[_hit(1, 157)], [_hit(3, 57)]],
+        ) as mock_search:
+            url = self.search_engine.search_question(
+                "keyword 57", "title 57", SUBSTRING, question_num=57, topic=1
+            )
+
+        self.assertIn("question-57-discussion", url)
+        self.assertEqual(mock_search.call_count, 2)
+
+    def test_search_question_no_match(self):
+        """Test that no URL is returned when every query only finds other questions."""
+        with patch.object(
+            self.search_engine, "_perform_search", return_value=[_hit(1, 157)]
+        ):
+            url = self.search_engine.search_question(
+                "keyword 57", "title 57", SUBSTRING, question_num=57, topic=1
+            )
+
+        self.assertIsNone(url)
+
+    def test_search_question_without_number_keeps_first_valid_url(self):
+        """Test that callers without a question number get the first valid URL."""
+        with patch.object(
+            self.search_engine, "_perform_search", return_value=[_hit(1, 157), _hit(2, 57)]
+        ):
+            url = self.search_engine.search_question("keyword", "title", SUBSTRING)
+
+        self.assertIn("question-157-discussion", url)
+
+    def test_search_plan_stops_at_first_verified_query(self):
+        """Test that later queries of a plan are only tried after a miss."""
+        queries = [
+            {"title": "first 57", "keyword": "first 57"},
+            {"title": "second 57", "keyword": "second 57"},
+            {"title": "third 57", "keyword": "third 57"},
+        ]
+        with patch.object(
+            self.search_engine,
+            "_perform_search",
+            side_effect=[[_hit(1, 157)], [_hit(3, 57)]],
+        ) as perform_search:
+            outcome = self.search_engine.search_plan(queries, SUBSTRING, 57, topic=1)
+
+        self.assertIn("question-57-discussion", outcome.url)
+        self.assertEqual(outcome.hit, 1)
+        self.assertEqual(outcome.tried, 2)
+        self.assertEqual(outcome.searches, 2)
+        self.assertIn("intitle:second 57", perform_search.call_args[0][0])
+
+    def test_search_plan_tries_every_exact_query_before_broadening(self):
+        """Test that no query is broadened while another has an exact search left."""
+        queries = [
+            {"title": "first 57", "keyword": "first 57"},
+            {"title": "second 57", "keyword": "second 57"},
+        ]
+        with patch.object(
+            self.search_engine,
+            "_perform_search",
+            side_effect=[[], [], [_hit(3, 57)]],
+        ) as perform_search:
+            outcome = self.search_engine.search_plan(queries, SUBSTRING, 57, topic=1)
+
+        searched = [call[0][0] for call in perform_search.call_args_list]
+        self.assertEqual(
+            searched,
+            [
+                'site:examtopics.com intitle:first 57 "first 57"',
+                'site:examtopics.com intitle:second 57 "second 57"',
+                'site:examtopics.com "first 57"',
+            ],
+        )
+        self.assertEqual(outcome.hit, 0)
+        self.assertEqual(outcome.tried, 2)
+        self.assertEqual(outcome.searches, 3)
+
+    def test_search_plan_falls_back_to_unverified_url(self):
+        """Test that an unverified hit is kept when no query verifies one."""
+        unverified = {"href": f"https://www.examtopics.com/discussions/amazon/view/9-{SUBSTRING}/"}
+        queries = [{"title": "a", "keyword": "a"}, {"title": "b", "keyword": "b"}]
+        with patch.object(self.search_engine, "_perform_search", return_value=[unverified]):
+            outcome = self.search_engine.search_plan(queries, SUBSTRING, 57, topic=1)
+
+        self.assertEqual(outcome.url, unverified["href"])
+        self.assertIsNone(outcome.hit)
+        self.assertEqual(outcome.tried, 2)
+        self.assertEqual(outcome.searches, 6)
+
+    def test_search_plan_shares_searches_of_the_same_keyword(self):
+        """Test that queries differing only in title search their keyword once."""
+        queries = [{"title": "a", "keyword": "k"}, {"title": "b", "keyword": "k"}]
+        with patch.object(self.search_engine, "_perform_search", return_value=[]):
+            outcome = self.search_engine.search_plan(queries, SUBSTRING, 57, topic=1)
+
+        self.assertIsNone(outcome.url)
+        self.assertEqual(outcome.searches, 4)
+
+if __name__ == "__main__":
+    unittest.main()
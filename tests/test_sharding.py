@@ -0,0 +1,110 @@
+"""Tests for splitting question ranges into shards and collecting their PDFs."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.archive import QuestionArchiveWriter
+from src.sharding import collect_question_pdfs, parse_shard, shard_questions
+
+
+class TestShardQuestions(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        self.assertEqual(parse_shard(" 1 / 1 "), (1, 1))
+
+        for text in ("0/4", "5/4", "1/0", "2", "a/b", "-1/3"):
+            with self.assertRaises(ValueError, msg=text):
+                parse_shard(text)
+
+    def test_shards_are_interleaved(self):
+        self.assertEqual(shard_questions(1, 10, 1, 3), [1, 4, 7, 10])
+        self.assertEqual(shard_questions(1, 10, 2, 3), [2, 5, 8])
+        self.assertEqual(shard_questions(1, 10, 3, 3), [3, 6, 9])
+
+    def test_shards_cover_range_once_and_are_balanced(self):
+        begin, end, count = 17, 2016, 7
+        shards = [shard_questions(begin, end, index, count) for index in range(1, count + 1)]
+
+        questions = sorted(q for shard in shards for q in shard)
+        self.assertEqual(questions, list(range(begin, end + 1)))
+        sizes = [len(shard) for shard in shards]
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_more_shards_than_questions(self):
+        self.assertEqual(shard_questions(1, 2, 3, 5), [])
+
+
+class TestCollectQuestionPdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _shard_dir(self, name, files):
+        directory = os.path.join(self.temp_dir, name)
+        os.makedirs(directory)
+        for file_name in files:
+            with open(os.path.join(directory, file_name), "wb") as f:
+                f.write(b"%PDF-1.4\n")
+        return directory
+
+    def test_collects_in_question_order(self):
+        shard1 = self._shard_dir("shard1", ["saa_question1.pdf", "saa_question11.pdf"])
+        shard2 = self._shard_dir(
+            "shard2",
+            ["saa_question2.pdf", "saa_question10.pdf", "other_question3.pdf", "notes.txt"],
+        )
+
+        collected = collect_question_pdfs([shard2, shard1], "saa")
+
+        self.assertEqual([q for q, _ in collected], [1, 2, 10, 11])
+        self.assertEqual(collected[0][1], os.path.join(shard1, "saa_question1.pdf"))
+
+    def test_range_and_duplicates(self):
+        shard1 = self._shard_dir("shard1", ["saa_question1.pdf", "saa_question2.pdf"])
+        shard2 = self._shard_dir("shard2", ["saa_question2.pdf", "saa_question3.pdf"])
+
+        collected = collect_question_pdfs(
+            [shard1, shard2, os.path.join(self.temp_dir, "missing")], "saa", begin=2
+        )
+
+        self.assertEqual(
+            collected,
+            [
+                (2, os.path.join(shard1, "saa_question2.pdf")),
+                (3, os.path.join(shard2, "saa_question3.pdf")),
+            ],
+        )
+
+    def test_collects_from_shard_archives(self):
+        shard1 = self._shard_dir("shard1", ["saa_question1.pdf"])
+        shard2 = self._shard_dir("shard2", ["saa_question4.pdf"])
+        writer = QuestionArchiveWriter("saa", os.path.join(shard2, "saa_questions1-4_shard2of2.zip"))
+        writer.open()
+        for question_num in (2, 4):
+            writer.add(question_num, os.path.join(shard2, "saa_question4.pdf"))
+        writer.close()
+        extract_dir = os.path.join(self.temp_dir, "extracted")
+
+        self.assertEqual([q for q, _ in collect_question_pdfs([shard1, shard2], "saa")], [1, 4])
+
+        collected = collect_question_pdfs([shard1, shard2], "saa", extract_dir=extract_dir)
+
+        self.assertEqual(
+            collected,
+            [
+                (1, os.path.join(shard1, "saa_question1.pdf")),
+                (2, os.path.join(extract_dir, "saa_question2.pdf")),
+                (4, os.path.join(shard2, "saa_question4.pdf")),
+            ],
+        )
+        self.assertEqual(os.listdir(extract_dir), ["saa_question2.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Tests for the streaming in-order merger."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypdf import PdfReader
+
+from src.streaming_merger import StreamingMerger
+from src.volumes import VolumeWriter
+from tests.pdf_fixtures import create_pdf
+
+
+class TestStreamingMerger(unittest.TestCase):
+    """Test cases for StreamingMerger."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.temp_dir, "merged.pdf")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _question_pdf(self, question_num):
+        path = os.path.join(self.temp_dir, f"q{question_num}.pdf")
+        create_pdf(path, label=f"question {question_num}")
+        return path
+
+    def _merged_labels(self, path):
+        return [
+            page.get_contents().get_data().strip().decode()
+            for page in PdfReader(path).pages
+        ]
+
+    def test_out_of_order_arrivals_are_merged_in_order(self):
+        """Test that questions finishing out of order end up in order."""
+        merger = StreamingMerger(1, output_path=self.output_path)
+
+        merger.add(3, self._question_pdf(3))
+        merger.add(2, self._question_pdf(2))
+        # Nothing can be written until question 1 is done
+        self.assertEqual(merger.merged_count, 0)
+
+        merger.add(1, self._question_pdf(1))
+        self.assertEqual(merger.merged_count, 3)
+        self.assertEqual(merger.next_question, 4)
+
+        self.assertTrue(merger.finish())
+        self.assertEqual(
+            self._merged_labels(self.output_path),
+            ["% question 1 page 0", "% question 2 page 0", "% question 3 page 0"],
+        )
+        self.assertFalse(os.path.exists(f"{self.output_path}.part"))
+
+    def test_skipped_questions_do_not_block_the_stream(self):
+        """Test that failed questions release the questions behind them."""
+        merger = StreamingMerger(1, output_path=self.output_path)
+
+        merger.add(2, self._question_pdf(2))
+        merger.skip(1)
+
+        self.assertEqual(merger.merged_count, 1)
+        self.assertTrue(merger.finish())
+        self.assertEqual(self._merged_labels(self.output_path), ["% question 2 page 0"])
+
+    def test_unreadable_question_does_not_shift_later_pages(self):
+        """Test that page ranges cover only the questions actually merged."""
+        merger = StreamingMerger(1, output_path=self.output_path)
+        broken_path = os.path.join(self.temp_dir, "q2.pdf")
+        with open(broken_path, "wb") as f:
+            f.write(b"not a pdf")
+
+        merger.add(1, self._question_pdf(1))
+        merger.add(2, broken_path)
+        merger.add(3, self._question_pdf(3))
+        self.assertTrue(merger.finish())
+
+        self.assertEqual(merger.merged_pages, [(1, 1, 1), (3, 2, 1)])
+        self.assertEqual(
+            self._merged_labels(self.output_path), ["% question 1 page 0", "% question 3 page 0"]
+        )
+
+    def test_reorder_window_is_bounded(self):
+        """Test that arrivals beyond the reorder window are rejected."""
+        merger = StreamingMerger(1, output_path=self.output_path, window=2)
+
+        self.assertTrue(merger.accepts(2))
+        self.assertFalse(merger.accepts(3))
+        with self.assertRaises(ValueError):
+            merger.add(3, self._question_pdf(3))
+        merger.abort()
+
+    def test_finish_without_questions_fails(self):
+        """Test that a merge with no questions produces no output."""
+        merger = StreamingMerger(1, output_path=self.output_path)
+        merger.skip(1)
+
+        self.assertFalse(merger.finish())
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_forwards_to_volume_writer(self):
+        """Test that in-order questions are forwarded to volumes."""
+        volume_writer = VolumeWriter("exam", self.temp_dir, questions_per_volume=2)
+        merger = StreamingMerger(1, volume_writer=volume_writer)
+
+        merger.add(2, self._question_pdf(2))
+        merger.add(1, self._question_pdf(1))
+        merger.add(3, self._question_pdf(3))
+        self.assertTrue(merger.finish())
+
+        self.assertEqual(
+            [(first, last) for _, first, last in volume_writer.volumes], [(1, 2), (3, 3)]
+        )
+        self.assertEqual(
+            self._merged_labels(volume_writer.volumes[0][0]),
+            ["% question 1 page 0", "% question 2 page 0"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Tests for per-question tracing spans."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.tracing import (
+    STATUS_ERROR,
+    STATUS_OK,
+    Trace,
+    TraceLog,
+    activate,
+    span,
+)
+
+
+def _attributes(record):
+    return {item["key"]: list(item["value"].values())[0] for item in record["attributes"]}
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_spans_nest_and_record_attributes(self):
+        trace = Trace("question", question=5)
+        with activate(trace):
+            with span("search") as search_span:
+                with span("search.attempt", retry=0):
+                    pass
+                search_span.set("searches", 1)
+        trace.finish(status="success")
+
+        root, search, attempt = trace.spans
+        self.assertNotIn("parentSpanId", root)
+        self.assertEqual(search["parentSpanId"], root["spanId"])
+        self.assertEqual(attempt["parentSpanId"], search["spanId"])
+        self.assertEqual({record["traceId"] for record in trace.spans}, {trace.trace_id})
+        self.assertEqual(_attributes(root), {"question": "5", "status": "success"})
+        self.assertEqual(_attributes(search), {"searches": "1"})
+        for record in trace.spans:
+            self.assertLessEqual(
+                int(record["startTimeUnixNano"]), int(record["endTimeUnixNano"])
+            )
+
+    def test_failed_span_has_error_status(self):
+        trace = Trace("question")
+        with activate(trace), self.assertRaises(ValueError):
+            with span("fetch"):
+                raise ValueError("boom")
+
+        self.assertEqual(trace.spans[1]["status"], {"code": STATUS_ERROR, "message": "boom"})
+        self.assertEqual(trace.spans[0]["status"]["code"], STATUS_OK)
+
+    def test_span_without_active_trace_is_a_no_op(self):
+        with span("fetch") as inactive:
+            inactive.set("size", 1)
+        self.assertFalse(inactive.recording)
+
+    def test_resumed_trace_continues_under_root(self):
+        trace = Trace("question")
+        trace.finish()
+        resumed = Trace.resume(json.loads(json.dumps(trace.spans)))
+
+        with resumed.span("merge.append"):
+            pass
+
+        root, append = resumed.spans
+        self.assertEqual(append["parentSpanId"], root["spanId"])
+        self.assertGreaterEqual(int(root["endTimeUnixNano"]), int(append["endTimeUnixNano"]))
+
+
+class TestTraceLog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "traces", "trace.jsonl")
+        self.trace_log = TraceLog(self.path)
+        self.trace_log.open()
+
+    def tearDown(self):
+        self.trace_log.close()
+        self.temp_dir.cleanup()
+
+    def _lines(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def _question(self, question_num):
+        trace = Trace("question", question=question_num)
+        trace.finish()
+        return trace.spans
+
+    def test_writes_otlp_export_requests(self):
+        self.trace_log.add(3, self._question(3))
+        self.trace_log.write(3)
+
+        (request,) = self._lines()
+        resource_spans = request["resourceSpans"][0]
+        self.assertEqual(
+            resource_spans["resource"]["attributes"][0]["key"], "service.name"
+        )
+        spans = resource_spans["scopeSpans"][0]["spans"]
+        self.assertEqual(spans[0]["name"], "question")
+
+    def test_held_traces_are_written_in_question_order(self):
+        for question_num in (4, 2, 3):
+            self.trace_log.add(question_num, self._question(question_num))
+
+        self.trace_log.write_before(4)
+        self.assertEqual(len(self._lines()), 2)
+
+        self.trace_log.close()
+        questions = [
+            _attributes(line["resourceSpans"][0]["scopeSpans"][0]["spans"][0])["question"]
+            for line in self._lines()
+        ]
+        self.assertEqual(questions, ["2", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Tests for bulk question URL import and export."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.url_io import export_urls, load_url_map
+
+
+class TestUrlIO(unittest.TestCase):
+    """Test cases for URL import and export."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.urls = [
+            (2, "https://www.examtopics.com/discussions/amazon/view/2-exam/"),
+            (1, "https://www.examtopics.com/discussions/amazon/view/1-exam/"),
+        ]
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_csv_round_trip(self):
+        """Test that exported CSV files load back into the same mapping."""
+        path = os.path.join(self.temp_dir, "urls.csv")
+        export_urls(path, "saa-c03", self.urls)
+
+        self.assertEqual(load_url_map(path, exam="saa-c03"), dict(self.urls))
+
+    def test_jsonl_round_trip(self):
+        """Test that exported JSONL files load back into the same mapping."""
+        path = os.path.join(self.temp_dir, "urls.jsonl")
+        export_urls(path, "saa-c03", self.urls)
+
+        with open(path) as f:
+            first = json.loads(f.readline())
+        self.assertEqual(first["question"], 1)
+        self.assertEqual(load_url_map(path), dict(self.urls))
+
+    def test_load_filters_other_exams_and_invalid_rows(self):
+        """Test that rows for other exams and malformed rows are skipped."""
+        path = os.path.join(self.temp_dir, "urls.csv")
+        with open(path, "w") as f:
+            f.write("exam,question,url\n")
+            f.write("saa-c03,1,https://example.com/1\n")
+            f.write("cka,1,https://example.com/cka-1\n")
+            f.write("saa-c03,abc,https://example.com/bad\n")
+            f.write(",3,https://example.com/3\n")
+            f.write("saa-c03,4\n")
+            f.write("saa-c03,5,\n")
+
+        self.assertEqual(
+            load_url_map(path, exam="saa-c03"),
+            {1: "https://example.com/1", 3: "https://example.com/3"},
+        )
+
+    def test_load_skips_malformed_jsonl_lines(self):
+        """Test that a malformed JSONL line is skipped instead of failing the import."""
+        path = os.path.join(self.temp_dir, "urls.jsonl")
+        with open(path, "w") as f:
+            f.write('{"question": 1, "url": "https://example.com/1"}\n')
+            f.write('{"question": 2, "url": \n')
+            f.write("\n")
+            f.write('{"question": 3, "url": null}\n')
+            f.write('{"question": 4, "url": "https://example.com/4"}\n')
+
+        with self.assertLogs("examtopics", level="WARNING") as logs:
+            url_map = load_url_map(path)
+
+        self.assertEqual(url_map, {1: "https://example.com/1", 4: "https://example.com/4"})
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("line 2", logs.output[0])
+
+    def test_unsupported_format(self):
+        """Test that unknown file extensions are rejected."""
+        with self.assertRaises(ValueError):
+            load_url_map(os.path.join(self.temp_dir, "urls.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
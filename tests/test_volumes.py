@@ -0,0 +1,87 @@
+"""Tests for splitting merged output into volumes."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypdf import PdfReader
+
+from src.volumes import VolumeWriter
+from tests.pdf_fixtures import create_pdf
+
+
+class TestVolumeWriter(unittest.TestCase):
+    """Test cases for VolumeWriter."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _question_pdf(self, question_num, payload_size=0):
+        path = os.path.join(self.temp_dir, f"q{question_num}.pdf")
+        create_pdf(path, label=f"question {question_num}", payload_size=payload_size)
+        return path
+
+    def test_requires_a_limit(self):
+        """Test that a volume writer without any limit is rejected."""
+        with self.assertRaises(ValueError):
+            VolumeWriter("exam", self.temp_dir)
+
+    def test_split_by_question_count(self):
+        """Test that volumes are written as soon as they are full."""
+        writer = VolumeWriter("exam", self.temp_dir, questions_per_volume=2)
+
+        writer.add(1, self._question_pdf(1))
+        writer.add(2, self._question_pdf(2))
+        # The first volume is finalized before the run is over
+        self.assertEqual(len(writer.volumes), 1)
+        self.assertTrue(os.path.exists(writer.volumes[0][0]))
+
+        writer.add(3, self._question_pdf(3))
+        writer.finish()
+
+        self.assertEqual(
+            [(os.path.basename(path), first, last) for path, first, last in writer.volumes],
+            [("exam_questions1-2_vol1.pdf", 1, 2), ("exam_questions3-3_vol2.pdf", 3, 3)],
+        )
+        self.assertEqual(
+            [writer.volume_pages[path] for path, _, _ in writer.volumes],
+            [[(1, 1, 1), (2, 2, 1)], [(3, 1, 1)]],
+        )
+        pages = PdfReader(writer.volumes[0][0]).pages
+        self.assertEqual(len(pages), 2)
+        self.assertIn(b"question 2", pages[1].get_contents().get_data())
+        self.assertFalse(
+            any(name.endswith(".part") for name in os.listdir(self.temp_dir))
+        )
+
+    def test_split_by_size(self):
+        """Test that a volume is closed before it would exceed the size limit."""
+        writer = VolumeWriter("exam", self.temp_dir, max_volume_mb=0.05)
+
+        for question_num in range(1, 5):
+            writer.add(question_num, self._question_pdf(question_num, 20_000))
+        writer.finish()
+
+        self.assertEqual(
+            [(first, last) for _, first, last in writer.volumes], [(1, 2), (3, 4)]
+        )
+        for path, _, _ in writer.volumes:
+            self.assertLessEqual(os.path.getsize(path), 0.05 * 1024 * 1024)
+
+    def test_finish_without_questions(self):
+        """Test that finishing an empty writer creates no volume."""
+        writer = VolumeWriter("exam", self.temp_dir, questions_per_volume=2)
+        writer.finish()
+
+        self.assertEqual(writer.volumes, [])
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""Tests for the SQLite work queue and its dispatcher."""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.pipeline import (
+    STATUS_FAILED,
+    STATUS_SUCCESS,
+    QuestionResult,
+    QuestionTask,
+)
+from src.work_queue import QueueDispatcher, WorkQueue
+
+JOB = "saa-c03:1-3"
+
+
+def _task(question_num, final_attempt=False):
+    return QuestionTask(
+        exam="saa-c03",
+        question=question_num,
+        title=f"Topic 1 Question #{question_num}",
+        keyword="SAA-C03",
+        url_substring="/discussions/amazon/",
+        pdf_path=f"output/saa-c03_question{question_num}.pdf",
+        final_attempt=final_attempt,
+    )
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "queue.sqlite")
+        self.queue = WorkQueue(self.db_path, lease_seconds=60)
+        self.queue.open()
+        self.queue.create_job(JOB, {"exam": "saa-c03"})
+
+    def tearDown(self):
+        self.queue.close()
+        self.temp_dir.cleanup()
+
+    def test_lease_and_complete(self):
+        self.queue.submit(JOB, _task(1))
+
+        job_id, task = self.queue.lease("worker-a")
+        self.assertEqual(job_id, JOB)
+        self.assertEqual(vars(task), vars(_task(1)))
+        self.assertIsNone(self.queue.lease("worker-b"))
+
+        self.assertTrue(
+            self.queue.complete(JOB, "worker-a", QuestionResult(1, STATUS_SUCCESS))
+        )
+        self.assertEqual(
+            [r.status for r in self.queue.results(JOB, {1})], [STATUS_SUCCESS]
+        )
+        self.assertFalse(self.queue.has_open_tasks(JOB))
+
+    def test_tasks_are_leased_in_question_order(self):
+        for question_num in (3, 1, 2):
+            self.queue.submit(JOB, _task(question_num))
+
+        leased = [self.queue.lease("worker-a")[1].question for _ in range(3)]
+
+        self.assertEqual(leased, [1, 2, 3])
+
+    def test_expired_lease_goes_to_another_worker(self):
+        self.queue.lease_seconds = 0.05
+        self.queue.submit(JOB, _task(1))
+        self.queue.lease("worker-a")
+
+        time.sleep(0.1)
+        self.assertEqual(self.queue.lease("worker-b")[1].question, 1)
+
+        # The worker that lost the lease cannot complete the task any more
+        self.assertFalse(
+            self.queue.complete(JOB, "worker-a", QuestionResult(1, STATUS_SUCCESS))
+        )
+        self.assertTrue(
+            self.queue.complete(JOB, "worker-b", QuestionResult(1, STATUS_SUCCESS))
+        )
+
+    def test_renew_keeps_lease(self):
+        self.queue.lease_seconds = 0.2
+        self.queue.submit(JOB, _task(1))
+        self.queue.lease("worker-a")
+
+        time.sleep(0.1)
+        self.assertTrue(self.queue.renew(JOB, 1, "worker-a"))
+        time.sleep(0.15)
+
+        self.assertIsNone(self.queue.lease("worker-b"))
+
+    def test_task_fails_after_repeated_expired_leases(self):
+        self.queue.lease_seconds = 0.01
+        self.queue.max_attempts = 2
+        self.queue.submit(JOB, _task(1))
+
+        self.queue.lease("worker-a")
+        time.sleep(0.02)
+        self.queue.lease("worker-b")
+        time.sleep(0.02)
+
+        self.assertIsNone(self.queue.lease("worker-c"))
+        results = self.queue.results(JOB, {1})
+        self.assertEqual(results[0].status, STATUS_FAILED)
+
+    def test_resubmitting_keeps_results_but_final_attempt_requeues(self):
+        self.queue.submit(JOB, _task(1))
+        self.queue.lease("worker-a")
+        self.queue.complete(
+            JOB, "worker-a", QuestionResult(1, STATUS_FAILED, failure="fetch")
+        )
+
+        self.queue.submit(JOB, _task(1))
+        self.assertIsNone(self.queue.lease("worker-a"))
+
+        self.queue.submit(JOB, _task(1, final_attempt=True))
+        self.assertTrue(self.queue.lease("worker-a")[1].final_attempt)
+
+    def test_duplicate_checks_span_workers(self):
+        for question_num in (1, 2):
+            self.queue.submit(JOB, _task(question_num))
+
+        self.assertIsNone(self.queue.check_duplicate(JOB, 1, "https://a/", None))
+        self.assertIsNone(self.queue.check_duplicate(JOB, 1, "https://a/", 12345))
+
+        self.assertEqual(self.queue.check_duplicate(JOB, 2, "https://a/", None), 1)
+        self.assertEqual(self.queue.check_duplicate(JOB, 2, "https://b/", 12345), 1)
+
+    def test_failed_question_releases_its_page(self):
+        self.queue.submit(JOB, _task(1))
+        self.queue.lease("worker-a")
+        self.queue.check_duplicate(JOB, 1, "https://a/", 12345)
+
+        self.queue.complete(JOB, "worker-a", QuestionResult(1, STATUS_FAILED))
+
+        self.assertIsNone(self.queue.check_duplicate(JOB, 2, "https://a/", None))
+
+    def test_open_work_waits_for_coordinator(self):
+        self.assertTrue(self.queue.has_open_work())
+
+        self.queue.finish_job(JOB)
+
+        self.assertFalse(self.queue.has_open_work())
+
+
+class TestQueueDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "queue.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_returns_results_completed_by_workers(self):
+        dispatcher = QueueDispatcher(
+            WorkQueue(self.db_path), JOB, {"exam": "saa-c03"}, poll_interval=0.01
+        )
+        dispatcher.start()
+        dispatcher.submit(_task(1))
+        dispatcher.submit(_task(2))
+
+        with WorkQueue(self.db_path) as worker_queue:
+            for _ in range(2):
+                _, task = worker_queue.lease("worker-a")
+                worker_queue.complete(
+                    JOB, "worker-a", QuestionResult(task.question, STATUS_SUCCESS)
+                )
+
+        results = dispatcher.poll()
+        self.assertEqual(sorted(r.question for r in results), [1, 2])
+        self.assertEqual(dispatcher.busy, 0)
+
+        dispatcher.close()
+        with WorkQueue(self.db_path) as worker_queue:
+            self.assertFalse(worker_queue.has_open_work())
+
+
+if __name__ == "__main__":
+    unittest.main()